@@ -0,0 +1,12 @@
+from typing import Dict, Type
+from bitboard import BitBoardGame
+from game import Game
+from numpy_board import NumpyGame, np
+
+# Pelilaudan toteutukset nimittäin. NumPy-toteutus on mukana vain, jos NumPy on asennettu.
+BACKENDS: Dict[str, Type[Game]] = {
+    'laitumet': Game,
+    'bittikartta': BitBoardGame,
+}
+if np is not None:
+    BACKENDS['numpy'] = NumpyGame
@@ -0,0 +1,433 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple, Type
+from backends import BACKENDS
+from constants import ALPHA, BETA, BOARD_HEIGHT, BOARD_WIDTH, COMPUTER, PLAYER
+from engine import Engine, create_minimax_engine
+from game import Game
+from instrumentation import SearchInstrumentation, to_json_value
+from minimax import (
+    ASPIRATION_WINDOW,
+    SPLIT_POLICIES,
+    SearchContext,
+    SearchOptions,
+    SearchResult,
+    generate_moves,
+    get_possible_moves,
+    iterative_deepening,
+    minimax
+)
+from parallel import ParallelSearch
+from transposition import TranspositionTable
+
+# Vakiotilanteet saadaan pelaamalla ahneesti näin monta vuoroa alusta
+BENCHMARK_POSITION_TURNS = (2, 6, 10)
+# Pääjatkon haun mittauksessa vakiotilanteita on enemmän, jotta myös keskipeli on mukana
+SEARCH_POSITION_TURNS = (2, 6, 10, 14, 18)
+# Hakumittausten hajautustaulun koko megatavuina
+SUITE_TABLE_SIZE_IN_MEGABYTES = 16
+# Täyden laudan mittauksessa laitumet jaetaan ottelijoille tällä siemenellä
+FULL_BOARD_SEED = 2024
+
+
+def get_benchmark_positions(board_height: int = BOARD_HEIGHT, board_width: int = BOARD_WIDTH,
+                            turns: Tuple[int, ...] = BENCHMARK_POSITION_TURNS,
+                            game_class: Type[Game] = Game) -> List[Tuple[str, Game]]:
+    """Palauttaa vakiotilanteet, jotka ovat samat jokaisella ajokerralla"""
+    positions: List[Tuple[str, Game]] = []
+    for amount_of_turns in turns:
+        game = game_class(board_height, board_width, False)
+        for _ in range(amount_of_turns):
+            possible_moves = get_possible_moves(game, game.is_players_turn)
+            if len(possible_moves) == 0:
+                break
+            game.make_move(possible_moves[0])
+        positions.append((f'vuoro {amount_of_turns}', game))
+    return positions
+
+
+def benchmark_parallel(depth: int, worker_counts: List[int]) -> None:
+    """Mittaa rinnakkaisen haun nopeutuksen eri työprosessimäärillä vakiotilanteissa"""
+    positions = get_benchmark_positions()
+    baseline_time: float | None = None
+    baseline_moves = None
+    print(f'{"prosessit":>10} {"aika (s)":>10} {"nopeutus":>10} {"solmut":>10} '
+          f'{"samat siirrot":>14}')
+    for workers in worker_counts:
+        with ParallelSearch(workers) as search:
+            # Prosessien käynnistys ei kuulu mitattavaan aikaan
+            search.search(positions[0][1], 1, positions[0][1].is_players_turn)
+            start_time = time.perf_counter()
+            nodes = 0
+            moves = []
+            for _, game in positions:
+                _, move, position_nodes = search.search(game, depth, game.is_players_turn)
+                nodes += position_nodes
+                moves.append(move)
+            elapsed_time = time.perf_counter() - start_time
+
+        if baseline_time is None:
+            baseline_time, baseline_moves = elapsed_time, moves
+        print(f'{workers:>10} {elapsed_time:>10.2f} {baseline_time / elapsed_time:>10.2f} '
+              f'{nodes:>10} {"kyllä" if moves == baseline_moves else "ei":>14}')
+
+
+def _measure(function, repetitions: int) -> float:
+    """Palauttaa funktion yhden suorituskerran keskimääräisen keston sekunteina"""
+    start_time = time.perf_counter()
+    for _ in range(repetitions):
+        function()
+    return (time.perf_counter() - start_time) / repetitions
+
+
+def benchmark_backends(depth: int, repetitions: int) -> None:
+    """Vertaa pelilaudan eri toteutusten arviointi-, siirronmuodostus- ja hakunopeutta"""
+    print(f'{"toteutus":>12} {"arviot/s":>10} {"siirrot/s":>10} {"järjestys/s":>12} '
+          f'{"haku (s)":>10} {"solmut/s":>10}')
+    for name, game_class in BACKENDS.items():
+        positions = [game for _, game in get_benchmark_positions(game_class=game_class)]
+        evaluation_time = sum(_measure(game.evaluate_game_state, repetitions)
+                              for game in positions)
+        generation_time = sum(_measure(lambda game=game: generate_moves(game), repetitions)
+                              for game in positions)
+        # Siirtojen järjestäminen arvioi kaikki sisarsiirrot
+        ordering_time = sum(
+            _measure(lambda game=game: get_possible_moves(game, game.is_players_turn),
+                     max(1, repetitions // 10))
+            for game in positions)
+
+        nodes = 0
+        start_time = time.perf_counter()
+        for game in positions:
+            context = SearchContext(TranspositionTable(16))
+            minimax(game, depth, ALPHA, BETA, game.is_players_turn, context)
+            nodes += context.nodes
+        search_time = time.perf_counter() - start_time
+
+        print(f'{name:>12} {len(positions) / evaluation_time:>10.0f} '
+              f'{len(positions) / generation_time:>10.0f} '
+              f'{len(positions) / ordering_time:>12.0f} {search_time:>10.2f} '
+              f'{nodes / search_time:>10.0f}')
+
+
+def get_full_board(game_class: Type[Game], board_size: int) -> Game:
+    """Palauttaa neliön muotoisen laudan, jonka jokainen laidun on miehitetty.
+    Miehittäjät arvotaan samalla siemenellä jokaisella ajokerralla."""
+    game = game_class(board_size, board_size, False)
+    generator = random.Random(FULL_BOARD_SEED)
+    for pasture in game.pastures:
+        pasture.occupy(generator.choice((PLAYER, COMPUTER)), 1)
+    return game
+
+
+def benchmark_largest_herd(board_size: int, repetitions: int) -> None:
+    """Mittaa suurimman yhtenäisen alueen laskennan nopeutta täydellä laudalla"""
+    print(f'{"toteutus":>12} {"pelaaja":>8} {"tekoäly":>8} {"aika (ms)":>10}')
+    for name, game_class in BACKENDS.items():
+        game = get_full_board(game_class, board_size)
+        herd_time = _measure(game.calculate_who_has_largest_herd, repetitions)
+        print(f'{name:>12} {game.get_players_largest_herd():>8} '
+              f'{game.get_computers_largest_herd():>8} {herd_time * 1000:>10.3f}')
+
+
+def play_match_game(player: Engine, computer: Engine) -> int | None:
+    """Pelaa pelin kahden tekoälyn välillä, ja palauttaa voittajan"""
+    game = Game(BOARD_HEIGHT, BOARD_WIDTH, False)
+    while not game.is_over():
+        engine = player if game.is_players_turn else computer
+        move = engine.choose_move(game).move
+        if move is None:
+            raise SystemError('No next move found')
+        game.make_move(move)
+    return game.calculate_winner()
+
+
+def benchmark_split_policies(depth: int, games: int, time_limit: float) -> None:
+    """Vertaa jakotapojen hakunopeutta vakiotilanteissa, ja pelivoimaa kaikki jaot
+    kokeilevaa tekoälyä vastaan samalla siirtokohtaisella aikarajalla"""
+    positions = get_benchmark_positions()
+    print(f'{"jakotapa":>10} {"haku (s)":>10} {"solmut":>10} {"voitot":>7} '
+          f'{"tasapelit":>10} {"häviöt":>7}')
+    for name, split_policy in SPLIT_POLICIES.items():
+        nodes = 0
+        start_time = time.perf_counter()
+        for _, game in positions:
+            context = SearchContext(TranspositionTable(16), split_policy=split_policy)
+            minimax(game, depth, ALPHA, BETA, game.is_players_turn, context)
+            nodes += context.nodes
+        search_time = time.perf_counter() - start_time
+
+        results = {'voitot': 0, 'tasapelit': 0, 'häviöt': 0}
+        for game_number in range(games):
+            # Aloittaja vaihtuu joka pelissä
+            engine = create_minimax_engine(time_limit, split_policy=name)
+            opponent = create_minimax_engine(time_limit)
+            engine_side = PLAYER if game_number % 2 == 0 else COMPUTER
+            if engine_side == PLAYER:
+                winner = play_match_game(engine, opponent)
+            else:
+                winner = play_match_game(opponent, engine)
+            if winner is None:
+                results['tasapelit'] += 1
+            elif winner == engine_side:
+                results['voitot'] += 1
+            else:
+                results['häviöt'] += 1
+
+        print(f'{name:>10} {search_time:>10.2f} {nodes:>10} {results["voitot"]:>7} '
+              f'{results["tasapelit"]:>10} {results["häviöt"]:>7}')
+
+
+def _search_positions(positions: List[Tuple[str, Game]], options: SearchOptions
+                      ) -> Tuple[int, int, List[float]]:
+    """Palauttaa syventyvän haun solmujen ja uudelleenhakujen yhteismäärät sekä
+    tilanteiden arvot"""
+    nodes = 0
+    researches = 0
+    values = []
+    for _, game in positions:
+        result = iterative_deepening(game, game.is_players_turn, options, TranspositionTable(16))
+        nodes += result.nodes
+        researches += int(result.statistics['researches']
+                          + result.statistics['aspiration_failures'])
+        values.append(result.value)
+    return nodes, researches, values
+
+
+def benchmark_principal_variation_search(depth: int) -> None:
+    """Vertaa syventyvän haun solmumääriä samaan syvyyteen tavallisella alfa-beeta-haulla,
+    pääjatkon haulla ja pääjatkon haulla ikkunoiden kanssa. Suhteet lasketaan
+    ensimmäiseen hakuun verrattuna."""
+    positions = get_benchmark_positions(turns=SEARCH_POSITION_TURNS)
+    configurations = {
+        'alfa-beeta': (False, None),
+        'pääjatko': (True, None),
+        'ikkunat': (True, ASPIRATION_WINDOW),
+    }
+    print(f'{"haku":>10} {"haku (s)":>10} {"solmut":>10} {"suhde":>7} '
+          f'{"uudelleen":>10} {"samat arvot":>12}')
+    baseline: Tuple[int, List[float]] | None = None
+    for name, (null_window_search, aspiration_window) in configurations.items():
+        options = SearchOptions(max_depth=depth, aspiration_window=aspiration_window,
+                                null_window_search=null_window_search)
+        start_time = time.perf_counter()
+        nodes, researches, values = _search_positions(positions, options)
+        search_time = time.perf_counter() - start_time
+
+        if baseline is None:
+            baseline = (nodes, values)
+        baseline_nodes, baseline_values = baseline
+        print(f'{name:>10} {search_time:>10.2f} {nodes:>10} {nodes / baseline_nodes:>7.2f} '
+              f'{researches:>10} {"kyllä" if values == baseline_values else "ei":>12}')
+
+
+def _get_commit() -> str | None:
+    """Palauttaa versionhallinnan nykyisen version tunnisteen, jos se on saatavilla"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _time_search(game: Game, depth: int, repetitions: int, instrument: bool
+                 ) -> Tuple[float, SearchResult]:
+    """Palauttaa toistojen nopeimman syventyvän haun ajan annettuun syvyyteen ja haun
+    tuloksen. Jokainen toisto aloitetaan tyhjällä hajautustaululla, joten toistojen
+    tulokset ovat samat."""
+    fastest_time = float('inf')
+    for _ in range(repetitions):
+        table = TranspositionTable(SUITE_TABLE_SIZE_IN_MEGABYTES)
+        start_time = time.perf_counter()
+        instrumentation = SearchInstrumentation() if instrument else None
+        result = iterative_deepening(game, game.is_players_turn, SearchOptions(max_depth=depth),
+                                     table, instrumentation=instrumentation)
+        fastest_time = min(fastest_time, time.perf_counter() - start_time)
+    return fastest_time, result
+
+
+def _search_position(game: Game, depth: int, repetitions: int, instrument: bool
+                     ) -> Dict[str, Any]:
+    """Mittaa syventyvän haun ajan kuhunkin syvyyteen, solmunopeuden ja muistin huippukäytön
+    yhdessä tilanteessa. Ajoista valitaan toistojen nopein, jotta satunnaiset viiveet eivät
+    vaikuta vertailuun. Muisti mitataan erillisellä haulla, koska seuranta hidastaa hakua.
+    Tarkempien mittausten kanssa tulokseen lisätään haun tilastot."""
+    timings = [_time_search(game, reached_depth, repetitions, instrument)
+               for reached_depth in range(1, depth + 1)]
+    # Solmut, arvo ja siirto ovat syvimmän haun, jonka aika raportoidaan
+    search_time, result = timings[-1]
+
+    # Hajautustaulu varataan ennen seurantaa, joten huippu kertoo haun omasta muistista
+    table = TranspositionTable(SUITE_TABLE_SIZE_IN_MEGABYTES)
+    tracemalloc.start()
+    iterative_deepening(game, game.is_players_turn, SearchOptions(max_depth=depth), table)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    position: Dict[str, Any] = {
+        'depth': result.depth,
+        'nodes': result.nodes,
+        'time': search_time,
+        'nodes_per_second': result.nodes / search_time,
+        'time_to_depth': [timing for timing, _ in timings],
+        'peak_memory': peak_memory,
+        'value': to_json_value(result.value),
+        'move': None if result.move is None else list(result.move),
+    }
+    if instrument:
+        position['statistics'] = result.statistics
+    return position
+
+
+def run_search_suite(depth: int, repetitions: int = 3, instrument: bool = False
+                     ) -> Dict[str, Any]:
+    """Mittaa minimax-haun vakiotilanteissa, ja palauttaa tulokset muodossa, jonka voi
+    tallettaa ja jota voi verrata toisen version tuloksiin. Tarkempien mittausten kanssa
+    ja ilman tehtyjen ajojen vertailu kertoo mittausten hidastuksen."""
+    positions = []
+    for name, game in get_benchmark_positions(turns=SEARCH_POSITION_TURNS):
+        positions.append({'position': name,
+                          **_search_position(game, depth, repetitions, instrument)})
+    nodes = sum(position['nodes'] for position in positions)
+    search_time = sum(position['time'] for position in positions)
+    return {
+        'commit': _get_commit(),
+        'python': platform.python_version(),
+        'board': [BOARD_HEIGHT, BOARD_WIDTH],
+        'depth': depth,
+        'repetitions': repetitions,
+        'instrumented': instrument,
+        'positions': positions,
+        'total': {
+            'nodes': nodes,
+            'time': search_time,
+            'nodes_per_second': nodes / search_time,
+            'peak_memory': max(position['peak_memory'] for position in positions),
+        },
+    }
+
+
+def compare_suites(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> None:
+    """Tulostaa kahden mittauksen solmumäärien, aikojen ja muistin suhteet tilanteittain"""
+    print(f'{"tilanne":>10} {"solmut":>8} {"aika":>8} {"solmut/s":>9} {"muisti":>8} '
+          f'{"sama siirto":>12}')
+    rows = list(zip(baseline['positions'], candidate['positions']))
+    rows.append((baseline['total'], candidate['total']))
+    for old, new in rows:
+        name = old.get('position', 'yhteensä')
+        same_move = ('' if 'move' not in old
+                     else 'kyllä' if (old['move'], old['value']) == (new['move'], new['value'])
+                     else 'ei')
+        print(f'{name:>10} {new["nodes"] / old["nodes"]:>8.2f} {new["time"] / old["time"]:>8.2f} '
+              f'{new["nodes_per_second"] / old["nodes_per_second"]:>9.2f} '
+              f'{new["peak_memory"] / old["peak_memory"]:>8.2f} {same_move:>12}')
+
+
+def _add_parallel_arguments(parser: argparse.ArgumentParser) -> None:
+    """Lisää rinnakkaisen haun mittauksen valitsimet"""
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.set_defaults(
+        run=lambda arguments: benchmark_parallel(arguments.depth, arguments.workers))
+
+
+def _add_backends_arguments(parser: argparse.ArgumentParser) -> None:
+    """Lisää pelilaudan toteutusten vertailun valitsimet"""
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--repetitions', type=int, default=1000)
+    parser.set_defaults(
+        run=lambda arguments: benchmark_backends(arguments.depth, arguments.repetitions))
+
+
+def _add_herd_arguments(parser: argparse.ArgumentParser) -> None:
+    """Lisää suurimman alueen laskennan mittauksen valitsimet"""
+    parser.add_argument('--size', type=int, default=8)
+    parser.add_argument('--repetitions', type=int, default=100)
+    parser.set_defaults(
+        run=lambda arguments: benchmark_largest_herd(arguments.size, arguments.repetitions))
+
+
+def _add_splits_arguments(parser: argparse.ArgumentParser) -> None:
+    """Lisää jakotapojen vertailun valitsimet"""
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--games', type=int, default=2)
+    parser.add_argument('--time-limit', type=float, default=0.2)
+    parser.set_defaults(run=lambda arguments: benchmark_split_policies(
+        arguments.depth, arguments.games, arguments.time_limit))
+
+
+def _add_pvs_arguments(parser: argparse.ArgumentParser) -> None:
+    """Lisää pääjatkon haun vertailun valitsimet"""
+    parser.add_argument('--depth', type=int, default=4)
+    parser.set_defaults(
+        run=lambda arguments: benchmark_principal_variation_search(arguments.depth))
+
+
+def _run_suite(arguments: argparse.Namespace) -> None:
+    """Kirjoittaa mittauksen tulokset tiedostoon tai vakiotulosteeseen"""
+    results = json.dumps(run_search_suite(arguments.depth, arguments.repetitions,
+                                          arguments.instrument), indent=2)
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='utf-8') as file:
+            file.write(results + '\n')
+    else:
+        print(results)
+
+
+def _add_suite_arguments(parser: argparse.ArgumentParser) -> None:
+    """Lisää minimax-haun mittauksen valitsimet"""
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--output', help='tulostiedosto, oletuksena vakiotuloste')
+    parser.add_argument('--instrument', action='store_true',
+                        help='haun tarkemmat tilastot tuloksiin')
+    parser.set_defaults(run=_run_suite)
+
+
+def _run_compare(arguments: argparse.Namespace) -> None:
+    """Lukee kaksi talletettua mittausta ja vertaa niitä"""
+    with open(arguments.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    with open(arguments.candidate, encoding='utf-8') as file:
+        candidate = json.load(file)
+    compare_suites(baseline, candidate)
+
+
+def _add_compare_arguments(parser: argparse.ArgumentParser) -> None:
+    """Lisää mittausten vertailun valitsimet"""
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.set_defaults(run=_run_compare)
+
+
+# Alikomennot, niiden ohjeet ja valitsimet. Valitsimet asettavat myös komennon suorituksen.
+COMMANDS: Dict[str, Tuple[str, Callable[[argparse.ArgumentParser], None]]] = {
+    'parallel': ('rinnakkaisen haun nopeutus eri työprosessimäärillä', _add_parallel_arguments),
+    'backends': ('pelilaudan toteutusten vertailu', _add_backends_arguments),
+    'herd': ('suurimman alueen laskenta täydellä laudalla', _add_herd_arguments),
+    'splits': ('jakotapojen nopeus ja pelivoima', _add_splits_arguments),
+    'pvs': ('pääjatkon haun ja ikkunoiden vaikutus solmumääriin', _add_pvs_arguments),
+    'suite': ('minimax-haun nopeus, aika syvyyksiin ja muisti JSON-muodossa',
+              _add_suite_arguments),
+    'compare': ('kahden suite-mittauksen vertailu', _add_compare_arguments),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Tekoälyn suorituskykymittaukset')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, (description, add_arguments) in COMMANDS.items():
+        add_arguments(subparsers.add_parser(name, help=description))
+    arguments = parser.parse_args()
+    arguments.run(arguments)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+from __future__ import annotations
+from array import array
+from functools import cache
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+from constants import COMPUTER, PLAYER
+from game import Game
+from pasture import Pasture
+from topology import Topology
+
+# Siirtymä esitetään lähtömaskin ja indeksien erotuksen pareina
+ShiftTable = Tuple[Tuple[int, int], ...]
+
+
+class ShiftTables(NamedTuple):
+    """Laudan rakenteesta lasketut bittimaskit ja siirtymät"""
+    forward: Tuple[ShiftTable, ...]
+    backward: Tuple[ShiftTable, ...]
+    neighbours: Tuple[int, ...]
+    edge: int
+    full: int
+
+
+def _compute_shift_table(steps: List[Tuple[int, int]]) -> ShiftTable:
+    """Ryhmittelee askeleet indeksien erotuksen mukaan, jolloin kukin ryhmä
+    voidaan siirtää yhdellä bittisiirrolla"""
+    masks: Dict[int, int] = {}
+    for source, target in steps:
+        masks[target - source] = masks.get(target - source, 0) | (1 << source)
+    return tuple((mask, delta) for delta, mask in sorted(masks.items()))
+
+
+@cache
+def get_shift_tables(topology: Topology) -> ShiftTables:
+    """Palauttaa laudan suuntakohtaiset siirtotaulut. Taulut lasketaan kerran
+    kutakin laudan rakennetta kohden."""
+    amount_of_pastures = topology.get_amount_of_pastures()
+    forward: List[ShiftTable] = []
+    backward: List[ShiftTable] = []
+    for direction in range(len(topology.rays[0])):
+        steps = [(index, rays[direction][0])
+                 for index, rays in enumerate(topology.rays) if len(rays[direction]) > 0]
+        forward.append(_compute_shift_table(steps))
+        backward.append(_compute_shift_table(
+            [(target, source) for source, target in steps]))
+
+    neighbours = tuple(sum(1 << neighbour for neighbour in pasture_neighbours)
+                       for pasture_neighbours in topology.neighbours)
+    edge = sum(1 << index for index, pasture_neighbours in enumerate(topology.neighbours)
+               if len(pasture_neighbours) < 6)
+    return ShiftTables(tuple(forward), tuple(backward), neighbours, edge,
+                       (1 << amount_of_pastures) - 1)
+
+
+def shift(mask: int, table: ShiftTable) -> int:
+    """Siirtää maskin jokaista laidunta yhden askeleen taulun suuntaan"""
+    result = 0
+    for source_mask, delta in table:
+        part = mask & source_mask
+        if part:
+            result |= part << delta if delta > 0 else part >> -delta
+    return result
+
+
+def iterate_bits(mask: int) -> Iterator[int]:
+    """Palauttaa maskin asetettujen bittien indeksit pienimmästä alkaen"""
+    while mask:
+        lowest_bit = mask & -mask
+        yield lowest_bit.bit_length() - 1
+        mask ^= lowest_bit
+
+
+class BitBoard:
+    """Pelilaudan tila bittimaskeina: vapaat laitumet, kummankin ottelijan laitumet
+    ja vähintään kahden lampaan laumat. Lampaiden määrät ovat tiiviissä taulukossa."""
+
+    def __init__(self, topology: Topology) -> None:
+        self.tables = get_shift_tables(topology)
+        self.free = self.tables.full
+        self.occupied = [0, 0]
+        self.stacks = 0
+        self.sheep = array('H', [0] * topology.get_amount_of_pastures())
+
+    def __deepcopy__(self, memo) -> BitBoard:
+        copied = BitBoard.__new__(BitBoard)
+        copied.tables = self.tables
+        copied.free = self.free
+        copied.occupied = list(self.occupied)
+        copied.stacks = self.stacks
+        copied.sheep = array('H', self.sheep)
+        memo[id(self)] = copied
+        return copied
+
+    # Laitumien tila
+
+    def get_occupier(self, index: int) -> int | None:
+        """Palauttaa laitumen miehittäjän"""
+        bit = 1 << index
+        if self.occupied[PLAYER] & bit:
+            return PLAYER
+        if self.occupied[COMPUTER] & bit:
+            return COMPUTER
+        return None
+
+    def set_occupier(self, index: int, occupier: int | None) -> None:
+        """Asettaa laitumen miehittäjän"""
+        bit = 1 << index
+        self.occupied[PLAYER] &= ~bit
+        self.occupied[COMPUTER] &= ~bit
+        if occupier is None:
+            self.free |= bit
+        else:
+            self.free &= ~bit
+            self.occupied[occupier] |= bit
+
+    def set_sheep(self, index: int, sheep: int | None) -> None:
+        """Asettaa laitumen lampaiden määrän"""
+        self.sheep[index] = sheep if sheep is not None else 0
+        if sheep is not None and sheep > 1:
+            self.stacks |= 1 << index
+        else:
+            self.stacks &= ~(1 << index)
+
+    # Siirrot
+
+    def get_free_neighbours(self, index: int) -> int:
+        """Palauttaa laitumen vapaat naapurit maskina"""
+        return self.tables.neighbours[index] & self.free
+
+    def get_target(self, index: int, direction: int) -> int | None:
+        """Liu'uttaa laumaa annettuun suuntaan niin pitkälle kuin vapaita laitumia riittää"""
+        table = self.tables.forward[direction]
+        position = 1 << index
+        while True:
+            next_position = shift(position, table) & self.free
+            if not next_position:
+                break
+            position = next_position
+        if position == 1 << index:
+            return None
+        return position.bit_length() - 1
+
+    def get_targets(self, index: int) -> List[int]:
+        """Palauttaa laitumelta mahdolliset kohdelaitumet"""
+        targets: List[int] = []
+        for direction in range(len(self.tables.forward)):
+            target = self.get_target(index, direction)
+            if target is not None:
+                targets.append(target)
+        return targets
+
+    def get_pastures_next_to_free(self) -> int:
+        """Palauttaa maskina laitumet, joilla on ainakin yksi vapaa naapuri"""
+        result = 0
+        for table in self.tables.backward:
+            result |= shift(self.free, table)
+        return result
+
+    def get_movable(self, occupier: int) -> int:
+        """Palauttaa maskina ottelijan laumat, joita voi siirtää"""
+        return self.occupied[occupier] & self.stacks & self.get_pastures_next_to_free()
+
+    def get_largest_herd(self, occupier: int) -> int:
+        """Palauttaa ottelijan laidunten suurimman yhtenäisen alueen koon. Alue
+        kasvatetaan siemenlaitumesta naapurimaskeilla, kunnes se ei enää laajene."""
+        remaining = self.occupied[occupier]
+        largest_herd = 0
+        while remaining:
+            herd = remaining & -remaining
+            frontier = herd
+            while frontier:
+                neighbours = 0
+                for index in iterate_bits(frontier):
+                    neighbours |= self.tables.neighbours[index]
+                frontier = neighbours & remaining & ~herd
+                herd |= frontier
+            largest_herd = max(largest_herd, herd.bit_count())
+            remaining &= ~herd
+        return largest_herd
+
+    def count_mobility(self, index: int) -> int:
+        """Palauttaa laitumen siirtosuuntien määrän, eli vapaiden naapurien määrän"""
+        return (self.tables.neighbours[index] & self.free).bit_count()
+
+    def evaluate(self) -> int:
+        """Palauttaa siirrettävien laumojen yhteenlasketun heuristisen arvon"""
+        value = 0
+        for index in iterate_bits(self.get_movable(PLAYER)):
+            value += (self.sheep[index] - 1) * self.count_mobility(index)
+        for index in iterate_bits(self.get_movable(COMPUTER)):
+            value -= (self.sheep[index] - 1) * self.count_mobility(index)
+        return value
+
+
+class BitBoardPasture(Pasture):
+    """Laidun, jonka miehittäjä ja lampaat talletetaan yhteiseen bittikarttaan.
+    Laitumen kyselyt ovat bittimaskioperaatioita."""
+
+    __slots__ = ('board',)
+    _SLOTS = Pasture._SLOTS + __slots__
+
+    def __init__(self, coordinates, board: BitBoard, index: int, topology: Topology) -> None:
+        self.board = board
+        super().__init__(coordinates, index=index, topology=topology)
+
+    @property
+    def occupier(self) -> int | None:
+        return self.board.get_occupier(self.index)
+
+    @property
+    def sheep(self) -> int | None:
+        return self.board.sheep[self.index] or None
+
+    def _store_state(self, occupier: int | None, sheep: int | None) -> None:
+        self.board.set_occupier(self.index, occupier)
+        self.board.set_sheep(self.index, sheep)
+
+    def get_amount_of_sheep(self) -> int:
+        return self.board.sheep[self.index]
+
+    def is_on_edge(self, pastures: List[Pasture]) -> bool:
+        return bool(self.board.tables.edge >> self.index & 1)
+
+    def get_free_neighbours(self, pastures: List[Pasture]) -> List[Pasture]:
+        return [pastures[index]
+                for index in iterate_bits(self.board.get_free_neighbours(self.index))]
+
+    def is_surrounded(self, pastures: List[Pasture]) -> bool:
+        return not self.board.get_free_neighbours(self.index)
+
+    def is_possible_to_move(self, pastures: List[Pasture]) -> bool:
+        return bool(self.board.stacks >> self.index & 1) and not self.is_surrounded(pastures)
+
+    def get_potential_targets(self, pastures: List[Pasture]) -> List[Pasture]:
+        return [pastures[index] for index in self.board.get_targets(self.index)]
+
+    def get_amount_of_potential_targets(self, pastures: List[Pasture]) -> int:
+        # Jokaiseen vapaaseen naapuriin päin on täsmälleen yksi kohde
+        return self.board.count_mobility(self.index)
+
+    def are_any_potential_targets(self, pastures: List[Pasture]) -> bool:
+        return self.is_possible_to_move(pastures)
+
+
+class BitBoardGame(Game):
+    """Peli, jonka laudan tila on bittikartassa. Laitumet ovat näkymiä bittikarttaan,
+    joten käyttöliittymä, testit ja haku voivat käsitellä peliä tavalliseen tapaan."""
+    has_incremental_evaluation = False
+
+    def _create_pastures(self, board_height: int, board_width: int) -> List[Pasture]:
+        topology = self.topology
+        self.board = BitBoard(topology)
+        return [BitBoardPasture(coordinates, self.board, index, topology)
+                for index, coordinates in enumerate(topology.coordinates)]
+
+    def _evaluate_pastures(self) -> float:
+        return self.board.evaluate()
+
+    def _is_unable_to_move(self, occupier: int) -> bool:
+        return not self.board.get_movable(occupier)
+
+    def get_amount_of_pastures_occupied_by_player(self) -> int:
+        return self.board.occupied[PLAYER].bit_count()
+
+    def get_amount_of_pastures_occupied_by_computer(self) -> int:
+        return self.board.occupied[COMPUTER].bit_count()
+
+    def get_amount_of_free_pastures(self) -> int:
+        return self.board.free.bit_count()
+
+    def get_potential_initial_pastures(self) -> List[Pasture]:
+        return [self.pastures[index]
+                for index in iterate_bits(self.board.free & self.board.tables.edge)]
+
+    def _get_largest_herd(self, occupier: int) -> int:
+        return self.board.get_largest_herd(occupier)
+
+    def get_potential_pastures_to_choose(self) -> List[Pasture]:
+        movable = self.board.get_movable(PLAYER) | self.board.get_movable(COMPUTER)
+        return [self.pastures[index] for index in iterate_bits(movable)]
+
+    def get_potential_pastures_to_choose_this_turn(self) -> List[Pasture]:
+        occupier = PLAYER if self.is_players_turn else COMPUTER
+        return [self.pastures[index]
+                for index in iterate_bits(self.board.get_movable(occupier))]
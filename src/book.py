@@ -0,0 +1,154 @@
+from __future__ import annotations
+import argparse
+import mmap
+import os
+import struct
+import time
+from typing import Dict, NamedTuple
+from constants import BOARD_HEIGHT, BOARD_WIDTH, TABLE_SIZE_IN_MEGABYTES
+from game import Game, Move
+from minimax import SearchOptions, get_possible_moves, iterative_deepening
+from symmetry import get_inverse, transform_move
+from transposition import TranspositionTable
+
+# Avauskirjat ovat oletuksena tämän hakemiston alla laudan koon mukaan nimettyinä
+BOOK_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'books')
+BOOK_MAGIC = b'BSOB'
+BOOK_VERSION = 1
+# Otsake: tunniste, versio, laudan korkeus ja leveys sekä talletusten määrä
+HEADER = struct.Struct('<4sHHHI')
+# Talletus: kanoninen tiiviste, siirto (lähtö, kohde, lampaat), syvyys ja arvo
+ENTRY = struct.Struct('<QHHHHd')
+# Aloitussiirron kohteeksi talletetaan tämä, koska siirrolla ei ole kohdetta
+NO_TARGET = 0xFFFF
+
+
+class BookEntry(NamedTuple):
+    move: Move
+    depth: int
+    value: float
+
+
+def get_book_path(board_height: int, board_width: int) -> str:
+    """Palauttaa laudan kokoa vastaavan avauskirjan oletuspolun"""
+    return os.path.join(BOOK_DIRECTORY, f'opening_{board_height}x{board_width}.bin')
+
+
+class OpeningBook:
+    """Levylle talletettu avauskirja, jota luetaan muistiin kuvattuna.
+
+    Talletukset ovat kanonisen tiivisteen mukaan järjestyksessä, joten siirto löytyy
+    puolitushaulla lukematta koko tiedostoa. Siirrot on talletettu kanonisessa asennossa
+    ja muunnetaan haettaessa pelitilanteen asentoon."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.board_height, self.board_width, self._count = \
+            HEADER.unpack_from(self._data, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            self._data.close()
+            raise ValueError(f'Not an opening book: {path}')
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """Sulkee muistikuvauksen"""
+        self._data.close()
+
+    def _read_key(self, index: int) -> int:
+        """Palauttaa annetun talletuksen tiivisteen"""
+        return struct.unpack_from('<Q', self._data, HEADER.size + index * ENTRY.size)[0]
+
+    def lookup(self, game: Game) -> BookEntry | None:
+        """Palauttaa pelitilanteen siirron kirjasta, jos tilanne löytyy"""
+        if (game.board_height, game.board_width) != (self.board_height, self.board_width):
+            return None
+        key, symmetry = game.get_canonical_hash()
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._read_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._count or self._read_key(low) != key:
+            return None
+
+        _, source, target, sheep, depth, value = ENTRY.unpack_from(
+            self._data, HEADER.size + low * ENTRY.size)
+        move = Move(source, None if target == NO_TARGET else target, sheep)
+        return BookEntry(transform_move(move, get_inverse(symmetry)), depth, value)
+
+
+def load_opening_book(board_height: int, board_width: int) -> OpeningBook | None:
+    """Avaa laudan kokoa vastaavan avauskirjan, jos sellainen on laskettu"""
+    path = get_book_path(board_height, board_width)
+    if not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+
+def write_opening_book(path: str, board_height: int, board_width: int,
+                       entries: Dict[int, BookEntry]) -> None:
+    """Kirjoittaa kanonisilla tiivisteillä avainnetut talletukset avauskirjaksi"""
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, board_height, board_width,
+                               len(entries)))
+        for key in sorted(entries):
+            move, depth, value = entries[key]
+            target = NO_TARGET if move.target is None else move.target
+            file.write(ENTRY.pack(key, move.source, target, move.sheep, depth, value))
+
+
+def _add_book_entry(game: Game, table: TranspositionTable, depth: int,
+                    entries: Dict[int, BookEntry], verbose: bool) -> None:
+    """Laskee pelitilanteen parhaan siirron kirjaan, ellei symmetristä tilannetta
+    ole jo laskettu. Tilanteita, joissa vuorossa oleva ei voi siirtää, ei talleteta."""
+    key, symmetry = game.get_canonical_hash()
+    if key in entries:
+        return
+    start_time = time.perf_counter()
+    result = iterative_deepening(game, game.is_players_turn, SearchOptions(max_depth=depth), table)
+    if result.move is None:
+        return
+    entries[key] = BookEntry(transform_move(result.move, symmetry), result.depth, result.value)
+    if verbose:
+        print(f'{len(entries):>3} {str(result.move):<40} arvo {result.value:>6} '
+              f'{time.perf_counter() - start_time:>8.2f} s')
+
+
+def build_opening_book(board_height: int, board_width: int, depth: int,
+                       verbose: bool = False) -> Dict[int, BookEntry]:
+    """Laskee parhaan siirron jokaiseen aloitusvaiheen pelitilanteeseen annetulla
+    syvyydellä. Symmetriset tilanteet lasketaan vain kerran."""
+    game = Game(board_height, board_width, False)
+    table = TranspositionTable(TABLE_SIZE_IN_MEGABYTES)
+    entries: Dict[int, BookEntry] = {}
+    _add_book_entry(game, table, depth, entries, verbose)
+    for move in get_possible_moves(game, game.is_players_turn, prune_symmetric=True):
+        game.make_move(move)
+        _add_book_entry(game, table, depth, entries, verbose)
+        game.undo_move(move)
+    return entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Avauskirjan laskenta')
+    parser.add_argument('--height', type=int, default=BOARD_HEIGHT)
+    parser.add_argument('--width', type=int, default=BOARD_WIDTH)
+    parser.add_argument('--depth', type=int, default=6)
+    parser.add_argument('--output', help='oletuksena laudan kokoa vastaava kirja')
+    arguments = parser.parse_args()
+
+    entries = build_opening_book(arguments.height, arguments.width, arguments.depth,
+                                 verbose=True)
+    path = arguments.output or get_book_path(arguments.height, arguments.width)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_opening_book(path, arguments.height, arguments.width, entries)
+    print(f'{len(entries)} tilannetta talletettu tiedostoon {path}')
+
+
+if __name__ == '__main__':
+    main()
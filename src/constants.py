@@ -3,14 +3,34 @@ import math
 # Säädettävät muuttujat
 BOARD_HEIGHT = 4
 BOARD_WIDTH = 8
-COMPUTER_DEPTH = 3
-SIMULATED_PLAYER_DEPTH = 2
+COMPUTER_TIME_LIMIT = 1.0
+SIMULATED_PLAYER_TIME_LIMIT = 0.5
+TABLE_SIZE_IN_MEGABYTES = 64
+SEARCH_WORKERS = 1
+# Tekoälyn ja simuloidun pelaajan hakualgoritmi: 'minimax' tai 'mcts'
+COMPUTER_ENGINE = 'minimax'
+SIMULATED_PLAYER_ENGINE = 'minimax'
+# Laumoista kokeiltavat lammasmäärät: 'all', 'fixed', 'buckets' tai 'adaptive'
+SPLIT_POLICY = 'all'
+# Ottaa aloitussiirrot laudan kokoa vastaavasta avauskirjasta, jos se on laskettu
+USE_OPENING_BOOK = True
+# Loppupeli ratkaistaan tarkasti, kun vapaita laitumia on korkeintaan näin monta (None: ei koskaan)
+ENDGAME_FREE_PASTURES = 12
+# Näyttää tekoälyn haun tarkemmat tilastot sivupalkissa (kerääminen hidastaa hakua hieman)
+SHOW_SEARCH_STATISTICS = False
+# Kirjoittaa jokaisen tekoälyn haun tilastot JSON-riveinä tähän tiedostoon (None: ei kirjoiteta)
+SEARCH_LOG_FILE = None
+# Profiloi tekoälyn siirrot ja kirjoittaa tulokset tähän hakemistoon (None: ei profiloida)
+PROFILE_DIRECTORY = None
+# Vertaa ylläpidettyä pelitilannetta alusta asti laskettuun (hidas, vain vianetsintään)
+CHECK_INCREMENTAL_STATE = False
 
 # Pelilogiikka
 ALPHA = float('-inf')
 BETA = float('inf')
 PLAYER = 0
 COMPUTER = 1
+ZOBRIST_SEED = 20240321
 
 # Käyttöliittymä
 DISPLAY_SIZE = (960, 540)
@@ -18,6 +38,7 @@ BOARD_FONT_SIZE = 48
 SIDEBAR_MARGIN = 30
 SIDEBAR_DIVIDER = 50
 SIDEBAR_FONT_SIZE = 36
+STATISTICS_FONT_SIZE = 24
 
 # Hiiren painikkeet
 LEFT_MOUSE_BUTTON = 1
@@ -41,12 +62,12 @@ MINIMAL_RADIUS = PASTURE_RADIUS * math.cos(math.radians(30))
 PASTURE_BORDER_WIDTH = 5
 HIGHLIGHT_OFFSET = 60
 
-# Kuusikulmioruudukon suuntavektorit
+# Kuusikulmioruudukon suuntavektorit aksiaalisina (q, r) -koordinaatteina
 DIRECTION_VECTORS = [
-    (0, -2 * MINIMAL_RADIUS),  # "Pohjoinen"
-    (0, 2 * MINIMAL_RADIUS),  # "Etelä"
-    (math.sqrt(3) * MINIMAL_RADIUS, - MINIMAL_RADIUS),  # "Koillinen"
-    (-(math.sqrt(3) * MINIMAL_RADIUS), - MINIMAL_RADIUS),  # "Luode"
-    (math.sqrt(3) * MINIMAL_RADIUS, MINIMAL_RADIUS),  # "Kaakko"
-    (-(math.sqrt(3) * MINIMAL_RADIUS), MINIMAL_RADIUS),  # "Lounas"
+    (0, -1),  # "Pohjoinen"
+    (0, 1),  # "Etelä"
+    (1, -1),  # "Koillinen"
+    (-1, 0),  # "Luode"
+    (1, 0),  # "Kaakko"
+    (-1, 1),  # "Lounas"
 ]
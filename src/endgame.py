@@ -0,0 +1,128 @@
+from typing import Dict, NamedTuple, Tuple
+from constants import COMPUTER, PLAYER
+from game import Game, Move
+from minimax import SearchContext, get_possible_moves
+from symmetry import get_inverse, transform_move
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND
+
+# Ratkaistun pelin tulos pelaajan kannalta
+WIN = 1
+DRAW = 0
+LOSS = -1
+# Tulos minimax-algoritmin arvona
+OUTCOME_VALUES = {WIN: float('inf'), DRAW: 0, LOSS: float('-inf')}
+# Välimuisti tyhjennetään, kun siinä on näin monta ratkaistua tilannetta
+SOLVER_CACHE_ENTRIES = 1_000_000
+
+
+class SolverEntry(NamedTuple):
+    outcome: int
+    bound: int
+    move: Move | None
+
+
+class EndgameSolver:
+    """Ratkaisee loppupelin tarkasti pelaamalla jokaisen jatkon loppuun asti.
+
+    Tilanteen arvo on voitto, tasapeli tai häviö, jonka suurimman alueen vertailu
+    ratkaisee tasamäärillä. Ratkaistut tilanteet talletetaan omaan välimuistiinsa
+    kanonisella tiivisteellä, joten niitä ei lasketa uudelleen seuraavillakaan siirroilla."""
+
+    def __init__(self, free_pastures_threshold: int) -> None:
+        self.free_pastures_threshold = free_pastures_threshold
+        self._cache: Dict[int, SolverEntry] = {}
+        self.hits = 0
+
+    def is_solvable(self, game: Game) -> bool:
+        """Palauttaa tosi, jos vapaita laitumia on korkeintaan raja-arvon verran"""
+        return (not game.is_in_initial_placement()
+                and game.get_amount_of_free_pastures() <= self.free_pastures_threshold)
+
+    def solve(self, game: Game, context: SearchContext | None = None
+              ) -> Tuple[float, Move | None]:
+        """Palauttaa pelitilanteen tarkan arvon ja parhaan siirron. Haku lasketaan
+        kontekstin solmuihin, ja se keskeytyy kontekstin rajoilla."""
+        if context is None:
+            context = SearchContext()
+        outcome, move = self._solve(game, LOSS, WIN, context)
+        if move is None:
+            # Tulos oli varma jo ennen siirtoa, joten mikä tahansa siirto säilyttää sen
+            possible_moves = get_possible_moves(game, game.is_players_turn)
+            if len(possible_moves) > 0:
+                move = possible_moves[0]
+        return OUTCOME_VALUES[outcome], move
+
+    def _get_outcome(self, game: Game) -> int | None:
+        """Palauttaa tuloksen, jos se on jo varma. Jos toinen ei voi enää siirtää ja
+        toinen johtaa, johtaja voi vain kasvattaa johtoaan."""
+        if game.is_over():
+            winner = game.calculate_winner()
+        elif game.is_over_for_computer() and game.calculate_winner() == PLAYER:
+            winner = PLAYER
+        elif game.is_over_for_player() and game.calculate_winner() == COMPUTER:
+            winner = COMPUTER
+        else:
+            return None
+        if winner is None:
+            return DRAW
+        return WIN if winner == PLAYER else LOSS
+
+    def _solve(self, game: Game, alpha: int, beta: int, context: SearchContext
+               ) -> Tuple[int, Move | None]:
+        """Palauttaa tuloksen alfa-beeta-karsinnalla voiton, tasapelin ja häviön välillä"""
+        context.visit_node()
+        outcome = self._get_outcome(game)
+        if outcome is not None:
+            return outcome, None
+
+        key, symmetry = game.get_canonical_hash()
+        cached_move: Move | None = None
+        entry = self._cache.get(key)
+        is_hit = entry is not None and (
+            entry.bound == EXACT
+            or (entry.bound == LOWER_BOUND and entry.outcome >= beta)
+            or (entry.bound == UPPER_BOUND and entry.outcome <= alpha))
+        if context.instrumentation is not None:
+            context.instrumentation.record_solver_probe(is_hit)
+        if entry is not None:
+            if entry.move is not None:
+                cached_move = transform_move(entry.move, get_inverse(symmetry))
+            if is_hit:
+                self.hits += 1
+                return entry.outcome, cached_move
+
+        max_player = game.is_players_turn
+        possible_moves = get_possible_moves(game, max_player)
+        if cached_move in possible_moves:
+            possible_moves.remove(cached_move)
+            possible_moves.insert(0, cached_move)
+
+        original_alpha, original_beta = alpha, beta
+        best_outcome = LOSS - 1 if max_player else WIN + 1
+        best_move: Move | None = None
+        for move in possible_moves:
+            game.make_move(move)
+            try:
+                outcome, _ = self._solve(game, alpha, beta, context)
+            finally:
+                game.undo_move(move)
+            if outcome > best_outcome if max_player else outcome < best_outcome:
+                best_outcome, best_move = outcome, move
+            if max_player:
+                alpha = max(alpha, best_outcome)
+            else:
+                beta = min(beta, best_outcome)
+            if alpha >= beta:
+                break
+
+        if best_outcome <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_outcome >= original_beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        if len(self._cache) >= SOLVER_CACHE_ENTRIES:
+            self._cache.clear()
+        self._cache[key] = SolverEntry(
+            best_outcome, bound, None if best_move is None else transform_move(best_move, symmetry))
+        return best_outcome, best_move
@@ -0,0 +1,142 @@
+import time
+from typing import Callable, Dict
+from book import OpeningBook
+from constants import ENDGAME_FREE_PASTURES, SPLIT_POLICY, TABLE_SIZE_IN_MEGABYTES
+from endgame import EndgameSolver
+from game import Game
+from instrumentation import SearchInstrumentation, log_search
+from mcts import MctsEngine
+from minimax import (
+    CancellationToken,
+    SearchOptions,
+    SearchResult,
+    get_split_policy,
+    is_legal_move,
+    iterative_deepening
+)
+from move_profiler import MoveProfiler
+from parallel import ParallelSearch
+from ponder import Ponderer
+from transposition import TranspositionTable
+
+
+class Engine:
+    """Tekoäly, joka valitsee siirron annetussa ajassa syventyvällä haulla.
+
+    Hajautustaulu säilyy siirtojen välillä, joten aiempien hakujen tuloksia
+    voidaan käyttää hyväksi seuraavissa siirroissa. Useammalla työprosessilla
+    juurisiirrot lasketaan rinnakkain, ja prosessit käynnistetään ensimmäisellä
+    siirrolla. Vastustajan vuorolla tekoäly voi laskea taustalla vastauksia
+    tämän todennäköisimpiin siirtoihin. Haun rajat, laumojen jakotapa ja loppupelin
+    ratkaisija annetaan hakuasetuksina. Aloitussiirrot otetaan avauskirjasta, jos se on
+    annettu.
+
+    Jokaisen siirron haku kirjataan lokiin. Tarkemmat mittaukset, kuten karsinnat
+    syvyyksittäin ja siirtojen tuottamisen ja arvioinnin ajat, kerätään vain pyydettäessä,
+    ja rinnakkaisessa haussa niitä ei kerätä. Jos profiloinnin hakemisto on annettu,
+    jokainen siirto profiloidaan ja tulokset kirjoitetaan hakemistoon vuoron mukaan."""
+
+    def __init__(self, options: SearchOptions,
+                 table_size_in_megabytes: float = TABLE_SIZE_IN_MEGABYTES,
+                 workers: int = 1, opening_book: OpeningBook | None = None,
+                 collect_statistics: bool = False,
+                 profile_directory: str | None = None) -> None:
+        if workers > 1 and options.node_limit is not None:
+            raise ValueError('Node limit is not supported in parallel search')
+        self.options = options
+        self.opening_book = opening_book
+        self.collect_statistics = collect_statistics
+        self._profiler = MoveProfiler(profile_directory) if profile_directory is not None else None
+        self.table = TranspositionTable(table_size_in_megabytes)
+        # Työprosessit luovat omat ratkaisijansa, ja ne käynnistetään vasta ensimmäisellä haulla
+        endgame_threshold = (options.endgame_solver.free_pastures_threshold
+                             if options.endgame_solver is not None else None)
+        self._parallel_search = (ParallelSearch(workers, table_size_in_megabytes,
+                                                options.split_policy, endgame_threshold)
+                                 if workers > 1 else None)
+        self._ponderer = Ponderer(self.table, options.split_policy, options.endgame_solver)
+        self._latest_depth = 0
+
+    def ponder(self, game: Game) -> None:
+        """Aloittaa vastustajan vuorolla taustalla laskennan, ellei se ole jo käynnissä"""
+        self._ponderer.start(game)
+
+    def stop_pondering(self) -> None:
+        """Pysäyttää taustalla laskennan"""
+        self._ponderer.stop()
+
+    def close(self) -> None:
+        """Pysäyttää taustalla laskennan ja rinnakkaisen haun työprosessit"""
+        self._ponderer.stop()
+        if self._parallel_search is not None:
+            self._parallel_search.close()
+
+    def choose_move(self, game: Game, cancel_token: CancellationToken | None = None
+                    ) -> SearchResult:
+        """Palauttaa vuorossa olevan ottelijan parhaan siirron. Avauskirjasta löytyvä
+        aloitussiirto palautetaan laskematta. Jos vastustajan vuorolla
+        laskettiin tähän tilanteeseen vähintään yhtä syvä vastaus kuin edellisellä
+        siirrolla, se palautetaan heti. Taustalla laskenta käyttää samaa hajautustaulua,
+        joten se pysäytetään ja sen säikeen päättymistä odotetaan ennen kuin tauluun
+        kosketaan."""
+        start_time = time.perf_counter()
+        self._ponderer.stop()
+        if self._profiler is not None:
+            result = self._profiler.profile(game.get_number_of_turn(), self._search, game,
+                                            cancel_token)
+        else:
+            result = self._search(game, cancel_token)
+        log_search(game.get_number_of_turn(), time.perf_counter() - start_time, result.value,
+                   result.move, result.depth, result.nodes, result.statistics)
+        return result
+
+    def _search(self, game: Game, cancel_token: CancellationToken | None) -> SearchResult:
+        """Palauttaa avauskirjan, taustalla lasketun tai haun tuloksen"""
+        if self.opening_book is not None and game.is_in_initial_placement():
+            entry = self.opening_book.lookup(game)
+            if entry is not None and is_legal_move(game, entry.move):
+                return SearchResult(entry.value, entry.move, entry.depth, 0, {'book': 1})
+
+        pondered_result = self._ponderer.get_result(game)
+        if (pondered_result is not None and pondered_result.move is not None
+                and pondered_result.depth >= self._latest_depth):
+            return pondered_result
+
+        if self._parallel_search is not None:
+            result = self._parallel_search.iterative_deepening(
+                game, game.is_players_turn, self.options.time_limit, cancel_token,
+                self.options.max_depth)
+        else:
+            instrumentation = SearchInstrumentation() if self.collect_statistics else None
+            result = iterative_deepening(game, game.is_players_turn, self.options, self.table,
+                                         cancel_token, instrumentation)
+        self._latest_depth = result.depth
+        return result
+
+
+def create_minimax_engine(time_limit: float | None, node_limit: int | None = None,
+                          max_depth: int | None = None, split_policy: str = SPLIT_POLICY,
+                          endgame_threshold: int | None = ENDGAME_FREE_PASTURES,
+                          **engine_options) -> Engine:
+    """Luo minimax-tekoälyn, jonka haun asetukset kootaan annetuista rajoista, jakotavan
+    nimestä ja loppupelin ratkaisijan raja-arvosta. Muut valinnat välitetään tekoälylle."""
+    endgame_solver = (EndgameSolver(endgame_threshold)
+                      if endgame_threshold is not None else None)
+    options = SearchOptions(time_limit, node_limit, max_depth, get_split_policy(split_policy),
+                            endgame_solver)
+    return Engine(options, **engine_options)
+
+
+SearchEngine = Engine | MctsEngine
+
+ENGINES: Dict[str, Callable[..., SearchEngine]] = {
+    'minimax': create_minimax_engine,
+    'mcts': MctsEngine,
+}
+
+
+def create_engine(name: str, time_limit: float | None, **options) -> SearchEngine:
+    """Luo nimeä vastaavan tekoälyn. Muut valinnat välitetään tekoälyn luojalle."""
+    if name not in ENGINES:
+        raise ValueError(f'Unknown engine: {name}')
+    return ENGINES[name](time_limit, **options)
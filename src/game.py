@@ -1,23 +1,118 @@
-from typing import List
+from typing import List, NamedTuple, Tuple
 from constants import (
+    CHECK_INCREMENTAL_STATE,
     COMPUTER,
     PLAYER,
 )
 from pasture import Pasture
-from utils import calculate_initial_sheep, init_pastures
+from symmetry import Symmetry, get_symmetries
+from topology import Topology
+from utils import calculate_initial_sheep, get_topology, init_pastures
+from zobrist import get_zobrist_keys
+
+
+class Move(NamedTuple):
+    """Siirron kuvaus laitumien indekseinä. Aloitussiirrolla ei ole kohdetta."""
+    source: int
+    target: int | None = None
+    sheep: int = 0
 
 
 class Game:
+    # Tosi, jos peli arvioi sisarsiirtojen jälkeiset tilanteet kerralla
+    has_batch_evaluation = False
+    # Tosi, jos heuristista arvoa päivitetään laitumien muuttuessa
+    has_incremental_evaluation = True
+
     def __init__(self, board_height: int, board_width: int, is_simulation: bool) -> None:
-        self.pastures: List[Pasture] = init_pastures(board_height, board_width)
+        self.topology: Topology = get_topology(board_height, board_width)
+        self.pastures: List[Pasture] = self._create_pastures(
+            board_height, board_width)
+        self.board_height = board_height
+        self.board_width = board_width
         self.initial_sheep: int = calculate_initial_sheep(
             board_height, board_width)
         self.is_simulation = is_simulation
         self._turn: int = 1
-        self.is_players_turn = True
+        self._zobrist_keys = get_zobrist_keys(
+            len(self.pastures), self.initial_sheep)
+        self._is_players_turn = True
+        self.hash: int = self.compute_hash()
+        # Symmetriset tilanteet ovat samanarvoisia, joten niiden tiivisteitä ylläpidetään
+        # rinnakkain. Identiteettiä vastaava tiiviste on hash.
+        self._symmetries = get_symmetries(self.topology)
+        self._symmetric_hashes: List[int] = [
+            self.compute_hash(symmetry) for symmetry in self._symmetries[1:]]
+        self._previous_turns: List[bool] = []
         self._winner: int | None = None
         self.chosen_pasture: Pasture | None = None
         self.target_pasture: Pasture | None = None
+        self.check_incremental_state = CHECK_INCREMENTAL_STATE
+        if self.has_incremental_evaluation:
+            self._init_incremental_evaluation()
+        # Laitumia voi muuttaa myös suoraan, joten tiivisteet ja arvo päivitetään laitumien
+        # ilmoitusten perusteella
+        for pasture in self.pastures:
+            pasture.on_change = self._on_pasture_change
+
+    def _create_pastures(self, board_height: int, board_width: int) -> List[Pasture]:
+        """Luo pelilaudan laitumet. Aliluokka voi tallettaa laitumien tilan muualle."""
+        return init_pastures(board_height, board_width)
+
+    # Vuorossa oleva ottelija ja tiiviste
+
+    @property
+    def is_players_turn(self) -> bool:
+        """Tosi, jos pelaaja on vuorossa"""
+        return self._is_players_turn
+
+    @is_players_turn.setter
+    def is_players_turn(self, is_players_turn: bool) -> None:
+        if is_players_turn != self._is_players_turn:
+            self.hash ^= self._zobrist_keys.players_turn
+            for index, symmetric_hash in enumerate(self._symmetric_hashes):
+                self._symmetric_hashes[index] = symmetric_hash ^ self._zobrist_keys.players_turn
+        self._is_players_turn = is_players_turn
+
+    def compute_hash(self, symmetry: Symmetry | None = None) -> int:
+        """Laskee pelitilanteen Zobrist-tiivisteen alusta alkaen. Symmetrian kanssa
+        tiiviste lasketaan tilanteen kuvalle."""
+        keys = self._zobrist_keys
+        value = keys.players_turn if self.is_players_turn else 0
+        for pasture in self.pastures:
+            index = symmetry[pasture.index] if symmetry is not None else pasture.index
+            value ^= keys.get_pasture_key(
+                index, pasture.occupier, pasture.get_amount_of_sheep())
+        return value
+
+    def get_canonical_hash(self) -> Tuple[int, Symmetry]:
+        """Palauttaa tiivisteen, joka on sama kaikille toistensa symmetrisille
+        tilanteille, sekä symmetrian, joka kuvaa tilanteen tätä tiivistettä vastaavaksi"""
+        canonical_hash, symmetry = self.hash, self._symmetries[0]
+        for index, symmetric_hash in enumerate(self._symmetric_hashes):
+            if symmetric_hash < canonical_hash:
+                canonical_hash, symmetry = symmetric_hash, self._symmetries[index + 1]
+        return canonical_hash, symmetry
+
+    def _update_hashes(self, pasture: Pasture, previous_occupier: int | None,
+                       previous_sheep: int) -> None:
+        """Päivittää tiivisteet laitumen muututtua annetusta tilasta nykyiseksi"""
+        keys = self._zobrist_keys
+        occupier, sheep = pasture.occupier, pasture.get_amount_of_sheep()
+        self.hash ^= (keys.get_pasture_key(pasture.index, previous_occupier, previous_sheep)
+                      ^ keys.get_pasture_key(pasture.index, occupier, sheep))
+        for index, symmetry in enumerate(self._symmetries[1:]):
+            image = symmetry[pasture.index]
+            self._symmetric_hashes[index] ^= (
+                keys.get_pasture_key(image, previous_occupier, previous_sheep)
+                ^ keys.get_pasture_key(image, occupier, sheep))
+
+    def _on_pasture_change(self, pasture: Pasture, previous_occupier: int | None,
+                           previous_sheep: int) -> None:
+        """Päivittää tiivisteet ja heuristisen arvon laitumen tilan muututtua"""
+        self._update_hashes(pasture, previous_occupier, previous_sheep)
+        if self.has_incremental_evaluation:
+            self._update_contributions(pasture, previous_occupier != pasture.occupier)
 
     # Syötteet
 
@@ -76,6 +171,7 @@ class Game:
 
     def next_turn(self) -> None:
         """Siirtyy seuraavaan vuoroon"""
+        self._previous_turns.append(self.is_players_turn)
         if self.is_over_for_computer():
             self.is_players_turn = True
         elif self.is_over_for_player():
@@ -94,7 +190,10 @@ class Game:
         if self._winner is not None:
             self._winner = None
 
-        if self.is_over_for_computer():
+        # Palautetaan tallennettu vuoro, jolloin perutun siirron vaikutus ei haittaa
+        if self._previous_turns:
+            self.is_players_turn = self._previous_turns.pop()
+        elif self.is_over_for_computer():
             self.is_players_turn = True
         elif self.is_over_for_player():
             self.is_players_turn = False
@@ -110,6 +209,10 @@ class Game:
 
     def _remove_marked_pastures(self) -> None:
         """Tyhjentää suunnitellun vuoron"""
+        # Merkintöjä on vain, jos lähtölaidun on valittu
+        if self.chosen_pasture is None and self.target_pasture is None:
+            return
+
         self.chosen_pasture = None
         self.target_pasture = None
 
@@ -119,6 +222,60 @@ class Game:
 
     # Heuristiikka
 
+    def _init_incremental_evaluation(self) -> None:
+        """Laskee laitumien osuudet heuristisesta arvosta ja ottelijoiden siirrettävien
+        laumojen määrät"""
+        self._contributions: List[int] = [0] * len(self.pastures)
+        self._movable: List[int | None] = [None] * len(self.pastures)
+        self._score: int = 0
+        self._movable_counts: List[int] = [0, 0]
+        for pasture in self.pastures:
+            self._update_pasture_state(pasture.index)
+
+    def _count_free_neighbours(self, index: int) -> int:
+        """Palauttaa laitumen vapaiden naapureiden määrän"""
+        free_neighbours = 0
+        for neighbour in self.topology.neighbours[index]:
+            if self.pastures[neighbour].occupier is None:
+                free_neighbours += 1
+        return free_neighbours
+
+    def _compute_contribution(self, index: int) -> int:
+        """Palauttaa laitumen osuuden heuristisesta arvosta. Jokaiseen vapaaseen
+        naapuriin päin on täsmälleen yksi kohde, joten säteitä ei tarvitse käydä läpi."""
+        pasture = self.pastures[index]
+        sheep_able_to_move = pasture.get_amount_of_sheep() - 1
+        if sheep_able_to_move < 1:
+            return 0
+        free_neighbours = self._count_free_neighbours(index)
+        if pasture.occupier == PLAYER:
+            return sheep_able_to_move * free_neighbours
+        return -sheep_able_to_move * free_neighbours
+
+    def _update_pasture_state(self, index: int) -> None:
+        """Päivittää laitumen osuuden arvosta ja sen, kenen siirrettävä lauma laitumella on.
+        Lauma on siirrettävä täsmälleen silloin, kun sen osuus arvosta ei ole nolla."""
+        contribution = self._compute_contribution(index)
+        self._score += contribution - self._contributions[index]
+        self._contributions[index] = contribution
+
+        movable = self.pastures[index].occupier if contribution != 0 else None
+        previous_movable = self._movable[index]
+        if movable != previous_movable:
+            if previous_movable is not None:
+                self._movable_counts[previous_movable] -= 1
+            if movable is not None:
+                self._movable_counts[movable] += 1
+            self._movable[index] = movable
+
+    def _update_contributions(self, pasture: Pasture, is_occupancy_changed: bool) -> None:
+        """Päivittää muuttuneen laitumen tilan, ja miehityksen muuttuessa myös
+        naapureiden tilan, koska niiden vapaiden naapureiden määrä muuttui"""
+        self._update_pasture_state(pasture.index)
+        if is_occupancy_changed:
+            for index in self.topology.neighbours[pasture.index]:
+                self._update_pasture_state(index)
+
     def evaluate_game_state(self) -> float:
         """Palauttaa pelitilanteen heuristisen arvon"""
         if self.is_over_for_computer() and self.calculate_winner() == PLAYER:
@@ -126,9 +283,44 @@ class Game:
         if self.is_over_for_player() and self.calculate_winner() == COMPUTER:
             return float('-inf')
 
+        return self._evaluate_pastures()
+
+    def evaluate_moves(self, moves: List[Move]) -> List[float]:
+        """Palauttaa pelitilanteen heuristisen arvon kunkin annetun siirron jälkeen"""
+        values: List[float] = []
+        for move in moves:
+            self.make_move(move)
+            values.append(self.evaluate_game_state())
+            self.undo_move(move)
+        return values
+
+    def _evaluate_pastures(self) -> float:
+        """Palauttaa siirrettävien laumojen yhteenlasketun heuristisen arvon"""
+        if self.check_incremental_state:
+            self._check_incremental_state()
+        return self._score
+
+    def _compute_full_evaluation(self) -> int:
+        """Laskee siirrettävien laumojen heuristisen arvon alusta alkaen"""
         return sum(
             pasture.get_value(self.pastures) for pasture in self.get_potential_pastures_to_choose())
 
+    def _check_incremental_state(self) -> None:
+        """Varmistaa, että ylläpidetty arvo ja siirrettävien laumojen määrät vastaavat
+        alusta asti laskettuja"""
+        full_evaluation = self._compute_full_evaluation()
+        if self._score != full_evaluation:
+            raise SystemError(
+                f'Incremental evaluation {self._score} differs from '
+                f'full evaluation {full_evaluation}')
+        for occupier in (PLAYER, COMPUTER):
+            is_unable_to_move = self._are_no_potential_moves(
+                [pasture for pasture in self.pastures if pasture.occupier == occupier])
+            if is_unable_to_move != (self._movable_counts[occupier] == 0):
+                raise SystemError(
+                    f'Incremental movable count {self._movable_counts[occupier]} '
+                    f'of side {occupier} differs from full scan')
+
     # Pelin päättyminen
 
     def _are_no_potential_moves(self, pastures: List[Pasture]) -> bool:
@@ -138,14 +330,20 @@ class Game:
                 return False
         return True
 
+    def _is_unable_to_move(self, occupier: int) -> bool:
+        """Palauttaa tosi, jos annetun ottelijan laitumista ei voi tehdä siirtoja.
+        Siirrettävien laumojen määrää ylläpidetään siirtojen mukana."""
+        if self.check_incremental_state:
+            self._check_incremental_state()
+        return self._movable_counts[occupier] == 0
+
     def is_over_for_player(self) -> bool:
         """Palauttaa tosi, jos pelaaja ei voi enää tehdä siirtoja"""
         if self.is_in_initial_placement():
             return False
         if self._winner is not None:
             return True
-        pastures = self.get_pastures_occupied_by_player()
-        return self._are_no_potential_moves(pastures)
+        return self._is_unable_to_move(PLAYER)
 
     def is_over_for_computer(self) -> bool:
         """Palauttaa tosi, jos tekoäly ei voi enää tehdä siirtoja"""
@@ -153,8 +351,7 @@ class Game:
             return False
         if self._winner is not None:
             return True
-        pastures = self.get_pastures_occupied_by_computer()
-        return self._are_no_potential_moves(pastures)
+        return self._is_unable_to_move(COMPUTER)
 
     def is_over(self) -> bool:
         """Palauttaa tosi, jos peli on ohi"""
@@ -162,43 +359,23 @@ class Game:
             return False
         if self._winner is not None:
             return True
-        pastures = self.get_occupied_pastures()
-        is_over = self._are_no_potential_moves(pastures)
+        is_over = self._is_unable_to_move(PLAYER) and self._is_unable_to_move(COMPUTER)
         if is_over:
             self._winner = self.calculate_winner()
         return is_over
 
-    def _find_largest_herd(self, pasture: Pasture, pastures: List[Pasture], herd: int) -> int:
-        """Palauttaa suurimman yhtenäisen alueen, johon annettu laidun kuuluu"""
-        largest_herd = herd
-        # Käydään läpi laitumen naapurit
-        for neighbour in pasture.get_neighbours(pastures):
-            # Poistetaan laidun itse käsiteltynä
-            all_pastures_without_self: List[Pasture] = [
-                p for p in pastures if p is not pasture]
-            # Pidetään kirjaa suurimmasta löytyneestä alueesta
-            largest_herd = max(largest_herd, self._find_largest_herd(
-                neighbour, all_pastures_without_self, herd + 1))
-
-        return largest_herd
+    def _get_largest_herd(self, occupier: int) -> int:
+        """Palauttaa ottelijan laidunten suurimman yhtenäisen alueen koon"""
+        occupiers = [pasture.occupier for pasture in self.pastures]
+        return self.topology.get_largest_area(occupiers, occupier)
 
     def get_players_largest_herd(self) -> int:
         """Palauttaa pelaajan laidunten suurimman yhtenäisen alueen koon"""
-        largest_herd = 0
-        pastures = self.get_pastures_occupied_by_player()
-        for pasture in pastures:
-            largest_herd = max(largest_herd,
-                               self._find_largest_herd(pasture, pastures, 1))
-        return largest_herd
+        return self._get_largest_herd(PLAYER)
 
     def get_computers_largest_herd(self) -> int:
         """Palauttaa tekoälyn laidunten suurimman yhtenäisen alueen koon"""
-        largest_herd = 0
-        pastures = self.get_pastures_occupied_by_computer()
-        for pasture in pastures:
-            largest_herd = max(largest_herd,
-                               self._find_largest_herd(pasture, pastures, 1))
-        return largest_herd
+        return self._get_largest_herd(COMPUTER)
 
     def calculate_who_has_largest_herd(self) -> int | None:
         """Palauttaa pelaajan, jolla on suurin yhtenäinen laidunalue"""
@@ -256,6 +433,10 @@ class Game:
         """Palauttaa tekoälyn miehittämien laidunten määrän"""
         return len(self.get_pastures_occupied_by_computer())
 
+    def get_amount_of_free_pastures(self) -> int:
+        """Palauttaa vapaiden laidunten määrän"""
+        return sum(1 for pasture in self.pastures if pasture.is_free())
+
     def get_amount_of_targeted_pastures(self) -> int:
         """Palauttaa suunniteltujen kohdelaidunten määrän"""
         return sum(1 for pasture in self.pastures if pasture.is_targeted)
@@ -341,8 +522,7 @@ class Game:
 
     def _place_initial_sheep(self, pasture: Pasture) -> None:
         """Asettaa aloituslampaat annetulle laitumelle"""
-        pasture.occupy(
-            PLAYER if self.is_players_turn else COMPUTER, self.initial_sheep)
+        pasture.occupy(PLAYER if self.is_players_turn else COMPUTER, self.initial_sheep)
 
     def _add_sheep_to_planned_move(self):
         """Lisää yhden lampaan suunniteltuun siirtoon"""
@@ -368,20 +548,32 @@ class Game:
 
     def make_normal_turn(self, pasture: Pasture, target: Pasture, sheep: int) -> None:
         """Tekee tavallisen siirron, ja päättää vuoron"""
-        pasture.planned_sheep = pasture.get_amount_of_sheep() - sheep
-        target.planned_sheep = target.get_amount_of_sheep() + sheep
-
-        self.chosen_pasture = pasture
-        self.target_pasture = target
-
-        self._move_sheep()
+        if pasture.occupier is None:
+            raise ValueError('Pasture occupier not found')
+        target.occupy(pasture.occupier, sheep)
+        pasture.occupy(pasture.occupier, pasture.get_amount_of_sheep() - sheep)
         self.next_turn()
 
     def undo_normal_turn(self, pasture: Pasture, target_pasture: Pasture, sheep: int) -> None:
         """Peruu tavallisen siirron"""
         if pasture.occupier is None:
             raise ValueError('Pasture occupier not found')
-        pasture.occupy(
-            pasture.occupier, pasture.get_amount_of_sheep() + sheep)
+        pasture.occupy(pasture.occupier, pasture.get_amount_of_sheep() + sheep)
         target_pasture.reset()
         self._previous_turn()
+
+    def make_move(self, move: Move) -> None:
+        """Tekee annetun siirron, ja päättää vuoron"""
+        if move.target is None:
+            self.make_initial_turn(self.pastures[move.source])
+        else:
+            self.make_normal_turn(
+                self.pastures[move.source], self.pastures[move.target], move.sheep)
+
+    def undo_move(self, move: Move) -> None:
+        """Peruu annetun siirron"""
+        if move.target is None:
+            self.undo_initial_turn(self.pastures[move.source])
+        else:
+            self.undo_normal_turn(
+                self.pastures[move.source], self.pastures[move.target], move.sheep)
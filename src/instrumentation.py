@@ -0,0 +1,133 @@
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, TypeVar
+from game import Move
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+@dataclass
+class SearchInstrumentation:
+    """Yhden haun tarkemmat mittaukset: lehtien arvioinnit, karsinnat syvyyksittäin,
+    kierrosten solmumäärät, siirtojen tuottamiseen ja arviointiin kulunut aika sekä
+    välimuistien osumat.
+
+    Mittaukset kirjataan vain, jos haun kontekstilla on mittausolio, joten ilman sitä
+    haku ei hidastu. Ajat mitataan kutsu kerrallaan, joten ne sisältävät mittauksen
+    oman pienen viiveen."""
+    leaf_evaluations: int = 0
+    cutoffs_per_ply: Dict[int, int] = field(default_factory=dict)
+    iteration_nodes: List[int] = field(default_factory=list)
+    move_generation_time: float = 0
+    evaluation_time: float = 0
+    table_probes: int = 0
+    table_hits: int = 0
+    solver_probes: int = 0
+    solver_hits: int = 0
+
+    def time_moves(self, moves: Iterator[T]) -> Iterator[T]:
+        """Tuottaa siirrot sellaisenaan ja lisää kunkin tuottamiseen kuluneen ajan
+        siirtojen tuottamisen aikaan"""
+        while True:
+            start_time = time.perf_counter()
+            try:
+                move = next(moves)
+            except StopIteration:
+                self.move_generation_time += time.perf_counter() - start_time
+                return
+            self.move_generation_time += time.perf_counter() - start_time
+            yield move
+
+    def record_evaluations(self, amount: int, evaluation_time: float) -> None:
+        """Kirjaa lehtitilanteiden arvioinnit ja niihin kuluneen ajan"""
+        self.leaf_evaluations += amount
+        self.evaluation_time += evaluation_time
+
+    def record_cutoff(self, ply: int) -> None:
+        """Kirjaa karsinnan annetulle syvyydelle juuresta laskettuna"""
+        self.cutoffs_per_ply[ply] = self.cutoffs_per_ply.get(ply, 0) + 1
+
+    def record_table_probe(self, is_hit: bool) -> None:
+        """Kirjaa hajautustaulun haun ja sen, löytyikö tilanne"""
+        self.table_probes += 1
+        self.table_hits += is_hit
+
+    def record_solver_probe(self, is_hit: bool) -> None:
+        """Kirjaa loppupelin ratkaisijan välimuistin haun ja sen, riittikö tulos"""
+        self.solver_probes += 1
+        self.solver_hits += is_hit
+
+    def record_iteration(self, nodes: int) -> None:
+        """Kirjaa syventyvän haun kierroksen päättyessä haun siihenastisen solmumäärän"""
+        self.iteration_nodes.append(nodes)
+
+    def get_effective_branching_factor(self) -> float:
+        """Palauttaa viimeisen kierroksen ja sitä edeltävän kierroksen solmumäärien suhteen.
+        Yhden kierroksen haussa suhde lasketaan juuren solmuun."""
+        if len(self.iteration_nodes) == 0:
+            return 0
+        if len(self.iteration_nodes) == 1:
+            return max(0, self.iteration_nodes[0] - 1)
+        previous_nodes = self.iteration_nodes[-2] - (
+            self.iteration_nodes[-3] if len(self.iteration_nodes) > 2 else 0)
+        return (self.iteration_nodes[-1] - self.iteration_nodes[-2]) / previous_nodes
+
+    def get_statistics(self) -> Dict[str, float]:
+        """Palauttaa mittaukset hakutuloksen tilastoihin lisättävässä muodossa"""
+        statistics: Dict[str, float] = {
+            'leaf_evaluations': self.leaf_evaluations,
+            'effective_branching_factor': self.get_effective_branching_factor(),
+            'move_generation_time': self.move_generation_time,
+            'evaluation_time': self.evaluation_time,
+            'table_hit_rate': _get_rate(self.table_hits, self.table_probes),
+            'solver_hit_rate': _get_rate(self.solver_hits, self.solver_probes),
+        }
+        for ply, cutoffs in sorted(self.cutoffs_per_ply.items()):
+            statistics[f'cutoffs_ply_{ply}'] = cutoffs
+        return statistics
+
+
+def to_json_value(value: float) -> float | str:
+    """Palauttaa arvon JSON-muodossa. Ratkaistut voitot ja häviöt kirjoitetaan merkkijonoina,
+    koska JSON ei tunne äärettömiä lukuja."""
+    if math.isinf(value):
+        return 'inf' if value > 0 else '-inf'
+    return value
+
+
+def _get_rate(hits: int, probes: int) -> float:
+    """Palauttaa osumien osuuden hauista, tai nollan, jos hakuja ei ollut"""
+    return hits / probes if probes > 0 else 0
+
+
+def get_cutoffs_per_ply(statistics: Dict[str, float]) -> List[int]:
+    """Palauttaa tilastoista karsinnat syvyyksittäin juuresta alkaen"""
+    plies = [int(key.removeprefix('cutoffs_ply_')) for key in statistics
+             if key.startswith('cutoffs_ply_')]
+    if len(plies) == 0:
+        return []
+    return [int(statistics.get(f'cutoffs_ply_{ply}', 0)) for ply in range(max(plies) + 1)]
+
+
+def log_search(turn: int, elapsed_time: float, value: float, move: Move | None, depth: int,
+               nodes: int, statistics: Dict[str, float]) -> None:
+    """Kirjaa haun tuloksen ja tilastot lokiin yhtenä JSON-rivinä. Tietue annetaan myös
+    lokitapahtuman kenttänä search, jotta käsittelijät voivat lukea sen jäsentämättä."""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    record: Dict[str, Any] = {
+        'turn': turn,
+        'time': elapsed_time,
+        'value': to_json_value(value),
+        'move': None if move is None else [move.source, move.target, move.sheep],
+        'depth': depth,
+        'nodes': nodes,
+        'nodes_per_second': nodes / elapsed_time if elapsed_time > 0 else 0,
+        **statistics,
+    }
+    logger.info(json.dumps(record), extra={'search': record})
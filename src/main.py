@@ -1,4 +1,6 @@
+import logging
 import sys
+from constants import SEARCH_LOG_FILE
 from ui import Ui
 
 
@@ -10,6 +12,10 @@ def main(is_simulation: bool):
 
 
 if __name__ == '__main__':
+    if SEARCH_LOG_FILE is not None:
+        # Haun tilastot kirjoitetaan sellaisenaan, joten tiedoston jokainen rivi on JSON-olio
+        logging.basicConfig(filename=SEARCH_LOG_FILE, level=logging.INFO, format='%(message)s')
+
     if len(sys.argv) > 1 and sys.argv[1] == 'ai':
         main(is_simulation=True)
 
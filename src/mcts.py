@@ -0,0 +1,313 @@
+import copy
+import math
+import random
+import time
+from typing import List
+from book import OpeningBook
+from constants import COMPUTER, PLAYER, SPLIT_POLICY
+from game import Game, Move
+from minimax import (
+    BackgroundSearch,
+    CancellationToken,
+    SearchResult,
+    generate_moves,
+    get_split_policy,
+    is_legal_move
+)
+
+# UCT-kaavan tutkimiskerroin, joka painottaa vähän kokeiltuja siirtoja
+EXPLORATION = math.sqrt(2)
+# Uudelleenkäytettävää puuta etsitään näin monen siirron päästä edellisestä juuresta
+REUSED_PLIES = 2
+# Pelaajan tulos satunnaispelistä
+WIN_SCORE = 1.0
+DRAW_SCORE = 0.5
+LOSS_SCORE = 0.0
+
+
+class PlayoutState:
+    """Pelitilanteen kevyt kopio satunnaispelejä varten.
+
+    Laitumien miehittäjät ja lammasmäärät ovat pelkkinä listoina, eikä siirtoja
+    tarvitse perua, joten satunnaispeli on huomattavasti nopeampi kuin peliluokalla."""
+
+    def __init__(self, game: Game) -> None:
+        topology = game.topology
+        self._topology = topology
+        self._neighbours = topology.neighbours
+        self._rays = topology.rays
+        self._initial_sheep = game.initial_sheep
+        self.occupiers = [pasture.occupier for pasture in game.pastures]
+        self.sheep = [pasture.get_amount_of_sheep() for pasture in game.pastures]
+        self.turn = PLAYER if game.is_players_turn else COMPUTER
+        # Kaksi ensimmäistä vuoroa ovat aloitussiirtoja
+        self.initial_turns_left = max(0, 3 - game.get_number_of_turn())
+
+    def _get_initial_pastures(self) -> List[int]:
+        """Palauttaa vapaat reunalaitumet"""
+        return [index for index, neighbours in enumerate(self._neighbours)
+                if self.occupiers[index] is None and len(neighbours) < 6]
+
+    def _get_sources(self, occupier: int) -> List[int]:
+        """Palauttaa ottelijan laitumet, joilta voi siirtää lampaita"""
+        occupiers = self.occupiers
+        return [index for index, neighbours in enumerate(self._neighbours)
+                if occupiers[index] == occupier and self.sheep[index] >= 2
+                and any(occupiers[neighbour] is None for neighbour in neighbours)]
+
+    def _get_targets(self, source: int) -> List[int]:
+        """Palauttaa kohteet, joihin lampaat liukuvat kuhunkin vapaaseen suuntaan"""
+        targets: List[int] = []
+        for ray in self._rays[source]:
+            target = None
+            for index in ray:
+                if self.occupiers[index] is not None:
+                    break
+                target = index
+            if target is not None:
+                targets.append(target)
+        return targets
+
+    def _get_largest_herd(self, occupier: int) -> int:
+        """Palauttaa ottelijan laidunten suurimman yhtenäisen alueen koon"""
+        return self._topology.get_largest_area(self.occupiers, occupier)
+
+    def get_score(self) -> float:
+        """Palauttaa pelaajan tuloksen olettaen, että peli on ohi"""
+        players_pastures = self.occupiers.count(PLAYER)
+        computers_pastures = self.occupiers.count(COMPUTER)
+        if players_pastures == computers_pastures:
+            players_pastures = self._get_largest_herd(PLAYER)
+            computers_pastures = self._get_largest_herd(COMPUTER)
+        if players_pastures > computers_pastures:
+            return WIN_SCORE
+        if computers_pastures > players_pastures:
+            return LOSS_SCORE
+        return DRAW_SCORE
+
+    def play(self, rng: random.Random, is_guided: bool) -> float:
+        """Pelaa pelin loppuun satunnaisilla siirroilla ja palauttaa pelaajan tuloksen.
+        Ohjatussa pelissä laumat jaetaan puoliksi, jolloin ne pysyvät liikkuvina."""
+        while self.initial_turns_left > 0:
+            index = rng.choice(self._get_initial_pastures())
+            self.occupiers[index] = self.turn
+            self.sheep[index] = self._initial_sheep
+            self.turn = 1 - self.turn
+            self.initial_turns_left -= 1
+
+        while True:
+            sources = self._get_sources(self.turn)
+            if len(sources) == 0:
+                # Jumissa oleva ottelija ohitetaan, ja peli päättyy, kun kumpikaan ei voi siirtää
+                self.turn = 1 - self.turn
+                sources = self._get_sources(self.turn)
+                if len(sources) == 0:
+                    return self.get_score()
+            source = rng.choice(sources)
+            target = rng.choice(self._get_targets(source))
+            sheep = self.sheep[source]
+            moved_sheep = sheep // 2 if is_guided else rng.randint(1, sheep - 1)
+            self.sheep[source] = sheep - moved_sheep
+            self.occupiers[target] = self.turn
+            self.sheep[target] = moved_sheep
+            self.turn = 1 - self.turn
+
+
+class Node:
+    """Hakupuun solmu. Voitot lasketaan solmuun johtaneen siirron tehneen
+    ottelijan kannalta."""
+
+    def __init__(self, game: Game, untried_moves: List[Move], move: Move | None = None,
+                 mover: int | None = None, parent: 'Node | None' = None) -> None:
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.hash = game.hash
+        self.children: List[Node] = []
+        self.visits = 0
+        self.wins = 0.0
+        self.untried_moves = untried_moves
+
+    def get_uct_value(self, exploration: float) -> float:
+        """Palauttaa solmun voittosuhteen, johon on lisätty tutkimista painottava termi"""
+        return (self.wins / self.visits
+                + exploration * math.sqrt(math.log(self.parent.visits) / self.visits))
+
+    def select_child(self, exploration: float) -> 'Node':
+        """Palauttaa lapsen, jonka UCT-arvo on suurin"""
+        return max(self.children, key=lambda child: child.get_uct_value(exploration))
+
+    def get_most_visited_child(self) -> 'Node | None':
+        """Palauttaa eniten kokeillun lapsen"""
+        if len(self.children) == 0:
+            return None
+        return max(self.children, key=lambda child: child.visits)
+
+    def get_depth(self) -> int:
+        """Palauttaa eniten kokeiltujen siirtojen muodostaman polun pituuden"""
+        depth = 0
+        node = self.get_most_visited_child()
+        while node is not None:
+            depth += 1
+            node = node.get_most_visited_child()
+        return depth
+
+    def count_nodes(self) -> int:
+        """Palauttaa alipuun solmujen määrän"""
+        return 1 + sum(child.count_nodes() for child in self.children)
+
+    def find(self, game_hash: int, plies: int) -> 'Node | None':
+        """Palauttaa alipuusta solmun, jonka pelitilanteen tiiviste on annettu,
+        etsien korkeintaan annetun siirtomäärän syvyydeltä"""
+        if self.hash == game_hash:
+            return self
+        if plies == 0:
+            return None
+        for child in self.children:
+            node = child.find(game_hash, plies - 1)
+            if node is not None:
+                return node
+        return None
+
+
+class MctsEngine:
+    """Tekoäly, joka valitsee siirron Monte Carlo -puuhaulla.
+
+    Puuta laajennetaan UCT-kaavan valitsemaa polkua pitkin, ja uuden solmun arvo
+    arvioidaan pelaamalla peli satunnaisesti loppuun kevyellä pelitilanteella.
+    Puu säilyy siirtojen välillä, joten vastustajan siirron jälkeinen alipuu otetaan
+    uudelleen käyttöön. Vastustajan vuorolla puuta voi kasvattaa taustalla.
+    Aloitussiirrot otetaan avauskirjasta, jos se on annettu."""
+
+    def __init__(self, time_limit: float | None, playout_limit: int | None = None,
+                 split_policy: str = SPLIT_POLICY, opening_book: OpeningBook | None = None,
+                 exploration: float = EXPLORATION, is_guided: bool = True,
+                 seed: int | None = None) -> None:
+        if time_limit is None and playout_limit is None:
+            raise ValueError('Either a time limit or a playout limit is required')
+        self.time_limit = time_limit
+        self.playout_limit = playout_limit
+        self.split_policy = get_split_policy(split_policy)
+        self.opening_book = opening_book
+        self.exploration = exploration
+        self.is_guided = is_guided
+        self.playouts = 0
+        self._rng = random.Random(seed)
+        self._root: Node | None = None
+        self._background_search = BackgroundSearch()
+
+    def _create_node(self, game: Game, move: Move | None = None, mover: int | None = None,
+                     parent: Node | None = None) -> Node:
+        """Luo pelitilanteen solmun. Siirrot sekoitetaan eikä niitä järjestetä
+        heuristisesti, koska jokainen kokeillaan kerran ennen UCT-valintaa."""
+        untried_moves = [] if game.is_over() else generate_moves(game, self.split_policy)
+        self._rng.shuffle(untried_moves)
+        return Node(game, untried_moves, move, mover, parent)
+
+    def _get_root(self, game: Game) -> Node:
+        """Palauttaa pelitilanteen solmun edellisestä puusta tai uuden juuren"""
+        node = None if self._root is None else self._root.find(game.hash, REUSED_PLIES)
+        if node is None:
+            node = self._create_node(game)
+        node.parent = None
+        node.move = None
+        self._root = node
+        return node
+
+    def _run_iteration(self, game: Game, root: Node) -> None:
+        """Valitsee polun puussa, laajentaa sen yhdellä solmulla, pelaa
+        satunnaispelin ja päivittää tuloksen polun solmuihin"""
+        node = root
+        played_moves: List[Move] = []
+        try:
+            while len(node.untried_moves) == 0 and len(node.children) > 0:
+                node = node.select_child(self.exploration)
+                game.make_move(node.move)
+                played_moves.append(node.move)
+
+            if len(node.untried_moves) > 0:
+                move = node.untried_moves.pop()
+                mover = PLAYER if game.is_players_turn else COMPUTER
+                game.make_move(move)
+                played_moves.append(move)
+                child = self._create_node(game, move, mover, node)
+                node.children.append(child)
+                node = child
+
+            score = PlayoutState(game).play(self._rng, self.is_guided)
+        finally:
+            for move in reversed(played_moves):
+                game.undo_move(move)
+
+        while node is not None:
+            node.visits += 1
+            node.wins += score if node.mover == PLAYER else 1 - score
+            node = node.parent
+        self.playouts += 1
+
+    def _search(self, game: Game, root: Node, playout_limit: int | None,
+                deadline: float | None, cancel_token: CancellationToken | None) -> int:
+        """Kasvattaa puuta, kunnes raja täyttyy tai haku perutaan. Palauttaa
+        pelattujen satunnaispelien määrän."""
+        playouts = 0
+        while True:
+            if playout_limit is not None and playouts >= playout_limit:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if cancel_token is not None and cancel_token.is_cancelled():
+                break
+            self._run_iteration(game, root)
+            playouts += 1
+        return playouts
+
+    def ponder(self, game: Game) -> None:
+        """Aloittaa vastustajan vuorolla puun kasvattamisen taustalla, ellei se ole jo käynnissä"""
+        if self._background_search.is_running():
+            if self._root is not None and self._root.hash == game.hash:
+                return
+            self.stop_pondering()
+        game = copy.deepcopy(game)
+        root = self._get_root(game)
+        self._background_search.start(self._search, game, root, None, None)
+
+    def stop_pondering(self) -> None:
+        """Pysäyttää taustalla laskennan"""
+        self._background_search.stop()
+
+    def close(self) -> None:
+        """Pysäyttää taustalla laskennan"""
+        self.stop_pondering()
+
+    def choose_move(self, game: Game, cancel_token: CancellationToken | None = None
+                    ) -> SearchResult:
+        """Palauttaa vuorossa olevan ottelijan eniten kokeillun siirron. Arvo on
+        pelaajan odotettu tulos väliltä -1 (häviö) ja 1 (voitto)."""
+        self.stop_pondering()
+        if self.opening_book is not None and game.is_in_initial_placement():
+            entry = self.opening_book.lookup(game)
+            if entry is not None and is_legal_move(game, entry.move):
+                return SearchResult(entry.value, entry.move, entry.depth, 0, {'book': 1})
+
+        start_time = time.monotonic()
+        root = self._get_root(game)
+        reused_visits = root.visits
+        deadline = start_time + self.time_limit if self.time_limit is not None else None
+        # Ainakin yksi satunnaispeli pelataan, jotta siirto löytyy
+        self._run_iteration(game, root)
+        playouts = 1 + self._search(
+            game, root, None if self.playout_limit is None else self.playout_limit - 1,
+            deadline, cancel_token)
+        elapsed_time = time.monotonic() - start_time
+
+        best_child = root.get_most_visited_child()
+        if best_child is None:
+            return SearchResult(game.evaluate_game_state(), None, 0, playouts, {})
+        score = best_child.wins / best_child.visits
+        if best_child.mover != PLAYER:
+            score = 1 - score
+        return SearchResult(2 * score - 1, best_child.move, root.get_depth(), playouts, {
+            'playouts_per_second': playouts / elapsed_time if elapsed_time > 0 else 0,
+            'reused_visits': reused_visits,
+            'tree_nodes': root.count_nodes(),
+        })
@@ -1,38 +1,311 @@
-import copy
-from typing import List, Tuple
-from game import Game
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, NamedTuple, Set, Tuple
+from constants import (
+    ALPHA,
+    BETA,
+    TABLE_SIZE_IN_MEGABYTES
+)
+from game import Game, Move
+from instrumentation import SearchInstrumentation
+from symmetry import get_inverse, transform_move
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TableEntry, TranspositionTable
 
+if TYPE_CHECKING:
+    from endgame import EndgameSolver
 
-def get_possible_initial_moves(game: Game) -> List[Game]:
+
+# Siirrettävien lampaiden osuus lähtölaitumen lampaista jaetaan historiataulukossa näin moneen osaan
+HISTORY_SHEEP_BUCKETS = 4
+KILLER_MOVES_PER_PLY = 2
+# Porrastetussa jaossa lauma jaetaan näin moneen yhtä suureen osaan
+SPLIT_BUCKETS = 4
+# Mukautuva jako kokeilee kaikkia jakoja näin monella ylimmällä tasolla
+ADAPTIVE_SPLIT_PLIES = 2
+# Syventyvän haun kierros aloitetaan näin leveällä ikkunalla edellisen kierroksen arvon ympärillä
+ASPIRATION_WINDOW = 8
+
+HistoryKey = Tuple[int, int, int]
+# Palauttaa laumasta siirrettävät lammasmäärät lauman koon ja hakusyvyyden mukaan
+SplitPolicy = Callable[[int, int], List[int]]
+
+
+def get_all_splits(sheep: int, _ply: int) -> List[int]:
+    """Palauttaa kaikki mahdolliset siirrettävät lammasmäärät"""
+    return list(range(1, sheep))
+
+
+def get_fixed_splits(sheep: int, _ply: int) -> List[int]:
+    """Palauttaa siirrettäviksi yhden lampaan, puolet laumasta tai kaikki yhtä lukuun
+    ottamatta"""
+    return sorted({1, sheep // 2, sheep - 1})
+
+
+def get_bucketed_splits(sheep: int, _ply: int) -> List[int]:
+    """Palauttaa siirrettäviksi lammasmääriksi lauman tasavälein jakavat määrät,
+    sekä yhden lampaan ja kaikki yhtä lukuun ottamatta"""
+    splits = {1, sheep - 1}
+    for bucket in range(1, SPLIT_BUCKETS):
+        splits.add(min(max(1, round(sheep * bucket / SPLIT_BUCKETS)), sheep - 1))
+    return sorted(splits)
+
+
+def get_adaptive_splits(sheep: int, ply: int) -> List[int]:
+    """Palauttaa ylimmillä tasoilla kaikki siirrettävät lammasmäärät ja syvemmällä
+    porrastetut määrät"""
+    if ply < ADAPTIVE_SPLIT_PLIES:
+        return get_all_splits(sheep, ply)
+    return get_bucketed_splits(sheep, ply)
+
+
+SPLIT_POLICIES: Dict[str, SplitPolicy] = {
+    'all': get_all_splits,
+    'fixed': get_fixed_splits,
+    'buckets': get_bucketed_splits,
+    'adaptive': get_adaptive_splits,
+}
+
+
+def get_split_policy(name: str) -> SplitPolicy:
+    """Palauttaa nimeä vastaavan jakotavan"""
+    if name not in SPLIT_POLICIES:
+        raise ValueError(f'Unknown split policy: {name}')
+    return SPLIT_POLICIES[name]
+
+
+class SearchAborted(Exception):
+    """Haku keskeytettiin aika- tai solmurajan tai perumisen vuoksi"""
+
+
+class CancellationToken:
+    """Säikeiden välillä jaettava merkki haun perumiseksi. Prosessien välillä
+    jaettavaksi merkin voi luoda prosessien yhteisen tapahtuman ympärille."""
+
+    def __init__(self, event=None) -> None:
+        self._event = event if event is not None else threading.Event()
+
+    def cancel(self) -> None:
+        """Pyytää hakua lopettamaan mahdollisimman pian"""
+        self._event.set()
+
+    def is_cancelled(self) -> bool:
+        """Palauttaa tosi, jos haku on peruttu"""
+        return self._event.is_set()
+
+
+class BackgroundSearch:
+    """Taustasäikeessä ajettava haku, jonka voi perua. Pysäytettäessä säikeen
+    päättymistä odotetaan, joten haun tulokset ovat sen jälkeen valmiit."""
+
+    def __init__(self) -> None:
+        self._thread: threading.Thread | None = None
+        self._cancel_token = CancellationToken()
+
+    def is_running(self) -> bool:
+        """Palauttaa tosi, jos haku on aloitettu eikä sitä ole vielä pysäytetty"""
+        return self._thread is not None
+
+    def start(self, target: Callable[..., object], *arguments) -> None:
+        """Aloittaa haun taustasäikeessä. Funktio saa viimeisenä argumenttinaan
+        perumismerkin, jota sen tulee seurata."""
+        self._cancel_token = CancellationToken()
+        self._thread = threading.Thread(
+            target=target, args=(*arguments, self._cancel_token), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Peruu haun ja odottaa säikeen päättymistä"""
+        if self._thread is None:
+            return
+        self._cancel_token.cancel()
+        self._thread.join()
+        self._thread = None
+
+
+@dataclass
+class SearchOptions:
+    """Syventyvän haun asetukset: aika-, solmu- ja syvyysraja, laumojen jakotapa,
+    loppupelin ratkaisija sekä ikkunat. Ilman rajoja haku lasketaan pelin loppuun."""
+    time_limit: float | None = None
+    node_limit: int | None = None
+    max_depth: int | None = None
+    split_policy: SplitPolicy = get_all_splits
+    endgame_solver: 'EndgameSolver | None' = None
+    aspiration_window: float | None = ASPIRATION_WINDOW
+    null_window_search: bool = True
+
+    def get_max_depth(self, game: Game) -> int:
+        """Palauttaa syvyysrajan. Ilman rajaa jokainen siirto valtaa yhden laitumen,
+        joten peli päättyy viimeistään vapaiden laitumien määrän syvyydellä."""
+        if self.max_depth is not None:
+            return self.max_depth
+        return max(1, game.get_amount_of_free_pastures())
+
+
+@dataclass
+class SearchContext:
+    """Yhden haun yhteiset tiedot: hajautustaulu, rajat ja laskurit"""
+    table: TranspositionTable | None = None
+    deadline: float | None = None
+    node_limit: int | None = None
+    cancel_token: CancellationToken | None = None
+    principal_variation: Dict[int, Move] = field(default_factory=dict)
+    killers: Dict[int, List[Move]] = field(default_factory=dict)
+    history: Dict[HistoryKey, int] = field(default_factory=dict)
+    split_policy: SplitPolicy = get_all_splits
+    endgame_solver: 'EndgameSolver | None' = None
+    null_window_search: bool = True
+    instrumentation: SearchInstrumentation | None = None
+    ply: int = 0
+    nodes: int = 0
+    cutoffs: int = 0
+    first_move_cutoffs: int = 0
+    cutoff_index_sum: int = 0
+    researches: int = 0
+    aspiration_failures: int = 0
+
+    def visit_node(self) -> None:
+        """Laskee solmun, ja keskeyttää haun, jos jokin raja on ylittynyt"""
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchAborted()
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SearchAborted()
+        if self.cancel_token is not None and self.cancel_token.is_cancelled():
+            raise SearchAborted()
+
+    def visit_nodes(self, amount: int) -> None:
+        """Laskee useita solmuja kerralla. Haku keskeytetään jo ennen niitä, jos
+        solmuraja ylittyisi."""
+        if self.node_limit is not None and self.nodes + amount > self.node_limit:
+            raise SearchAborted()
+        self.nodes += amount - 1
+        self.visit_node()
+
+    def get_killers(self) -> List[Move]:
+        """Palauttaa nykyisen syvyyden tappajasiirrot"""
+        return self.killers.get(self.ply, [])
+
+    def record_cutoff(self, game: Game, move: Move, index: int, depth: int) -> None:
+        """Kirjaa karsinnan aiheuttaneen siirron tappajasiirroksi ja historiataulukkoon"""
+        self.cutoffs += 1
+        self.cutoff_index_sum += index
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if self.instrumentation is not None:
+            self.instrumentation.record_cutoff(self.ply)
+
+        killers = self.killers.setdefault(self.ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLER_MOVES_PER_PLY:]
+
+        key = get_history_key(game, move)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def get_ordering_statistics(self) -> Dict[str, float]:
+        """Palauttaa siirtojen järjestämisen onnistumista ja uudelleenlaskentoja
+        kuvaavat luvut"""
+        statistics: Dict[str, float] = {
+            'researches': self.researches,
+            'aspiration_failures': self.aspiration_failures,
+        }
+        if self.cutoffs == 0:
+            return {'cutoffs': 0, 'first_move_cutoff_rate': 0, 'average_cutoff_index': 0,
+                    **statistics}
+        return {
+            'cutoffs': self.cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.cutoffs,
+            'average_cutoff_index': self.cutoff_index_sum / self.cutoffs,
+            **statistics,
+        }
+
+
+class SearchResult(NamedTuple):
+    value: float
+    move: Move | None
+    depth: int
+    nodes: int
+    statistics: Dict[str, float]
+
+
+def get_history_key(game: Game, move: Move) -> HistoryKey:
+    """Palauttaa siirron paikan historiataulukossa: lähtö, kohde ja lampaiden osuus"""
+    if move.target is None:
+        return (move.source, move.source, 0)
+    sheep = game.pastures[move.source].get_amount_of_sheep()
+    return (move.source, move.target, move.sheep * HISTORY_SHEEP_BUCKETS // sheep)
+
+
+def get_possible_initial_moves(game: Game) -> List[Move]:
     """Palauttaa pelitilanteen mahdolliset seuraavat aloitussiirrot"""
-    possible_moves: List[Game] = []
-    for pasture in game.get_potential_initial_pastures():
-        game.make_initial_turn(pasture)
-        possible_moves.append(copy.deepcopy(game))
-        game.undo_initial_turn(pasture)
-    return possible_moves
+    return [Move(pasture.index) for pasture in game.get_potential_initial_pastures()]
 
 
-def get_possible_regular_moves(game: Game) -> List[Game]:
-    """Palauttaa pelitilanteen mahdolliset seuraavat siirrot"""
-    possible_moves: List[Game] = []
+def get_possible_regular_moves(game: Game, split_policy: SplitPolicy = get_all_splits,
+                               ply: int = 0) -> List[Move]:
+    """Palauttaa pelitilanteen mahdolliset seuraavat siirrot. Laumoista siirrettävät
+    lammasmäärät valitaan annetulla jakotavalla."""
+    possible_moves: List[Move] = []
     for pasture in game.get_potential_pastures_to_choose_this_turn():
+        splits = split_policy(pasture.get_amount_of_sheep(), ply)
         for target_pasture in pasture.get_potential_targets(game.pastures):
-            for sheep in range(1, pasture.get_amount_of_sheep()):
-                game.make_normal_turn(pasture, target_pasture, sheep)
-                possible_moves.append(copy.deepcopy(game))
-                game.undo_normal_turn(pasture, target_pasture, sheep)
+            for sheep in splits:
+                possible_moves.append(
+                    Move(pasture.index, target_pasture.index, sheep))
     return possible_moves
 
 
-def get_possible_moves(game: Game, max_player: bool) -> List[Game]:
-    """Palauttaa mahdolliset seuraavat siirrot järjestettynä heuristisen arvon mukaan"""
-    possible_moves = (get_possible_initial_moves(game) if game.is_in_initial_placement()
-                      else get_possible_regular_moves(game))
+def evaluate_move(game: Game, move: Move) -> float:
+    """Palauttaa pelitilanteen heuristisen arvon annetun siirron jälkeen"""
+    game.make_move(move)
+    value = game.evaluate_game_state()
+    game.undo_move(move)
+    return value
+
+
+def generate_moves(game: Game, split_policy: SplitPolicy = get_all_splits,
+                   ply: int = 0) -> List[Move]:
+    """Palauttaa vuorossa olevan ottelijan mahdolliset siirrot järjestämättä"""
+    if game.is_in_initial_placement():
+        return get_possible_initial_moves(game)
+    return get_possible_regular_moves(game, split_policy, ply)
+
+
+def prune_symmetric_moves(game: Game, moves: List[Move],
+                          seen_keys: Set[int] | None = None) -> List[Move]:
+    """Palauttaa siirrot, joista on poistettu ne, joiden jälkeinen tilanne on symmetrinen
+    jonkin toisen siirron jälkeisen tilanteen tai annettujen tiivisteiden kanssa.
+    Tilanteet ovat samanarvoisia, joten kustakin riittää laskea yksi, ja valinta on
+    mielivaltainen. Jokainen siirto tehdään tiivisteen laskemiseksi, joten karsinta
+    kannattaa vain hakupuun juuressa."""
+    if seen_keys is None:
+        seen_keys = set()
+    keys: List[int] = []
+    for move in moves:
+        game.make_move(move)
+        keys.append(game.get_canonical_hash()[0])
+        game.undo_move(move)
+    last_indices = {key: index for index, key in enumerate(keys)}
+    unique_moves = [move for index, (move, key) in enumerate(zip(moves, keys))
+                    if key not in seen_keys and last_indices[key] == index]
+    seen_keys.update(keys)
+    return unique_moves
+
 
-    return sorted(possible_moves,
-                  key=lambda move: move.evaluate_game_state(),
-                  reverse=max_player)
+def get_possible_moves(game: Game, max_player: bool,
+                       split_policy: SplitPolicy = get_all_splits,
+                       prune_symmetric: bool = False) -> List[Move]:
+    """Palauttaa mahdolliset seuraavat siirrot järjestettynä heuristisen arvon mukaan.
+    Aloitusvaiheessa symmetriset siirrot voidaan jättää pois."""
+    possible_moves = generate_moves(game, split_policy)
+    if prune_symmetric and game.is_in_initial_placement():
+        possible_moves = prune_symmetric_moves(game, possible_moves)
+    values = game.evaluate_moves(possible_moves)
+    order = sorted(range(len(possible_moves)), key=values.__getitem__, reverse=max_player)
+    return [possible_moves[index] for index in order]
 
 
 def is_unable_to_move(game: Game, max_player: bool) -> bool:
@@ -42,38 +315,342 @@ def is_unable_to_move(game: Game, max_player: bool) -> bool:
     return game.is_over_for_computer()
 
 
-def minimax(game: Game, depth: int, alpha: float, beta: float, max_player: bool
-            ) -> Tuple[float, Game | None]:
-    """Palauttaa pelitilanteen parhaan seuraavan siirron annetulla laskentasyvyydellä"""
+def _get_bound(value: float, alpha: float, beta: float) -> int:
+    """Palauttaa, onko arvo tarkka vai haun ikkunan ulkopuolelle jäänyt raja"""
+    if value <= alpha:
+        return UPPER_BOUND
+    if value >= beta:
+        return LOWER_BOUND
+    return EXACT
+
+
+def is_legal_move(game: Game, move: Move) -> bool:
+    """Palauttaa tosi, jos siirto on sallittu vuorossa olevalle ottelijalle"""
+    pasture = game.pastures[move.source]
+    if move.target is None:
+        return (game.is_in_initial_placement()
+                and pasture.is_potential_initial_pasture(game.pastures))
+    if game.is_in_initial_placement() or not game.is_occupied_by_player_in_turn(pasture):
+        return False
+    if not 0 < move.sheep < pasture.get_amount_of_sheep():
+        return False
+    return any(target.index == move.target
+               for target in pasture.get_potential_targets(game.pastures))
+
+
+def _get_promising_splits(sheep: int) -> List[int]:
+    """Palauttaa lupaavimmat siirrettävät lammasmäärät: kaikki yhtä lukuun ottamatta,
+    puolet tai yksi"""
+    return sorted({sheep - 1, sheep // 2, 1}, reverse=True)
+
+
+def generate_ordered_moves(game: Game, table_move: Move | None,
+                           context: SearchContext) -> Iterator[Move]:
+    """Tuottaa siirrot vaiheittain arvioimatta niitä: ensin hajautustaulun, edellisen
+    kierroksen pääjatkon ja tappajasiirrot, sitten lupaavat jaot ja lopuksi loput
+    historiataulukon mukaan. Myöhempiä vaiheita ei lasketa, jos haku karsii ennen niitä."""
+    yielded_moves: Set[Move] = set()
+    history = context.history
+
+    preferred_moves = (table_move, context.principal_variation.get(game.hash),
+                       *context.get_killers())
+    for move in preferred_moves:
+        if move is not None and move not in yielded_moves and is_legal_move(game, move):
+            yielded_moves.add(move)
+            yield move
+
+    if game.is_in_initial_placement():
+        remaining_moves = [move for move in get_possible_initial_moves(game)
+                           if move not in yielded_moves]
+        if context.ply == 0:
+            # Juuressa aiempien siirtojen kanssa symmetriset aloitussiirrot ohitetaan.
+            # Syvemmällä symmetriset tilanteet jakavat hajautustaulun talletuksen.
+            seen_keys: Set[int] = set()
+            prune_symmetric_moves(game, list(yielded_moves), seen_keys)
+            remaining_moves = prune_symmetric_moves(game, remaining_moves, seen_keys)
+    else:
+        # Lähtölaitumet ja niiden kohteet lasketaan vasta, kun niitä tarvitaan
+        targets: Dict[int, List[int]] = {}
+        splits: Dict[int, List[int]] = {}
+        sources = game.get_potential_pastures_to_choose_this_turn()
+        for pasture in sources:
+            targets[pasture.index] = [
+                target.index for target in pasture.get_potential_targets(game.pastures)]
+            splits[pasture.index] = context.split_policy(
+                pasture.get_amount_of_sheep(), context.ply)
+            promising_splits = [sheep for sheep in _get_promising_splits(
+                pasture.get_amount_of_sheep()) if sheep in splits[pasture.index]]
+            for target in targets[pasture.index]:
+                for sheep in promising_splits:
+                    move = Move(pasture.index, target, sheep)
+                    if move not in yielded_moves:
+                        yielded_moves.add(move)
+                        yield move
+
+        remaining_moves = [Move(pasture.index, target, sheep)
+                           for pasture in sources
+                           for target in targets[pasture.index]
+                           for sheep in splits[pasture.index]
+                           if Move(pasture.index, target, sheep) not in yielded_moves]
+
+    yield from sorted(remaining_moves,
+                      key=lambda move: history.get(
+                          get_history_key(game, move), 0),
+                      reverse=True)
+
+
+def _search_move(game: Game, move: Move, depth: int, alpha: float, beta: float,
+                 max_player: bool, context: SearchContext) -> float:
+    """Tekee siirron, laskee sen arvon, ja peruu siirron myös haun keskeytyessä"""
+    game.make_move(move)
+    context.ply += 1
+    try:
+        value, _ = minimax(game, depth - 1, alpha, beta, max_player, context)
+    finally:
+        context.ply -= 1
+        game.undo_move(move)
+    return value
+
+
+def _scout_move(game: Game, move: Move, depth: int, alpha: float, beta: float,
+                max_player: bool, context: SearchContext) -> float:
+    """Laskee ensimmäistä myöhemmän siirron arvon nollaikkunalla, joka kertoo vain,
+    onko siirto parempi kuin paras siihen asti. Paremmaksi osoittautuva siirto
+    lasketaan uudelleen koko ikkunalla."""
+    if max_player:
+        value = _search_move(game, move, depth, alpha, math.nextafter(alpha, BETA),
+                             False, context)
+    else:
+        value = _search_move(game, move, depth, math.nextafter(beta, ALPHA), beta,
+                             True, context)
+    if alpha < value < beta:
+        context.researches += 1
+        value = _search_move(game, move, depth, alpha, beta, not max_player, context)
+    return value
+
+
+def _evaluate_leaf_moves(game: Game, max_player: bool, context: SearchContext
+                         ) -> Tuple[float, Move | None]:
+    """Arvioi kaikki lehtisolmuihin johtavat siirrot yhdellä kertaa, ja palauttaa
+    parhaan. Tasatilanteessa valitaan viimeinen, kuten yksi kerrallaan haettaessa."""
+    instrumentation = context.instrumentation
+    if instrumentation is None:
+        possible_moves = generate_moves(game, context.split_policy, context.ply)
+        context.visit_nodes(len(possible_moves))
+        values = game.evaluate_moves(possible_moves)
+    else:
+        start_time = time.perf_counter()
+        possible_moves = generate_moves(game, context.split_policy, context.ply)
+        generation_time = time.perf_counter()
+        instrumentation.move_generation_time += generation_time - start_time
+        context.visit_nodes(len(possible_moves))
+        values = game.evaluate_moves(possible_moves)
+        instrumentation.record_evaluations(
+            len(possible_moves), time.perf_counter() - generation_time)
+    best_value = float('-inf') if max_player else float('inf')
+    best_move: Move | None = None
+    for move, value in zip(possible_moves, values):
+        if value >= best_value if max_player else value <= best_value:
+            best_value = value
+            best_move = move
+    return best_value, best_move
+
+
+def _evaluate_leaf(game: Game, context: SearchContext) -> float:
+    """Palauttaa pelitilanteen heuristisen arvon, ja kirjaa mittausten kanssa
+    arvioinnin keston"""
+    instrumentation = context.instrumentation
+    if instrumentation is None:
+        return game.evaluate_game_state()
+    start_time = time.perf_counter()
+    value = game.evaluate_game_state()
+    instrumentation.record_evaluations(1, time.perf_counter() - start_time)
+    return value
+
+
+def _probe_table(key: int, context: SearchContext) -> TableEntry | None:
+    """Hakee tilanteen talletuksen kontekstin hajautustaulusta, ja kirjaa mittausten
+    kanssa, löytyikö se"""
+    if context.table is None:
+        return None
+    entry = context.table.probe(key)
+    if context.instrumentation is not None:
+        context.instrumentation.record_table_probe(entry is not None)
+    return entry
+
+
+def _narrow_window(entry: TableEntry | None, depth: int, alpha: float, beta: float
+                   ) -> Tuple[float, float]:
+    """Kaventaa hakuikkunaa riittävän syvän talletuksen arvolla. Tarkka arvo sulkee
+    ikkunan kokonaan."""
+    if entry is None or entry.depth < depth:
+        return alpha, beta
+    if entry.bound != UPPER_BOUND:
+        alpha = max(alpha, entry.value)
+    if entry.bound != LOWER_BOUND:
+        beta = min(beta, entry.value)
+    return alpha, beta
+
+
+def _search_moves(game: Game, table_move: Move | None, depth: int, alpha: float,
+                  beta: float, max_player: bool, context: SearchContext
+                  ) -> Tuple[float, Move | None]:
+    """Laskee siirtojen arvot järjestyksessä, kunnes jokin aiheuttaa karsinnan, ja
+    palauttaa parhaan. Pääjatkon haussa vain ensimmäinen siirto lasketaan koko
+    ikkunalla, koska järjestyksen ansiosta se on yleensä paras."""
+    # Siirrot tuotetaan vasta tarvittaessa, joten karsinta säästää myös niiden laskennan
+    possible_moves = generate_ordered_moves(game, table_move, context)
+    if context.instrumentation is not None:
+        possible_moves = context.instrumentation.time_moves(possible_moves)
+    best_value = float('-inf') if max_player else float('inf')
+    best_move: Move | None = None
+    for index, move in enumerate(possible_moves):
+        if index > 0 and context.null_window_search:
+            value = _scout_move(game, move, depth, alpha, beta, max_player, context)
+        else:
+            value = _search_move(game, move, depth, alpha, beta, not max_player, context)
+        if value >= best_value if max_player else value <= best_value:
+            best_value = value
+            best_move = move
+
+        if best_value >= beta if max_player else best_value <= alpha:
+            context.record_cutoff(game, move, index, depth)
+            break
+        if max_player:
+            alpha = max(alpha, best_value)
+        else:
+            beta = min(beta, best_value)
+    return best_value, best_move
+
+
+def minimax(game: Game, depth: int, alpha: float, beta: float, max_player: bool,
+            context: SearchContext | None = None) -> Tuple[float, Move | None]:
+    """Palauttaa pelitilanteen parhaan seuraavan siirron annetulla laskentasyvyydellä.
+
+    Haku tehdään annetussa pelitilanteessa tekemällä ja perumalla siirtoja, joten
+    pelitilanne on haun jälkeen sama kuin ennen sitä, vaikka haku keskeytettäisiin.
+    Kontekstin hajautustauluun talletetaan lasketut arvot, ja niitä käytetään
+    uudelleen samoissa tilanteissa."""
+    if context is None:
+        context = SearchContext()
+    context.visit_node()
+
     # Palautetaan pelitilanteen arvo, mikäli päästiin annettuun syvyyteen
     # tai peli on ohi vuorossa olevalta pelaajalta
     if depth == 0 or is_unable_to_move(game, max_player):
-        return game.evaluate_game_state(), None
+        return _evaluate_leaf(game, context), None
 
-    possible_moves: List[Game] = get_possible_moves(game, max_player)
-    best_move: Game | None = None
+    # Loppupeli ratkaistaan tarkasti. Juurta ei ratkaista, jotta aina loppuun laskettava
+    # ensimmäinen kierros pysyy nopeana, ja muut kierrokset noudattavat aikarajaa.
+    solver = context.endgame_solver
+    if solver is not None and context.ply > 0 and solver.is_solvable(game):
+        return solver.solve(game, context)
 
-    if max_player:
-        best_value = float('-inf')
-        for move in possible_moves:
-            value, _ = minimax(move, depth - 1, alpha, beta, False)
-            if value >= best_value:
-                best_value = value
-                best_move = move
-
-            if best_value >= beta:
-                break
-            alpha = max(alpha, best_value)
+    # Symmetriset tilanteet jakavat talletuksen, jonka siirto on kanonisessa muodossa
+    key, symmetry = game.get_canonical_hash()
+    entry = _probe_table(key, context)
+    table_move = (transform_move(entry.move, get_inverse(symmetry))
+                  if entry is not None and entry.move is not None else None)
+    window_alpha, window_beta = _narrow_window(entry, depth, alpha, beta)
+    if entry is not None and window_alpha >= window_beta:
+        return entry.value, table_move
+
+    best_move: Move | None
+    if depth == 1 and game.has_batch_evaluation:
+        best_value, best_move = _evaluate_leaf_moves(game, max_player, context)
     else:
-        best_value = float('inf')
-        for move in possible_moves:
-            value, _ = minimax(move, depth - 1, alpha, beta, True)
-            if value <= best_value:
-                best_value = value
-                best_move = move
-
-            if best_value <= alpha:
-                break
-            beta = min(beta, best_value)
+        best_value, best_move = _search_moves(game, table_move, depth, window_alpha,
+                                              window_beta, max_player, context)
+
+    if context.table is not None and best_move is not None:
+        context.table.store(key, depth, _get_bound(best_value, alpha, beta),
+                            best_value, transform_move(best_move, symmetry))
 
     return best_value, best_move
+
+
+def get_principal_variation(game: Game, table: TranspositionTable, depth: int
+                            ) -> Dict[int, Move]:
+    """Palauttaa hajautustaulusta parhaiden siirtojen jatkon pelitilanteiden tiivisteisiin"""
+    principal_variation: Dict[int, Move] = {}
+    played_moves: List[Move] = []
+    for _ in range(depth):
+        key, symmetry = game.get_canonical_hash()
+        entry = table.probe(key)
+        if entry is None or entry.move is None or game.hash in principal_variation:
+            break
+        move = transform_move(entry.move, get_inverse(symmetry))
+        principal_variation[game.hash] = move
+        game.make_move(move)
+        played_moves.append(move)
+    for move in reversed(played_moves):
+        game.undo_move(move)
+    return principal_variation
+
+
+def search_with_aspiration_window(game: Game, depth: int, max_player: bool,
+                                  context: SearchContext, previous_value: float,
+                                  window: float | None) -> Tuple[float, Move | None]:
+    """Laskee pelitilanteen arvon ikkunalla edellisen kierroksen arvon ympärillä. Jos arvo
+    jää ikkunan ulkopuolelle, ikkuna avataan siihen suuntaan ja haku toistetaan."""
+    if window is None or abs(previous_value) == math.inf:
+        return minimax(game, depth, ALPHA, BETA, max_player, context)
+    alpha, beta = previous_value - window, previous_value + window
+    while True:
+        value, move = minimax(game, depth, alpha, beta, max_player, context)
+        if value <= alpha and alpha != ALPHA:
+            alpha = ALPHA
+        elif value >= beta and beta != BETA:
+            beta = BETA
+        else:
+            return value, move
+        context.aspiration_failures += 1
+
+
+def iterative_deepening(game: Game, max_player: bool, options: SearchOptions | None = None,
+                        table: TranspositionTable | None = None,
+                        cancel_token: CancellationToken | None = None,
+                        instrumentation: SearchInstrumentation | None = None) -> SearchResult:
+    """Syventää hakua kierros kerrallaan, kunnes aika- tai solmuraja täyttyy tai haku
+    perutaan. Palauttaa viimeisimmän loppuun asti lasketun kierroksen parhaan siirron.
+    Kierrokset aloitetaan edellisen kierroksen arvon ympärille asetetulla ikkunalla.
+    Mittausolion tilastot lisätään tuloksen tilastoihin."""
+    if options is None:
+        options = SearchOptions()
+    if table is None:
+        table = TranspositionTable(TABLE_SIZE_IN_MEGABYTES)
+    table.new_search()
+
+    # Ensimmäinen kierros lasketaan aina loppuun, jotta siirto löytyy
+    context = SearchContext(table, split_policy=options.split_policy,
+                            endgame_solver=options.endgame_solver,
+                            null_window_search=options.null_window_search,
+                            instrumentation=instrumentation)
+    value, move = minimax(game, 1, ALPHA, BETA, max_player, context)
+    result = SearchResult(value, move, 1, context.nodes, {})
+    if instrumentation is not None:
+        instrumentation.record_iteration(context.nodes)
+
+    context.deadline = (time.monotonic() + options.time_limit
+                        if options.time_limit is not None else None)
+    context.node_limit = options.node_limit
+    context.cancel_token = cancel_token
+    for depth in range(2, options.get_max_depth(game) + 1):
+        # Voitto tai häviö on jo varma, joten syvempi haku ei muuta siirtoa
+        if abs(result.value) == float('inf'):
+            break
+        context.principal_variation = get_principal_variation(
+            game, table, depth - 1)
+        try:
+            value, move = search_with_aspiration_window(
+                game, depth, max_player, context, result.value, options.aspiration_window)
+        except SearchAborted:
+            break
+        result = SearchResult(value, move, depth, context.nodes, {})
+        if instrumentation is not None:
+            instrumentation.record_iteration(context.nodes)
+
+    statistics = context.get_ordering_statistics()
+    if instrumentation is not None:
+        statistics.update(instrumentation.get_statistics())
+    return SearchResult(result.value, result.move, result.depth, context.nodes, statistics)
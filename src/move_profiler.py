@@ -0,0 +1,183 @@
+import cProfile
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Callable, Dict, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Pinot tallennetaan näin usein. Säikeiden vaihtoväli lyhennetään näytteenoton ajaksi
+# samaksi, jotta näytteenottaja pääsee vuoroon haun aikana.
+SAMPLE_INTERVAL = 0.001
+# Yhteenvetoon tulostetaan näin monta eniten aikaa vievää funktiota
+SUMMARY_FUNCTIONS = 25
+
+# Yhteenvedon ryhmät ja niihin kuuluvien funktioiden nimet
+PROFILE_CATEGORIES: Dict[str, Tuple[str, ...]] = {
+    'move_generation': ('get_potential_targets', 'get_potential_pastures_to_choose_this_turn',
+                        'get_potential_initial_pastures'),
+    'evaluation': ('evaluate_game_state', 'evaluate_moves'),
+    'copying': ('deepcopy', '__deepcopy__'),
+    'game_over_checks': ('is_over', 'is_over_for_player', 'is_over_for_computer',
+                         'is_unable_to_move', '_is_unable_to_move'),
+}
+CATEGORY_NAMES = {
+    'move_generation': 'Siirtojen tuottaminen',
+    'evaluation': 'Arviointi',
+    'copying': 'Kopiointi',
+    'game_over_checks': 'Pelin päättymisen tarkistus',
+}
+
+def _get_code_name(code: CodeType | str) -> str:
+    """Palauttaa profiloidun funktion nimen. Sisäänrakennetuilla funktioilla koodi on
+    valmiiksi kuvaus."""
+    return code.co_name if isinstance(code, CodeType) else code
+
+
+def get_category_times(profiler: cProfile.Profile) -> Dict[str, float]:
+    """Palauttaa kunkin ryhmän funktioissa kuluneen ajan. Aika lasketaan ryhmän ulkopuolelta
+    tulleista kutsuista, joten ryhmän funktioiden toisiaan kutsuessa aikaa ei lasketa kahdesti.
+    Eri ryhmät voivat kuitenkin sisältää toisiaan, jos ryhmän funktio kutsuu toisen ryhmän
+    funktiota. Ajat luetaan profiloijan kutsutiedoista, joissa kullakin funktiolla on
+    kutsumiensa funktioiden ajat kutsupaikoittain."""
+    entries = profiler.getstats()
+    called_codes = {call.code for entry in entries for call in entry.calls or ()}
+    category_times: Dict[str, float] = {}
+    for category, names in PROFILE_CATEGORIES.items():
+        total_time = 0.0
+        for entry in entries:
+            if _get_code_name(entry.code) not in names:
+                total_time += sum(call.totaltime for call in entry.calls or ()
+                                  if _get_code_name(call.code) in names)
+            elif entry.code not in called_codes:
+                # Profiloinnin aloittaneesta kehyksestä tulleilla kutsuilla ei ole kutsujaa
+                total_time += entry.totaltime
+        category_times[category] = total_time
+    return category_times
+
+
+def _get_frame_name(frame: FrameType) -> str:
+    """Palauttaa pinokehyksen nimen moduuleineen liekkikaaviota varten"""
+    module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return f'{module}.{frame.f_code.co_qualname}'
+
+
+class StackSampler:
+    """Tallentaa toisesta säikeestä annetun säikeen kutsupinon tasaisin väliajoin.
+
+    Pinot tallennetaan annetusta kehyksestä ylöspäin, joten profiloijan omat kutsut
+    eivät näy tuloksessa. Tulos on liekkikaaviotyökalujen käyttämässä tiivistetyssä
+    muodossa: kehykset puolipisteillä erotettuna ja näytteiden määrä.
+
+    Näytteenoton ajaksi koko prosessin säikeiden vaihtoväli lyhennetään näytteenottovälin
+    mittaiseksi, ja lopetettaessa se palautetaan ennalleen. Näytteenottajaa käytetään
+    with-lauseessa, jotta vaihtoväli palautetaan myös poikkeuksen sattuessa."""
+
+    def __init__(self, thread_id: int, base_frame: FrameType | None,
+                 interval: float = SAMPLE_INTERVAL) -> None:
+        self._thread_id = thread_id
+        self._base_frame = base_frame
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._previous_switch_interval = sys.getswitchinterval()
+        self.samples: Counter[str] = Counter()
+
+    def __enter__(self) -> 'StackSampler':
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Aloittaa näytteenoton taustasäikeessä ja lyhentää säikeiden vaihtoväliä"""
+        self._previous_switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(self._interval)
+        try:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        except BaseException:
+            sys.setswitchinterval(self._previous_switch_interval)
+            raise
+
+    def stop(self) -> None:
+        """Lopettaa näytteenoton ja palauttaa säikeiden vaihtovälin ennalleen"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        sys.setswitchinterval(self._previous_switch_interval)
+
+    def _sample(self) -> None:
+        """Tallentaa pinoja, kunnes näytteenotto lopetetaan"""
+        # pylint: disable=protected-access
+        while not self._stop_event.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None and frame is not self._base_frame:
+                stack.append(_get_frame_name(frame))
+                frame = frame.f_back
+            if frame is not None and len(stack) > 0:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def get_collapsed_stacks(self) -> str:
+        """Palauttaa pinot tiivistetyssä muodossa rivi kerrallaan"""
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.samples.items()))
+
+
+class MoveProfiler:
+    """Profiloi tekoälyn siirrot ja kirjoittaa kunkin siirron tulokset vuoron numerolla
+    nimettyihin tiedostoihin annettuun hakemistoon: pstats-tiedoston, liekkikaavion
+    tiivistetyt pinot ja yhteenvedon.
+
+    Funktioiden ajat mitataan cProfilella ja pinot näytteistämällä samanaikaisesti.
+    Profilointi hidastaa hakua, joten aikarajalla haku ehtii vähemmän syvälle kuin
+    ilman sitä."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, turn: int, extension: str) -> str:
+        """Palauttaa vuoron tulostiedoston polun"""
+        return os.path.join(self.directory, f'vuoro_{turn:03d}.{extension}')
+
+    def profile(self, turn: int, function: Callable[..., T], *arguments) -> T:
+        """Kutsuu funktiota profiloiden, kirjoittaa tulokset ja palauttaa funktion tuloksen"""
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), inspect.currentframe())
+        start_time = time.perf_counter()
+        with sampler:
+            profiler.enable()
+            try:
+                result = function(*arguments)
+            finally:
+                profiler.disable()
+        elapsed_time = time.perf_counter() - start_time
+
+        profiler.dump_stats(self.get_path(turn, 'pstats'))
+        with open(self.get_path(turn, 'folded'), 'w', encoding='utf-8') as file:
+            file.write(sampler.get_collapsed_stacks())
+        with open(self.get_path(turn, 'txt'), 'w', encoding='utf-8') as file:
+            file.write(format_summary(turn, elapsed_time, profiler))
+        return result
+
+
+def format_summary(turn: int, elapsed_time: float, profiler: cProfile.Profile) -> str:
+    """Palauttaa siirron profiloinnin yhteenvedon: ryhmien ajat ja osuudet sekä eniten
+    aikaa vieneet funktiot"""
+    lines = [f'Vuoro {turn}: {elapsed_time:.3f}s', '']
+    for category, category_time in get_category_times(profiler).items():
+        share = category_time / elapsed_time if elapsed_time > 0 else 0
+        lines.append(f'{CATEGORY_NAMES[category] + ":":<30} {category_time:>8.3f}s {share:>6.1%}')
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(
+        pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_FUNCTIONS)
+    return '\n'.join(lines) + '\n\n' + stream.getvalue()
@@ -0,0 +1,202 @@
+from __future__ import annotations
+from functools import cache
+from typing import TYPE_CHECKING, List, NamedTuple
+from constants import COMPUTER, PLAYER
+from game import Game, Move
+from pasture import Pasture
+from topology import Topology
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    # NumPy on valinnainen, joten sen puuttuminen tarkistetaan taustaa valittaessa
+    try:
+        import numpy as np
+    except ImportError:  # pragma: no cover
+        np = None
+
+# Vapaan laitumen miehittäjä taulukossa, ja laudan ulkopuolinen aina varattu laidun
+FREE = -1
+OUTSIDE = 2
+
+
+class RayMatrices(NamedTuple):
+    """Laudan rakenne indeksimatriiseina. Lyhyet säteet on täytetty laudan
+    ulkopuolisella laitumella, jonka indeksi on laidunten määrä."""
+    neighbours: np.ndarray
+    rays: np.ndarray
+    edge: np.ndarray
+
+
+@cache
+def get_ray_matrices(topology: Topology) -> RayMatrices:
+    """Palauttaa laudan naapuri- ja sädematriisit, jotka lasketaan kerran
+    kutakin laudan rakennetta kohden"""
+    outside = topology.get_amount_of_pastures()
+    directions = len(topology.rays[0])
+    max_length = max(len(ray) for rays in topology.rays for ray in rays)
+    rays = np.full((outside, directions, max_length + 1), outside, dtype=np.intp)
+    for index, pasture_rays in enumerate(topology.rays):
+        for direction, ray in enumerate(pasture_rays):
+            rays[index, direction, :len(ray)] = ray
+    edge = np.array([len(neighbours) < 6 for neighbours in topology.neighbours])
+    return RayMatrices(np.ascontiguousarray(rays[:, :, 0]), rays, edge)
+
+
+class NumpyBoard:
+    """Pelilaudan tila NumPy-taulukoina: laitumien miehittäjät ja lampaat.
+    Taulukoissa on yksi ylimääräinen, aina varattu laidun säteiden täytteeksi."""
+
+    def __init__(self, topology: Topology) -> None:
+        if np is None:
+            raise ImportError('NumPy is required for the NumPy board')
+        self.matrices = get_ray_matrices(topology)
+        amount_of_pastures = topology.get_amount_of_pastures()
+        self.occupier = np.full(amount_of_pastures + 1, FREE, dtype=np.int8)
+        self.occupier[amount_of_pastures] = OUTSIDE
+        self.sheep = np.zeros(amount_of_pastures + 1, dtype=np.int16)
+
+    def __deepcopy__(self, memo) -> NumpyBoard:
+        copied = NumpyBoard.__new__(NumpyBoard)
+        copied.matrices = self.matrices
+        copied.occupier = self.occupier.copy()
+        copied.sheep = self.sheep.copy()
+        memo[id(self)] = copied
+        return copied
+
+    def get_mobility(self, occupier: np.ndarray) -> np.ndarray:
+        """Palauttaa jokaisen laitumen vapaiden naapurien määrän. Taulukon ensimmäiset
+        ulottuvuudet voivat erotella useita pelitilanteita."""
+        free = occupier == FREE
+        return free[..., self.matrices.neighbours].sum(axis=-1)
+
+    def get_movable(self, occupier: np.ndarray, sheep: np.ndarray,
+                    mobility: np.ndarray) -> np.ndarray:
+        """Palauttaa tosi niille laumoille, joita voi siirtää"""
+        return (sheep[..., :-1] > 1) & (mobility > 0) & (occupier[..., :-1] != FREE)
+
+    def evaluate(self, occupier: np.ndarray, sheep: np.ndarray) -> np.ndarray:
+        """Palauttaa siirrettävien laumojen yhteenlasketun heuristisen arvon
+        jokaiselle annetulle pelitilanteelle kerralla"""
+        mobility = self.get_mobility(occupier)
+        movable = self.get_movable(occupier, sheep, mobility)
+        signs = np.where(occupier[..., :-1] == PLAYER, 1, -1)
+        values = signs * (sheep[..., :-1].astype(np.int64) - 1) * mobility * movable
+        return values.sum(axis=-1)
+
+    def get_movable_of(self, side: int) -> np.ndarray:
+        """Palauttaa ottelijan siirrettävien laumojen indeksit"""
+        mobility = self.get_mobility(self.occupier)
+        movable = self.get_movable(self.occupier, self.sheep, mobility)
+        return np.flatnonzero(movable & (self.occupier[:-1] == side))
+
+    def get_targets(self, index: int) -> List[int]:
+        """Palauttaa laitumelta mahdolliset kohdelaitumet kaikkiin suuntiin kerralla"""
+        rays = self.matrices.rays[index]
+        # Ensimmäinen varattu laidun pysäyttää liu'un; täyte on aina varattu
+        lengths = np.argmax(self.occupier[rays] != FREE, axis=-1)
+        directions = np.flatnonzero(lengths)
+        return rays[directions, lengths[directions] - 1].tolist()
+
+
+class NumpyPasture(Pasture):
+    """Laidun, jonka miehittäjä ja lampaat talletetaan yhteisiin NumPy-taulukoihin"""
+
+    __slots__ = ('board',)
+    _SLOTS = Pasture._SLOTS + __slots__
+
+    def __init__(self, coordinates, board: NumpyBoard, index: int, topology: Topology) -> None:
+        self.board = board
+        super().__init__(coordinates, index=index, topology=topology)
+
+    @property
+    def occupier(self) -> int | None:
+        occupier = int(self.board.occupier[self.index])
+        return None if occupier == FREE else occupier
+
+    @property
+    def sheep(self) -> int | None:
+        return int(self.board.sheep[self.index]) or None
+
+    def _store_state(self, occupier: int | None, sheep: int | None) -> None:
+        self.board.occupier[self.index] = FREE if occupier is None else occupier
+        self.board.sheep[self.index] = sheep if sheep is not None else 0
+
+    def get_amount_of_sheep(self) -> int:
+        return int(self.board.sheep[self.index])
+
+    def get_potential_targets(self, pastures: List[Pasture]) -> List[Pasture]:
+        return [pastures[index] for index in self.board.get_targets(self.index)]
+
+
+class NumpyGame(Game):
+    """Peli, jonka laudan tila on NumPy-taulukoissa. Liikkuvuus lasketaan kaikille
+    laumoille kerralla, ja sisarsiirtojen jälkeiset tilanteet arvioidaan yhdessä."""
+    has_batch_evaluation = True
+    has_incremental_evaluation = False
+
+    def _create_pastures(self, board_height: int, board_width: int) -> List[Pasture]:
+        topology = self.topology
+        self.board = NumpyBoard(topology)
+        return [NumpyPasture(coordinates, self.board, index, topology)
+                for index, coordinates in enumerate(topology.coordinates)]
+
+    def _evaluate_pastures(self) -> float:
+        return int(self.board.evaluate(self.board.occupier, self.board.sheep))
+
+    def _is_unable_to_move(self, occupier: int) -> bool:
+        return len(self.board.get_movable_of(occupier)) == 0
+
+    def get_amount_of_pastures_occupied_by_player(self) -> int:
+        return int(np.count_nonzero(self.board.occupier == PLAYER))
+
+    def get_amount_of_pastures_occupied_by_computer(self) -> int:
+        return int(np.count_nonzero(self.board.occupier == COMPUTER))
+
+    def get_amount_of_free_pastures(self) -> int:
+        return int(np.count_nonzero(self.board.occupier == FREE))
+
+    def get_potential_initial_pastures(self) -> List[Pasture]:
+        free = self.board.occupier[:-1] == FREE
+        return [self.pastures[index]
+                for index in np.flatnonzero(free & self.board.matrices.edge)]
+
+    def get_potential_pastures_to_choose_this_turn(self) -> List[Pasture]:
+        side = PLAYER if self.is_players_turn else COMPUTER
+        return [self.pastures[index] for index in self.board.get_movable_of(side)]
+
+    def evaluate_moves(self, moves: List[Move]) -> List[float]:
+        """Palauttaa pelitilanteen heuristisen arvon kunkin annetun siirron jälkeen.
+        Siirtojen jälkeiset tilanteet muodostetaan taulukon riveiksi ja arvioidaan
+        kerralla. Vain pelin päättävät tilanteet arvioidaan yksitellen."""
+        if len(moves) == 0 or self._winner is not None:
+            return super().evaluate_moves(moves)
+        side = PLAYER if self.is_players_turn else COMPUTER
+        rows = np.arange(len(moves))
+        sources = np.array([move.source for move in moves])
+        occupier = np.repeat(self.board.occupier[np.newaxis, :], len(moves), axis=0)
+        sheep = np.repeat(self.board.sheep[np.newaxis, :], len(moves), axis=0)
+
+        if moves[0].target is None:
+            occupier[rows, sources] = side
+            sheep[rows, sources] = self.initial_sheep
+        else:
+            targets = np.array([move.target for move in moves])
+            moved_sheep = np.array([move.sheep for move in moves])
+            occupier[rows, targets] = side
+            sheep[rows, targets] = moved_sheep
+            sheep[rows, sources] -= moved_sheep
+
+        values = self.board.evaluate(occupier, sheep).astype(float)
+
+        # Aloitusvaiheen jälkeen peli voi päättyä, jolloin arvo riippuu voittajasta
+        if self._turn + 1 > 2:
+            movable = self.board.get_movable(
+                occupier, sheep, self.board.get_mobility(occupier))
+            players_movable = (movable & (occupier[:, :-1] == PLAYER)).any(axis=-1)
+            computers_movable = (movable & (occupier[:, :-1] == COMPUTER)).any(axis=-1)
+            for row in np.flatnonzero(~players_movable | ~computers_movable):
+                self.make_move(moves[row])
+                values[row] = self.evaluate_game_state()
+                self.undo_move(moves[row])
+        return values.tolist()
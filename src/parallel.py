@@ -0,0 +1,248 @@
+import math
+import multiprocessing
+import time
+from concurrent.futures import FIRST_EXCEPTION, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, List, NamedTuple, NoReturn, Tuple
+from constants import ALPHA, BETA, TABLE_SIZE_IN_MEGABYTES
+from endgame import EndgameSolver
+from game import Game, Move
+from minimax import (
+    CancellationToken,
+    SearchAborted,
+    SearchContext,
+    SearchResult,
+    SplitPolicy,
+    get_all_splits,
+    get_possible_moves,
+    minimax
+)
+from transposition import TranspositionTable
+
+# Kuinka usein pääprosessi tarkistaa, onko haku peruttu
+CANCELLATION_POLL_INTERVAL = 0.01
+
+Window = Tuple[float, float]
+
+
+class RootJob(NamedTuple):
+    """Työprosessille annettavan juurisiirtojen haun asetukset. Ilman ikkunaa haku
+    käyttää prosessien jakamaa rajaa."""
+    depth: int
+    max_player: bool
+    deadline: float | None
+    split_policy: SplitPolicy
+    window: Window | None = None
+
+
+class RootResult(NamedTuple):
+    """Juurisiirron arvo, haussa käytetty ikkuna ja laskettujen solmujen määrä"""
+    value: float
+    window: Window
+    nodes: int
+
+
+@dataclass
+class _WorkerState:
+    """Työprosessin tila, joka alustetaan kerran prosessia kohden"""
+    shared_bound: Any = None
+    abort_event: Any = None
+    # Prosessin alustus korvaa taulun oikean kokoisella
+    table: TranspositionTable = field(default_factory=lambda: TranspositionTable(0))
+    solver: EndgameSolver | None = None
+    root_hash: int | None = None
+
+
+_worker_state = _WorkerState()
+
+
+def _init_worker(shared_bound, abort_event, table_size_in_megabytes: float,
+                 endgame_threshold: int | None) -> None:
+    """Alustaa työprosessin jaetun rajan, keskeytysmerkin, hajautustaulun ja
+    loppupelin ratkaisijan"""
+    _worker_state.shared_bound = shared_bound
+    _worker_state.abort_event = abort_event
+    _worker_state.table = TranspositionTable(table_size_in_megabytes)
+    _worker_state.solver = (EndgameSolver(endgame_threshold)
+                            if endgame_threshold is not None else None)
+
+
+def _search_root_move(game: Game, move: Move, job: RootJob) -> RootResult:
+    """Laskee juurisiirron arvon työprosessissa. Ilman annettua ikkunaa haku käyttää
+    muiden prosessien jo löytämää parasta arvoa rajana ja päivittää sitä."""
+    state = _worker_state
+    if game.hash != state.root_hash:
+        # Saman juuren talletukset säilyvät syventävän haun kierrokselta toiselle, jolloin
+        # aiemman kierroksen siirrot järjestävät myös seuraavan kierroksen haun
+        state.table.clear()
+        state.root_hash = game.hash
+
+    shared_bound = state.shared_bound
+    window = job.window
+    if window is None:
+        bound = shared_bound.value
+        window = (bound, BETA) if job.max_player else (ALPHA, bound)
+
+    # Juurisiirron jälkeinen tilanne on hakupuun toisella tasolla
+    context = SearchContext(state.table, deadline=job.deadline,
+                            cancel_token=CancellationToken(state.abort_event),
+                            split_policy=job.split_policy, endgame_solver=state.solver, ply=1)
+    game.make_move(move)
+    value, _ = minimax(game, job.depth - 1, window[0], window[1], not job.max_player, context)
+
+    if job.window is None:
+        with shared_bound.get_lock():
+            if value > shared_bound.value if job.max_player else value < shared_bound.value:
+                shared_bound.value = value
+    return RootResult(value, window, context.nodes)
+
+
+def _raise_failure(futures: List[Future]) -> NoReturn:
+    """Nostaa ensimmäisen keskeytyksestä poikkeavan virheen, tai muuten keskeytyksen"""
+    for future in futures:
+        exception = future.exception()
+        if exception is not None and not isinstance(exception, SearchAborted):
+            raise exception
+    raise SearchAborted()
+
+
+def _is_exact(result: RootResult, max_player: bool) -> bool:
+    """Palauttaa tosi, jos arvo on tarkka eikä vain ikkunan reunalta palautettu raja"""
+    if max_player:
+        return result.value > result.window[0]
+    return result.value < result.window[1]
+
+
+class ParallelSearch:
+    """Juuritason rinnakkainen haku, joka jakaa juurisiirrot prosessijoukolle.
+
+    Prosessit jakavat parhaan löydetyn arvon, jota seuraavat juurisiirrot käyttävät
+    karsintarajana. Siirto valitaan ajoituksista riippumatta aina samoin: tasatilanteessa
+    valitaan peräkkäisen haun tavoin juurisiirroista viimeinen, jonka arvo on paras."""
+
+    def __init__(self, workers: int,
+                 table_size_in_megabytes: float = TABLE_SIZE_IN_MEGABYTES,
+                 split_policy: SplitPolicy = get_all_splits,
+                 endgame_threshold: int | None = None) -> None:
+        if workers < 1:
+            raise ValueError('At least one worker is required')
+        self.workers = workers
+        self.split_policy = split_policy
+        # Prosessit käynnistetään puhtaalta pöydältä, eikä kopioina käyttöliittymästä
+        context = multiprocessing.get_context('spawn')
+        self._shared_bound = context.Value('d', ALPHA)
+        self._abort_event = context.Event()
+        self._executor = ProcessPoolExecutor(
+            workers, mp_context=context, initializer=_init_worker,
+            initargs=(self._shared_bound, self._abort_event, table_size_in_megabytes / workers,
+                      endgame_threshold))
+
+    def __enter__(self) -> 'ParallelSearch':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Pysäyttää työprosessit"""
+        self._abort_event.set()
+        self._executor.shutdown(cancel_futures=True)
+
+    def _wait(self, futures: List[Future], cancel_token: CancellationToken | None
+              ) -> List[RootResult]:
+        """Odottaa juurisiirtojen tulokset, ja keskeyttää kaikki, jos yksikin keskeytyy"""
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, CANCELLATION_POLL_INTERVAL, FIRST_EXCEPTION)
+            is_cancelled = cancel_token is not None and cancel_token.is_cancelled()
+            if is_cancelled or any(future.exception() is not None for future in done):
+                self._abort_event.set()
+                wait(pending)
+                _raise_failure(futures)
+        return [future.result() for future in futures]
+
+    def _submit(self, game: Game, moves: List[Move], job: RootJob) -> List[Future]:
+        return [self._executor.submit(_search_root_move, game, move, job) for move in moves]
+
+    def _confirm_best_move(self, game: Game, root_moves: List[Move], results: List[RootResult],
+                           best_value: float, job: RootJob,
+                           cancel_token: CancellationToken | None) -> Tuple[int, int]:
+        """Palauttaa parhaan juurisiirron indeksin ja varmistukseen kuluneet solmut.
+        Rajan kanssa samat arvot voivat olla yhtä hyviä kuin paras tarkka arvo, joten
+        viimeisen tarkan arvon jälkeiset lasketaan uudelleen kapealla ikkunalla."""
+        last_exact = max(index for index, result in enumerate(results)
+                         if result.value == best_value and _is_exact(result, job.max_player))
+        uncertain = [index for index, result in enumerate(results)
+                     if index > last_exact and result.value == best_value]
+        if len(uncertain) == 0:
+            return last_exact, 0
+
+        window = ((math.nextafter(best_value, ALPHA), BETA) if job.max_player
+                  else (ALPHA, math.nextafter(best_value, BETA)))
+        confirmations = self._wait(
+            self._submit(game, [root_moves[index] for index in uncertain],
+                         job._replace(window=window)), cancel_token)
+        nodes = sum(result.nodes for result in confirmations)
+        for index, result in zip(reversed(uncertain), reversed(confirmations)):
+            if _is_exact(result, job.max_player):
+                return index, nodes
+        return last_exact, nodes
+
+    def search(self, game: Game, depth: int, max_player: bool,
+               root_moves: List[Move] | None = None, deadline: float | None = None,
+               cancel_token: CancellationToken | None = None) -> Tuple[float, Move | None, int]:
+        """Palauttaa pelitilanteen arvon, parhaan siirron ja laskettujen solmujen määrän
+        annetulla syvyydellä"""
+        if root_moves is None:
+            root_moves = get_possible_moves(
+                game, max_player, self.split_policy, prune_symmetric=True)
+        if len(root_moves) == 0:
+            return game.evaluate_game_state(), None, 1
+
+        self._abort_event.clear()
+        self._shared_bound.value = ALPHA if max_player else BETA
+        job = RootJob(depth, max_player, deadline, self.split_policy)
+        results = self._wait(self._submit(game, root_moves, job), cancel_token)
+        nodes = 1 + sum(result.nodes for result in results)
+
+        # Rajaksi palautettu arvo ei ole koskaan parempi kuin jokin tarkka arvo
+        values = [result.value for result in results]
+        best_value = max(values) if max_player else min(values)
+        if abs(best_value) == math.inf and (best_value < 0) == max_player:
+            # Kaikki siirrot häviävät, joten ne ovat yhtä hyviä
+            return best_value, root_moves[-1], nodes
+
+        best_index, confirmation_nodes = self._confirm_best_move(
+            game, root_moves, results, best_value, job, cancel_token)
+        return best_value, root_moves[best_index], nodes + confirmation_nodes
+
+    def iterative_deepening(self, game: Game, max_player: bool,
+                            time_limit: float | None = None,
+                            cancel_token: CancellationToken | None = None,
+                            max_depth: int | None = None) -> SearchResult:
+        """Syventää rinnakkaista hakua kierros kerrallaan, kunnes aika loppuu tai haku
+        perutaan. Edellisen kierroksen paras siirto lasketaan ensimmäisenä."""
+        if max_depth is None:
+            max_depth = max(1, game.get_amount_of_free_pastures())
+        root_moves = get_possible_moves(
+            game, max_player, self.split_policy, prune_symmetric=True)
+
+        # Ensimmäinen kierros lasketaan aina loppuun, jotta siirto löytyy
+        value, move, nodes = self.search(game, 1, max_player, root_moves)
+        result = SearchResult(value, move, 1, nodes, {})
+
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        for depth in range(2, max_depth + 1):
+            if abs(result.value) == math.inf or result.move is None:
+                break
+            root_moves.remove(result.move)
+            root_moves.insert(0, result.move)
+            try:
+                value, move, nodes = self.search(
+                    game, depth, max_player, root_moves, deadline, cancel_token)
+            except SearchAborted:
+                break
+            result = SearchResult(value, move, depth, result.nodes + nodes, {})
+
+        return SearchResult(result.value, result.move, result.depth, result.nodes,
+                            {'workers': self.workers})
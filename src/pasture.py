@@ -1,52 +1,94 @@
 from __future__ import annotations
-import math
-from dataclasses import dataclass
-from typing import List, Tuple
+from copy import deepcopy
+from typing import Any, Callable, ClassVar, Dict, List, Tuple
 from constants import (
     COMPUTER,
-    DIRECTION_VECTORS,
-    HALF_RADIUS,
-    MINIMAL_RADIUS,
-    PASTURE_RADIUS,
     PLAYER
 )
+from topology import Coordinates, Topology
 
+# Muuttumattomat kentät, joita ei tarvitse kopioida
+_SHARED_SLOTS = frozenset(('coordinates', 'index', 'topology'))
+_IMMUTABLE_TYPES = (int, bool, type(None))
 
-# Code derived from:
-# https://github.com/rbaltrusch/pygame_examples/blob/master/code/hexagonal_tiles/hexagon.py
-# Original Author: Richard Baltrusch
-# License: MIT License. All original licensing terms have been fully preserved.
-# Date accessed: 2024-03-21
-# Methods adapted: centre, collide_with_point, _compute_vertices, _is_neighbour
 
-@dataclass
 class Pasture:
-    position: Tuple[float, float]
-    occupier: int | None = None
-    sheep: int | None = None
-    planned_sheep: int | None = None
-    is_targeted: bool = False
-
-    def __post_init__(self):
-        self.vertices = self._compute_vertices()
-
-    def _compute_vertices(self) -> List[Tuple[float, float]]:
-        """Palauttaa listan laitumen kärjistä koordinaattipareina"""
-        x, y = self.position
-        return [
-            (x, y),
-            (x - HALF_RADIUS, y + MINIMAL_RADIUS),
-            (x, y + 2 * MINIMAL_RADIUS),
-            (x + PASTURE_RADIUS, y + 2 * MINIMAL_RADIUS),
-            (x + 3 * HALF_RADIUS, y + MINIMAL_RADIUS),
-            (x + PASTURE_RADIUS, y),
-        ]
+    """Laitumen muuttuva tila: miehittäjä, lampaat ja käyttöliittymän suunnitelmat.
+
+    Laudan muuttumaton rakenne on yhteisessä topologiassa, joten laidun tallettaa vain
+    viittaukset siihen. Laitumet vertautuvat identiteetin perusteella, jolloin esimerkiksi
+    laitumen etsiminen listasta ei vertaa kenttiä yksitellen. Miehittäjää ja lampaita
+    muutetaan vain metodeilla occupy, set_sheep ja reset, jotka ilmoittavat muutoksesta.
+    Ominaisuudet occupier ja sheep ovat vain luettavissa."""
+    __slots__ = ('coordinates', '_occupier', '_sheep', 'planned_sheep', 'is_targeted', 'index',
+                 'topology', 'on_change')
+    # Luokan ja sen yliluokkien kentät. Aliluokka lisää tähän omat kenttänsä.
+    _SLOTS: ClassVar[Tuple[str, ...]] = __slots__
+
+    def __init__(self, coordinates: Coordinates, occupier: int | None = None,
+                 sheep: int | None = None, planned_sheep: int | None = None,
+                 is_targeted: bool = False, index: int = 0,
+                 topology: Topology | None = None,
+                 on_change: Callable[[Pasture, int | None, int], None] | None = None) -> None:
+        self.coordinates = coordinates
+        self.index = index
+        self.topology = topology
+        self.planned_sheep = planned_sheep
+        self.is_targeted = is_targeted
+        # Kutsutaan miehittäjän tai lampaiden muututtua. Argumentteina annetaan laitumen
+        # aiempi miehittäjä ja lammasmäärä.
+        self.on_change = on_change
+        self._store_state(occupier, sheep)
 
     @property
-    def centre(self) -> Tuple[float, float]:
-        """Palauttaa laitumen keskipisteen"""
-        x, y = self.position
-        return (x + HALF_RADIUS, y + MINIMAL_RADIUS)
+    def occupier(self) -> int | None:
+        """Laitumen miehittäjä, tai None, jos laidun on vapaa"""
+        return self._occupier
+
+    @property
+    def sheep(self) -> int | None:
+        """Laitumen lampaiden määrä, tai None, jos laitumella ei ole lampaita"""
+        return self._sheep
+
+    def _store_state(self, occupier: int | None, sheep: int | None) -> None:
+        """Tallettaa miehittäjän ja lampaat ilmoittamatta muutoksesta. Aliluokka voi
+        tallettaa tilan muualle."""
+        self._occupier = occupier
+        self._sheep = sheep
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Aliluokka voi tallettaa tilan muualle, jolloin sen kenttiä ei ole asetettu
+        state: Dict[str, Any] = {}
+        for name in self._SLOTS:
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:
+                continue
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # Kentät asetetaan ilmoittamatta muutoksista, koska tila on jo valmis
+        for name in self._SLOTS:
+            if name in state:
+                setattr(self, name, state[name])
+
+    def __deepcopy__(self, memo) -> Pasture:
+        # Koordinaatit, topologia ja lukuarvot ovat muuttumattomia, joten kopiot jakavat ne
+        copied = object.__new__(type(self))
+        memo[id(self)] = copied
+        for name in self._SLOTS:
+            try:
+                value = getattr(self, name)
+            except AttributeError:
+                continue
+            if name not in _SHARED_SLOTS and not isinstance(value, _IMMUTABLE_TYPES):
+                value = deepcopy(value, memo)
+            setattr(copied, name, value)
+        return copied
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}(index={self.index}, coordinates={self.coordinates}, '
+                f'occupier={self.occupier}, sheep={self.sheep})')
 
     # Laitumen lampaat ja valtaus
 
@@ -78,15 +120,24 @@ class Pasture:
         """Lisää tai vähentää annetun määrän lampaita"""
         self.planned_sheep = self.get_amount_of_planned_sheep() + change
 
+    def _set_state(self, occupier: int | None, sheep: int | None) -> None:
+        """Asettaa miehittäjän ja lampaat, ja ilmoittaa muutoksesta kerran"""
+        previous_occupier, previous_sheep = self.occupier, self.get_amount_of_sheep()
+        self._store_state(occupier, sheep)
+        if self.on_change is not None:
+            self.on_change(self, previous_occupier, previous_sheep)
+
     def occupy(self, occupier: int, sheep: int) -> None:
         """Miehittää laitumen annetulla lammasmäärällä"""
-        self.occupier = occupier
-        self.sheep = sheep
+        self._set_state(occupier, sheep)
+
+    def set_sheep(self, sheep: int | None) -> None:
+        """Asettaa laitumen lampaiden määrän"""
+        self._set_state(self.occupier, sheep)
 
     def reset(self) -> None:
         """Tyhjentää laitumen tiedot"""
-        self.occupier = None
-        self.sheep = None
+        self._set_state(None, None)
         self.planned_sheep = None
         self.is_targeted = False
 
@@ -106,16 +157,13 @@ class Pasture:
             return amount_of_possible_moves
         return -amount_of_possible_moves
 
-        # Laitumen naapurit
-
-    def _is_neighbour(self, pasture: Pasture) -> bool:
-        """Palauttaa tosi, jos annettu laidun on naapuri"""
-        distance = math.dist(pasture.centre, self.centre)
-        return math.isclose(distance, 2 * MINIMAL_RADIUS, rel_tol=0.05)
+    # Laitumen naapurit
 
     def get_neighbours(self, pastures: List[Pasture]) -> List[Pasture]:
         """Palauttaa kaikki naapurilaitumet"""
-        return [pasture for pasture in pastures if self._is_neighbour(pasture)]
+        if self.topology is None:
+            return []
+        return [pastures[index] for index in self.topology.neighbours[self.index]]
 
     def _get_amount_of_neighbours(self, pastures: List[Pasture]) -> int:
         """Palauttaa naapurilaitumien määrän"""
@@ -147,45 +195,29 @@ class Pasture:
 
     # Pelimekaniikka
 
-    def collide_with_point(self, point: Tuple[float, float]) -> bool:
-        """Palauttaa tosi, jos annettu positio on laitumella"""
-        return math.dist(point, self.centre) < MINIMAL_RADIUS
-
-    def _get_pasture_at_point(self, vector: Tuple[float, float],
-                              distance: int, pastures: List[Pasture]) -> Pasture | None:
-        """Palauttaa laitumen annetusta positiosta, jos sellainen löytyy annetuista laitumista"""
-        target_position = (self.centre[0] + vector[0] * distance,
-                           self.centre[1] + vector[1] * distance)
-
-        for pasture in pastures:
-            if (math.isclose(pasture.centre[0], target_position[0], rel_tol=0.05)
-                    and math.isclose(pasture.centre[1], target_position[1], rel_tol=0.05)):
-                return pasture
-        return None
+    def _get_rays(self) -> Tuple[Tuple[int, ...], ...]:
+        """Palauttaa laitumelta lähtevät säteet kuhunkin suuntaan"""
+        if self.topology is None:
+            return ()
+        return self.topology.rays[self.index]
 
-    def _get_target_pasture(self, vector: Tuple[float, float],
+    def _get_target_pasture(self, ray: Tuple[int, ...],
                             pastures: List[Pasture]) -> Pasture | None:
-        """Palauttaa viimeisen vapaan laitumen annetusta suunnasta, jos sellainen löytyy"""
-        current_distance = 1
-        while True:
-            potential_target = self._get_pasture_at_point(
-                vector, current_distance, pastures)
-            if potential_target is None or potential_target.is_occupied():
-                # Palauttaa edellisen laitumen, mikäli laidun on vallattu
-                # tai pelilaudan reuna tullut vastaan.
-                if current_distance < 2:
-                    # Ei palauteta lähtöruutua, mikäli ei päästy yhtä laidunta kauemmaksi.
-                    return None
-                last_valid_pasture = self._get_pasture_at_point(
-                    vector, current_distance - 1, pastures)
-                return last_valid_pasture
-            current_distance += 1
+        """Palauttaa viimeisen vapaan laitumen annetulta säteeltä, jos sellainen löytyy"""
+        last_valid_pasture = None
+        for index in ray:
+            potential_target = pastures[index]
+            if potential_target.is_occupied():
+                # Vallattu laidun pysäyttää siirron edelliselle laitumelle
+                break
+            last_valid_pasture = potential_target
+        return last_valid_pasture
 
     def get_potential_targets(self, pastures: List[Pasture]) -> List[Pasture]:
         """Palauttaa mahdolliset kohteet annetuista laitumista"""
         potential_targets: List[Pasture] = []
-        for vector in DIRECTION_VECTORS:
-            target_pasture = self._get_target_pasture(vector, pastures)
+        for ray in self._get_rays():
+            target_pasture = self._get_target_pasture(ray, pastures)
             if target_pasture is not None:
                 potential_targets.append(target_pasture)
         return potential_targets
@@ -198,8 +230,8 @@ class Pasture:
         """Palauttaa minkä tahansa mahdollisen kohdelaitumen, jos sellainen löytyy"""
         if not self.is_possible_to_move(pastures):
             return None
-        for vector in DIRECTION_VECTORS:
-            target_pasture = self._get_target_pasture(vector, pastures)
+        for ray in self._get_rays():
+            target_pasture = self._get_target_pasture(ray, pastures)
             if target_pasture is not None:
                 return target_pasture
         return None
@@ -208,7 +240,7 @@ class Pasture:
         """Palauttaa tosi, jos annetuista laitumista löytyy yksikin mahdollinen kohde"""
         if not self.is_possible_to_move(pastures):
             return False
-        for vector in DIRECTION_VECTORS:
-            if self._get_target_pasture(vector, pastures) is not None:
+        for ray in self._get_rays():
+            if self._get_target_pasture(ray, pastures) is not None:
                 return True
         return False
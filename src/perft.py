@@ -0,0 +1,91 @@
+import argparse
+import time
+from typing import Dict, List, Tuple, Type
+from backends import BACKENDS
+from constants import BOARD_HEIGHT, BOARD_WIDTH
+from game import Game, Move
+from minimax import SPLIT_POLICIES, SplitPolicy, generate_moves, get_all_splits
+
+# Vakiotilanteet saadaan tekemällä näin monta kertaa ensimmäinen tuotettu siirto alusta.
+# Tilanteet eivät riipu heuristiikasta eivätkä siirtojen järjestämisestä.
+PERFT_POSITION_TURNS = (0, 2, 4, 8)
+
+
+def get_perft_positions(board_height: int = BOARD_HEIGHT, board_width: int = BOARD_WIDTH,
+                        game_class: Type[Game] = Game) -> List[Tuple[str, Game]]:
+    """Palauttaa vakiotilanteet, jotka ovat samat jokaisella ajokerralla"""
+    positions: List[Tuple[str, Game]] = []
+    for amount_of_turns in PERFT_POSITION_TURNS:
+        game = game_class(board_height, board_width, False)
+        for _ in range(amount_of_turns):
+            game.make_move(generate_moves(game)[0])
+        positions.append((f'vuoro {amount_of_turns}', game))
+    return positions
+
+
+def perft(game: Game, depth: int, split_policy: SplitPolicy = get_all_splits,
+          ply: int = 0) -> int:
+    """Palauttaa annetun syvyyden lehtitilanteiden määrän. Ennen syvyyttä päättyneet
+    pelit lasketaan lehdiksi, koska niistä ei voi jatkaa."""
+    if depth == 0:
+        return 1
+    possible_moves = generate_moves(game, split_policy, ply)
+    if len(possible_moves) == 0:
+        return 1
+    if depth == 1:
+        return len(possible_moves)
+    leaves = 0
+    for move in possible_moves:
+        game.make_move(move)
+        leaves += perft(game, depth - 1, split_policy, ply + 1)
+        game.undo_move(move)
+    return leaves
+
+
+def divide(game: Game, depth: int, split_policy: SplitPolicy = get_all_splits
+           ) -> Dict[Move, int]:
+    """Palauttaa lehtitilanteiden määrän kunkin juurisiirron jälkeen. Kahden
+    siirronmuodostuksen eroista näkee näin, minkä siirron alta ero löytyy."""
+    counts: Dict[Move, int] = {}
+    for move in generate_moves(game, split_policy):
+        game.make_move(move)
+        counts[move] = perft(game, depth - 1, split_policy, 1)
+        game.undo_move(move)
+    return counts
+
+
+def _print_leaves(name: str, game: Game, depth: int, split_policy: SplitPolicy,
+                  show_divide: bool) -> None:
+    """Tulostaa tilanteen lehtien määrän ja laskentanopeuden, ja pyydettäessä
+    lehtien määrät juurisiirroittain"""
+    start_time = time.perf_counter()
+    counts = divide(game, depth, split_policy) if show_divide else {}
+    leaves = sum(counts.values()) if show_divide else perft(game, depth, split_policy)
+    elapsed_time = time.perf_counter() - start_time
+    print(f'{name:>10} {depth:>7} {leaves:>12} {elapsed_time:>10.2f} '
+          f'{leaves / elapsed_time:>10.0f}')
+    for move, count in sorted(counts.items()):
+        print(f'    {move.source:>3} {str(move.target):>4} {move.sheep:>3} {count:>12}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Siirronmuodostuksen lehtilaskuri')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--height', type=int, default=BOARD_HEIGHT)
+    parser.add_argument('--width', type=int, default=BOARD_WIDTH)
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='laitumet')
+    parser.add_argument('--split-policy', choices=sorted(SPLIT_POLICIES), default='all')
+    parser.add_argument('--divide', action='store_true',
+                        help='lehtien määrät juurisiirroittain')
+    arguments = parser.parse_args()
+
+    split_policy = SPLIT_POLICIES[arguments.split_policy]
+    positions = get_perft_positions(arguments.height, arguments.width,
+                                    BACKENDS[arguments.backend])
+    print(f'{"tilanne":>10} {"syvyys":>7} {"lehdet":>12} {"aika (s)":>10} {"lehdet/s":>10}')
+    for name, game in positions:
+        _print_leaves(name, game, arguments.depth, split_policy, arguments.divide)
+
+
+if __name__ == '__main__':
+    main()
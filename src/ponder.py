@@ -0,0 +1,99 @@
+import copy
+import threading
+from typing import Dict
+from constants import ALPHA, BETA
+from endgame import EndgameSolver
+from game import Game, Move
+from minimax import (
+    BackgroundSearch,
+    CancellationToken,
+    SearchAborted,
+    SearchContext,
+    SearchResult,
+    SplitPolicy,
+    get_all_splits,
+    get_possible_moves,
+    is_unable_to_move,
+    minimax
+)
+from transposition import TranspositionTable
+
+# Vastustajan todennäköisimmistä siirroista lasketaan vastaukset näin monelle
+PONDERED_REPLIES = 3
+
+
+class Ponderer:
+    """Laskee vastustajan vuoron aikana taustasäikeessä vastauksia tämän
+    todennäköisimpiin siirtoihin.
+
+    Lasketut arvot talletetaan tekoälyn hajautustauluun, ja kunkin siirron jälkeisen
+    tilanteen paras vastaus muistetaan, joten tekoäly voi vastata heti, jos vastustaja
+    tekee jonkin ennakoiduista siirroista. Laskenta tehdään pelitilanteen kopiossa."""
+
+    def __init__(self, table: TranspositionTable,
+                 split_policy: SplitPolicy = get_all_splits,
+                 endgame_solver: EndgameSolver | None = None) -> None:
+        self._table = table
+        self._split_policy = split_policy
+        self._endgame_solver = endgame_solver
+        self._background_search = BackgroundSearch()
+        self._results: Dict[int, SearchResult] = {}
+        self._game_hash: int | None = None
+        self._lock = threading.Lock()
+
+    def is_active(self) -> bool:
+        """Palauttaa tosi, jos laskenta on aloitettu eikä sitä ole vielä pysäytetty"""
+        return self._background_search.is_running()
+
+    def start(self, game: Game) -> None:
+        """Aloittaa laskennan annetusta pelitilanteesta, ellei se ole jo käynnissä.
+        Jos laskenta koskee eri tilannetta, se aloitetaan alusta."""
+        if self.is_active():
+            if self._game_hash == game.hash:
+                return
+            self.stop()
+        self._game_hash = game.hash
+        with self._lock:
+            self._results = {}
+        self._table.new_search()
+        self._background_search.start(self._ponder, copy.deepcopy(game))
+
+    def stop(self) -> None:
+        """Pysäyttää laskennan. Haku tarkistaa perumisen jokaisessa solmussa,
+        joten säie päättyy lähes heti."""
+        self._background_search.stop()
+
+    def get_result(self, game: Game) -> SearchResult | None:
+        """Palauttaa pelitilanteelle lasketun parhaan vastauksen, jos sellainen on"""
+        with self._lock:
+            return self._results.get(game.hash)
+
+    def _ponder(self, game: Game, cancel_token: CancellationToken) -> None:
+        """Syventää vastauksia vastustajan todennäköisimpiin siirtoihin vuorotellen,
+        kunnes laskenta pysäytetään tai peli on laskettu loppuun"""
+        replies = get_possible_moves(
+            game, game.is_players_turn, self._split_policy)[:PONDERED_REPLIES]
+        context = SearchContext(self._table, cancel_token=cancel_token,
+                                split_policy=self._split_policy,
+                                endgame_solver=self._endgame_solver)
+        try:
+            for depth in range(1, game.get_amount_of_free_pastures()):
+                for reply in replies:
+                    self._ponder_reply(game, reply, depth, context)
+        except SearchAborted:
+            pass
+
+    def _ponder_reply(self, game: Game, reply: Move, depth: int, context: SearchContext) -> None:
+        """Laskee parhaan vastauksen annetun siirron jälkeiseen tilanteeseen"""
+        game.make_move(reply)
+        try:
+            max_player = game.is_players_turn
+            if is_unable_to_move(game, max_player):
+                return
+            nodes = context.nodes
+            value, move = minimax(game, depth, ALPHA, BETA, max_player, context)
+            with self._lock:
+                self._results[game.hash] = SearchResult(
+                    value, move, depth, context.nodes - nodes, {})
+        finally:
+            game.undo_move(reply)
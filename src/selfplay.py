@@ -0,0 +1,208 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import IO, Any, Dict, List, NamedTuple, Tuple
+from book import load_opening_book
+from constants import (
+    BOARD_HEIGHT,
+    BOARD_WIDTH,
+    COMPUTER,
+    ENDGAME_FREE_PASTURES,
+    PLAYER,
+    SIMULATED_PLAYER_TIME_LIMIT,
+    SPLIT_POLICY
+)
+from engine import ENGINES, SearchEngine, create_engine
+from game import Game
+from instrumentation import to_json_value
+
+# Ottelijat kirjoitetaan tuloksiin näillä nimillä
+SIDE_NAMES = {PLAYER: 'player', COMPUTER: 'computer'}
+
+
+class EngineSettings(NamedTuple):
+    name: str = 'minimax'
+    time_limit: float | None = SIMULATED_PLAYER_TIME_LIMIT
+    max_depth: int | None = None
+    split_policy: str = SPLIT_POLICY
+    endgame_threshold: int | None = ENDGAME_FREE_PASTURES
+
+
+class MatchSettings(NamedTuple):
+    """Kaikille peleille yhteiset asetukset. Pelin satunnaisuuden siemen lasketaan
+    annetusta siemenestä ja pelin numerosta."""
+    board_height: int = BOARD_HEIGHT
+    board_width: int = BOARD_WIDTH
+    use_opening_book: bool = True
+    seed: int = 0
+
+
+def create_engine_from_settings(settings: EngineSettings, opening_book, seed: int
+                                ) -> SearchEngine:
+    """Luo asetuksia vastaavan tekoälyn. Monte Carlo -haun satunnaisuus
+    alustetaan annetulla siemenellä, jotta pelit voi toistaa."""
+    if settings.name == 'mcts':
+        if settings.max_depth is not None:
+            raise ValueError('Depth limit is not supported in Monte Carlo search')
+        # Monte Carlo -haku ei käytä loppupelin ratkaisijaa, joten raja ohitetaan
+        return create_engine(settings.name, settings.time_limit,
+                             split_policy=settings.split_policy,
+                             opening_book=opening_book, seed=seed)
+    return create_engine(settings.name, settings.time_limit, max_depth=settings.max_depth,
+                         split_policy=settings.split_policy, opening_book=opening_book,
+                         endgame_threshold=settings.endgame_threshold)
+
+
+def play_game(game_number: int, player: EngineSettings, computer: EngineSettings,
+              match: MatchSettings = MatchSettings()) -> Dict[str, Any]:
+    """Pelaa pelin kahden tekoälyn välillä ilman käyttöliittymää, ja palauttaa pelin
+    siirrot, tuloksen sekä jokaisen siirron hakuajan ja solmumäärän"""
+    opening_book = (load_opening_book(match.board_height, match.board_width)
+                    if match.use_opening_book else None)
+    seed = match.seed + 2 * game_number
+    engines = {
+        PLAYER: create_engine_from_settings(player, opening_book, seed),
+        COMPUTER: create_engine_from_settings(computer, opening_book, seed + 1),
+    }
+    game = Game(match.board_height, match.board_width, True)
+    moves: List[Dict[str, Any]] = []
+    start_time = time.perf_counter()
+    try:
+        while not game.is_over():
+            side = PLAYER if game.is_players_turn else COMPUTER
+            move_start_time = time.perf_counter()
+            result = engines[side].choose_move(game)
+            if result.move is None:
+                raise SystemError('No next move found')
+            moves.append({
+                'side': SIDE_NAMES[side],
+                'move': [result.move.source, result.move.target, result.move.sheep],
+                'time': time.perf_counter() - move_start_time,
+                'nodes': result.nodes,
+                'depth': result.depth,
+                'value': to_json_value(result.value),
+            })
+            game.make_move(result.move)
+    finally:
+        for engine in engines.values():
+            engine.close()
+        if opening_book is not None:
+            opening_book.close()
+
+    winner = game.calculate_winner()
+    return {
+        'game': game_number,
+        'board': [match.board_height, match.board_width],
+        'player': player._asdict(),
+        'computer': computer._asdict(),
+        'winner': None if winner is None else SIDE_NAMES[winner],
+        'pastures': {
+            'player': game.get_amount_of_pastures_occupied_by_player(),
+            'computer': game.get_amount_of_pastures_occupied_by_computer(),
+        },
+        'largest_herds': {
+            'player': game.get_players_largest_herd(),
+            'computer': game.get_computers_largest_herd(),
+        },
+        'duration': time.perf_counter() - start_time,
+        'moves': moves,
+    }
+
+
+def _get_first_side(game_number: int) -> int:
+    """Palauttaa ensimmäisten asetusten ottelijan. Aloittaja vaihtuu joka pelissä."""
+    return PLAYER if game_number % 2 == 0 else COMPUTER
+
+
+def _get_sides(game_number: int, first: EngineSettings, second: EngineSettings
+               ) -> Tuple[EngineSettings, EngineSettings]:
+    """Palauttaa pelaajan ja tekoälyn asetukset"""
+    if _get_first_side(game_number) == PLAYER:
+        return first, second
+    return second, first
+
+
+def run_games(games: int, first: EngineSettings, second: EngineSettings, output: IO[str],
+              workers: int = 1, match: MatchSettings = MatchSettings()) -> None:
+    """Pelaa annetun määrän pelejä ja kirjoittaa kustakin rivin JSON-muodossa heti,
+    kun peli on valmis. Useammalla työprosessilla pelit pelataan rinnakkain."""
+    arguments = [(game_number, *_get_sides(game_number, first, second), match)
+                 for game_number in range(games)]
+    if workers == 1:
+        for game_arguments in arguments:
+            _write_record(output, play_game(*game_arguments))
+        return
+
+    # Prosessit käynnistetään puhtaalta pöydältä kuten rinnakkaisessa haussa
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context) as executor:
+        futures = [executor.submit(play_game, *game_arguments) for game_arguments in arguments]
+        for future in as_completed(futures):
+            _write_record(output, future.result())
+
+
+def _write_record(output: IO[str], record: Dict[str, Any]) -> None:
+    """Kirjoittaa pelin tuloksen yhdeksi riviksi. Tulokseen lisätään, kumpi ottelija
+    pelasi ensimmäisillä asetuksilla."""
+    record['first'] = SIDE_NAMES[_get_first_side(record['game'])]
+    output.write(json.dumps(record, ensure_ascii=False) + '\n')
+    output.flush()
+
+
+def _add_engine_arguments(parser: argparse.ArgumentParser, prefix: str, name: str) -> None:
+    """Lisää yhden tekoälyn asetusten valitsimet"""
+    parser.add_argument(f'--{prefix}-engine', choices=sorted(ENGINES), default=name)
+    parser.add_argument(f'--{prefix}-time-limit', type=float)
+    parser.add_argument(f'--{prefix}-depth', type=int)
+    parser.add_argument(f'--{prefix}-split-policy', default=SPLIT_POLICY)
+    parser.add_argument(f'--{prefix}-endgame', type=int, default=ENDGAME_FREE_PASTURES,
+                        help='loppupelin ratkaisun vapaiden laidunten raja, 0 ei ratkaise')
+
+
+def _get_engine_settings(arguments: argparse.Namespace, prefix: str) -> EngineSettings:
+    """Palauttaa valitsimien mukaiset tekoälyn asetukset"""
+    time_limit = getattr(arguments, f'{prefix}_time_limit')
+    max_depth = getattr(arguments, f'{prefix}_depth')
+    if time_limit is None:
+        # Syvyysrajalla haku on toistettava, joten aikarajaa ei tarvita
+        time_limit = arguments.time_limit if max_depth is None else None
+    endgame_threshold = getattr(arguments, f'{prefix}_endgame')
+    return EngineSettings(getattr(arguments, f'{prefix}_engine'), time_limit, max_depth,
+                          getattr(arguments, f'{prefix}_split_policy'),
+                          endgame_threshold if endgame_threshold > 0 else None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Tekoälyjen väliset pelit ilman käyttöliittymää')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--time-limit', type=float, default=SIMULATED_PLAYER_TIME_LIMIT,
+                        help='siirtokohtainen aikaraja, ellei tekoälylle ole annettu omaa')
+    parser.add_argument('--height', type=int, default=BOARD_HEIGHT)
+    parser.add_argument('--width', type=int, default=BOARD_WIDTH)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-book', action='store_true', help='ei avauskirjaa')
+    parser.add_argument('--output', help='tulostiedosto, oletuksena vakiotuloste')
+    parser.add_argument('--append', action='store_true',
+                        help='lisää tulokset tulostiedoston loppuun sen korvaamisen sijaan')
+    _add_engine_arguments(parser, 'first', 'minimax')
+    _add_engine_arguments(parser, 'second', 'minimax')
+    arguments = parser.parse_args()
+
+    first = _get_engine_settings(arguments, 'first')
+    second = _get_engine_settings(arguments, 'second')
+    match = MatchSettings(arguments.height, arguments.width, not arguments.no_book,
+                          arguments.seed)
+    mode = 'a' if arguments.append else 'w'
+    with (open(arguments.output, mode, encoding='utf-8') if arguments.output
+          else contextlib.nullcontext(sys.stdout)) as output:
+        run_games(arguments.games, first, second, output, arguments.workers, match)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+from functools import cache
+from typing import TYPE_CHECKING, List, Tuple
+from topology import Coordinates, Topology
+
+if TYPE_CHECKING:
+    from game import Move
+
+# Symmetria kertoo jokaisen laitumen indeksille sen kuvan indeksin
+Symmetry = Tuple[int, ...]
+
+
+def _rotate(coordinates: Coordinates) -> Coordinates:
+    """Kiertää aksiaalisia koordinaatteja 60 astetta origon ympäri"""
+    q, r = coordinates
+    return (-r, q + r)
+
+
+def _reflect(coordinates: Coordinates) -> Coordinates:
+    """Peilaa aksiaaliset koordinaatit origon kautta kulkevan akselin suhteen"""
+    q, r = coordinates
+    return (r, q)
+
+
+def _get_point_transforms() -> List[List[Coordinates]]:
+    """Palauttaa kuusikulmioruudukon kaksitoista kierto- ja peilauskuvausta
+    yksikkövektoreiden (1, 0) ja (0, 1) kuvina"""
+    transforms: List[List[Coordinates]] = []
+    for is_reflected in (False, True):
+        basis = [(1, 0), (0, 1)]
+        if is_reflected:
+            basis = [_reflect(vector) for vector in basis]
+        for _ in range(6):
+            transforms.append(basis)
+            basis = [_rotate(vector) for vector in basis]
+    return transforms
+
+
+@cache
+def get_symmetries(topology: Topology) -> Tuple[Symmetry, ...]:
+    """Palauttaa laudan symmetriat laitumien indeksien permutaatioina. Ensimmäinen
+    on aina identiteetti. Symmetriat lasketaan kerran kutakin laudan rakennetta kohden."""
+    positions = set(topology.coordinates)
+    indices = {coordinates: index for index, coordinates in enumerate(topology.coordinates)}
+    symmetries: List[Symmetry] = []
+    for (q_image, r_image) in _get_point_transforms():
+        transformed = [(q * q_image[0] + r * r_image[0], q * q_image[1] + r * r_image[1])
+                       for q, r in topology.coordinates]
+        # Kuvattu lauta siirretään alkuperäisen päälle pienimmän koordinaatin kohdalta
+        offset_q, offset_r = (a - b for a, b in zip(min(positions), min(transformed)))
+        translated = [(q + offset_q, r + offset_r) for q, r in transformed]
+        if set(translated) != positions:
+            continue
+        symmetry = tuple(indices[coordinates] for coordinates in translated)
+        if symmetry not in symmetries:
+            symmetries.append(symmetry)
+    return tuple(symmetries)
+
+
+@cache
+def get_inverse(symmetry: Symmetry) -> Symmetry:
+    """Palauttaa symmetrian käänteiskuvauksen"""
+    inverse = [0] * len(symmetry)
+    for index, image in enumerate(symmetry):
+        inverse[image] = index
+    return tuple(inverse)
+
+
+def transform_move(move: Move, symmetry: Symmetry) -> Move:
+    """Palauttaa siirron kuvan symmetriassa. Symmetria säilyttää säteet, joten
+    sallitun siirron kuva on sallittu siirto kuvatussa tilanteessa."""
+    if move.target is None:
+        return move._replace(source=symmetry[move.source])
+    return move._replace(source=symmetry[move.source], target=symmetry[move.target])
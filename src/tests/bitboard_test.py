@@ -0,0 +1,92 @@
+import random
+import unittest
+from bitboard import BitBoardGame, get_shift_tables, iterate_bits, shift
+from constants import PLAYER
+from game import Game
+from minimax import generate_moves
+from utils import get_topology
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+RANDOM_SEED = 1234
+
+
+class TestBitBoard(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.bitboard_game = BitBoardGame(
+            BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.random = random.Random(RANDOM_SEED)
+
+    # Apumetodit
+
+    def play_same_random_move(self) -> bool:
+        possible_moves = generate_moves(self.game)
+        if len(possible_moves) == 0:
+            return False
+        move = self.random.choice(possible_moves)
+        self.game.make_move(move)
+        self.bitboard_game.make_move(move)
+        return True
+
+    def assert_games_are_equal(self) -> None:
+        self.assertEqual(self.bitboard_game.hash, self.game.hash)
+        self.assertEqual(generate_moves(self.bitboard_game),
+                         generate_moves(self.game))
+        self.assertEqual(self.bitboard_game.evaluate_game_state(),
+                         self.game.evaluate_game_state())
+        self.assertEqual(self.bitboard_game.is_over_for_player(),
+                         self.game.is_over_for_player())
+        self.assertEqual(self.bitboard_game.is_over_for_computer(),
+                         self.game.is_over_for_computer())
+        self.assertEqual(self.bitboard_game.get_players_largest_herd(),
+                         self.game.get_players_largest_herd())
+        self.assertEqual(self.bitboard_game.get_computers_largest_herd(),
+                         self.game.get_computers_largest_herd())
+
+    # Testit
+
+    def test_shift_follows_first_step_of_each_ray(self):
+        topology = get_topology(BOARD_HEIGHT, BOARD_WIDTH)
+        tables = get_shift_tables(topology)
+        for index, rays in enumerate(topology.rays):
+            for direction, ray in enumerate(rays):
+                shifted = list(iterate_bits(shift(1 << index, tables.forward[direction])))
+                self.assertEqual(shifted, list(ray[:1]))
+
+    def test_backward_shift_reverses_forward_shift(self):
+        tables = get_shift_tables(get_topology(BOARD_HEIGHT, BOARD_WIDTH))
+        for forward, backward in zip(tables.forward, tables.backward):
+            for index in range(BOARD_HEIGHT * BOARD_WIDTH):
+                shifted = shift(1 << index, forward)
+                if shifted:
+                    self.assertEqual(shift(shifted, backward), 1 << index)
+
+    def test_backends_agree_during_random_games(self):
+        for seed in range(3):
+            self.setUp()
+            self.random.seed(seed)
+            self.assert_games_are_equal()
+            while self.play_same_random_move():
+                self.assert_games_are_equal()
+
+    def test_undo_restores_masks(self):
+        self.play_same_random_move()
+        self.play_same_random_move()
+        board = self.bitboard_game.board
+        masks = (board.free, list(board.occupied), board.stacks, list(board.sheep))
+        move = generate_moves(self.bitboard_game)[0]
+        self.bitboard_game.make_move(move)
+        self.bitboard_game.undo_move(move)
+        self.assertEqual((board.free, list(board.occupied), board.stacks, list(board.sheep)),
+                         masks)
+
+    def test_pasture_changes_are_stored_in_bitboard(self):
+        pasture = self.bitboard_game.pastures[5]
+        pasture.occupy(PLAYER, 3)
+        self.assertEqual(self.bitboard_game.board.get_occupier(5), PLAYER)
+        self.assertEqual(self.bitboard_game.board.sheep[5], 3)
+        pasture.set_sheep(1)
+        self.assertFalse(self.bitboard_game.board.stacks >> 5 & 1)
+        pasture.reset()
+        self.assertTrue(self.bitboard_game.board.free >> 5 & 1)
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from typing import Dict
+from book import (
+    BookEntry,
+    OpeningBook,
+    _add_book_entry,
+    build_opening_book,
+    load_opening_book,
+    write_opening_book
+)
+from engine import Engine
+from game import Game
+from minimax import SearchOptions, generate_moves, is_legal_move
+from symmetry import get_symmetries, transform_move
+from transposition import TranspositionTable
+from utils import get_topology
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+BOOK_DEPTH = 2
+
+
+class TestOpeningBook(unittest.TestCase):
+    directory: tempfile.TemporaryDirectory
+    path: str
+    entries: Dict[int, BookEntry]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'opening.bin')
+        cls.entries = build_opening_book(BOARD_HEIGHT, BOARD_WIDTH, BOOK_DEPTH)
+        write_opening_book(cls.path, BOARD_HEIGHT, BOARD_WIDTH, cls.entries)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.directory.cleanup()
+
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.book = OpeningBook(self.path)
+
+    def tearDown(self) -> None:
+        self.book.close()
+
+    # Testit
+
+    def test_book_covers_every_initial_placement_position(self):
+        self.assertEqual(len(self.book), len(self.entries))
+        entry = self.book.lookup(self.game)
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.depth, BOOK_DEPTH)
+
+        for first_move in generate_moves(self.game):
+            self.game.make_move(first_move)
+            entry = self.book.lookup(self.game)
+            self.assertIsNotNone(entry)
+            self.assertTrue(is_legal_move(self.game, entry.move))
+            self.game.undo_move(first_move)
+
+    def test_mirrored_position_gets_mirrored_move(self):
+        symmetry = get_symmetries(get_topology(BOARD_HEIGHT, BOARD_WIDTH))[1]
+        first_move = generate_moves(self.game)[0]
+        self.game.make_move(first_move)
+        mirrored_game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        mirrored_game.make_move(transform_move(first_move, symmetry))
+
+        self.assertEqual(self.book.lookup(mirrored_game).move,
+                         transform_move(self.book.lookup(self.game).move, symmetry))
+
+    def test_positions_outside_the_book_are_not_found(self):
+        for _ in range(2):
+            self.game.make_move(generate_moves(self.game)[0])
+        self.assertIsNone(self.book.lookup(self.game))
+        self.assertIsNone(self.book.lookup(Game(BOARD_WIDTH, BOARD_HEIGHT, False)))
+
+    def test_engine_plays_opening_moves_from_book(self):
+        engine = Engine(SearchOptions(max_depth=BOOK_DEPTH), opening_book=self.book)
+        result = engine.choose_move(self.game)
+        self.assertEqual(result.move, self.book.lookup(self.game).move)
+        self.assertEqual(result.nodes, 0)
+        self.assertEqual(result.statistics, {'book': 1})
+
+    def test_position_without_moves_is_not_added(self):
+        game = Game(2, 2, is_simulation=False)
+        while not game.is_over():
+            game.make_move(generate_moves(game)[0])
+        entries = {}
+        _add_book_entry(game, TranspositionTable(1), BOOK_DEPTH, entries, False)
+        self.assertEqual(entries, {})
+
+    def test_shipped_book_matches_current_hashes(self):
+        book = load_opening_book(BOARD_HEIGHT, BOARD_WIDTH)
+        self.assertIsNotNone(book)
+        for first_move in generate_moves(self.game):
+            self.game.make_move(first_move)
+            self.assertTrue(is_legal_move(self.game, book.lookup(self.game).move))
+            self.game.undo_move(first_move)
+        book.close()
+
+    def test_invalid_file_is_rejected(self):
+        path = os.path.join(self.directory.name, 'invalid.bin')
+        with open(path, 'wb') as file:
+            file.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            OpeningBook(path)
@@ -0,0 +1,93 @@
+import unittest
+from constants import ALPHA, BETA
+from endgame import EndgameSolver
+from engine import Engine
+from game import Game
+from minimax import SearchContext, SearchOptions, is_legal_move, minimax
+from symmetry import get_symmetries, transform_move
+from utils import get_topology
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+FREE_PASTURES = 10
+
+
+class TestEndgameSolver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.solver = EndgameSolver(FREE_PASTURES)
+
+    # Apumetodit
+
+    def play_until_free_pastures(self, game: Game, free_pastures: int,
+                                 mirrored_game: Game | None = None) -> None:
+        """Pelaa kummallekin ottelijalle matalan haun siirtoja, ja peilattuun peliin
+        samat siirrot peilattuina"""
+        symmetry = get_symmetries(get_topology(BOARD_HEIGHT, BOARD_WIDTH))[1]
+        while game.get_amount_of_free_pastures() > free_pastures and not game.is_over():
+            _, move = minimax(game, 1, ALPHA, BETA, game.is_players_turn)
+            if move is None:
+                raise SystemError('No next move found')
+            game.make_move(move)
+            if mirrored_game is not None:
+                mirrored_game.make_move(transform_move(move, symmetry))
+
+    # Testit
+
+    def test_solver_only_handles_positions_below_threshold(self):
+        self.assertFalse(self.solver.is_solvable(self.game))
+        self.play_until_free_pastures(self.game, FREE_PASTURES + 1)
+        self.assertFalse(self.solver.is_solvable(self.game))
+        self.play_until_free_pastures(self.game, FREE_PASTURES)
+        self.assertTrue(self.solver.is_solvable(self.game))
+
+    def test_solver_agrees_with_full_depth_minimax(self):
+        self.play_until_free_pastures(self.game, 6)
+        max_player = self.game.is_players_turn
+        value, move = self.solver.solve(self.game)
+        expected, _ = minimax(self.game, self.game.get_amount_of_free_pastures(),
+                              ALPHA, BETA, max_player)
+        self.assertEqual(value, expected)
+        self.assertTrue(is_legal_move(self.game, move))
+
+        self.game.make_move(move)
+        self.assertEqual(self.solver.solve(self.game)[0], value)
+
+    def test_solved_positions_are_reused(self):
+        self.play_until_free_pastures(self.game, FREE_PASTURES)
+        context = SearchContext()
+        value, _ = self.solver.solve(self.game, context)
+        nodes = context.nodes
+
+        context = SearchContext()
+        self.assertEqual(self.solver.solve(self.game, context)[0], value)
+        self.assertLess(context.nodes, nodes)
+        self.assertGreater(self.solver.hits, 0)
+
+    def test_mirrored_position_gets_mirrored_move(self):
+        symmetry = get_symmetries(get_topology(BOARD_HEIGHT, BOARD_WIDTH))[1]
+        mirrored_game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.play_until_free_pastures(self.game, FREE_PASTURES, mirrored_game)
+
+        value, move = self.solver.solve(self.game)
+        mirrored_value, mirrored_move = self.solver.solve(mirrored_game)
+        self.assertEqual(mirrored_value, value)
+        self.assertEqual(mirrored_move, transform_move(move, symmetry))
+
+    def test_search_returns_exact_value_near_the_end(self):
+        self.play_until_free_pastures(self.game, FREE_PASTURES + 1)
+        max_player = self.game.is_players_turn
+        solved_value, _ = EndgameSolver(FREE_PASTURES + 1).solve(self.game)
+
+        context = SearchContext(endgame_solver=self.solver)
+        value, move = minimax(self.game, 2, ALPHA, BETA, max_player, context)
+        self.assertEqual(value, solved_value)
+        self.assertTrue(is_legal_move(self.game, move))
+
+    def test_engine_uses_solver_below_threshold(self):
+        self.play_until_free_pastures(self.game, FREE_PASTURES + 1)
+        engine = Engine(SearchOptions(
+            max_depth=2, endgame_solver=EndgameSolver(FREE_PASTURES)))
+        result = engine.choose_move(self.game)
+        self.assertIn(abs(result.value), (0, float('inf')))
+        self.assertTrue(is_legal_move(self.game, result.move))
@@ -1,10 +1,14 @@
 from typing import Tuple
+import random
 import unittest
 from constants import (
     COMPUTER,
     PLAYER
 )
-from game import Game
+from bitboard import BitBoardGame
+from game import Game, Move
+from minimax import generate_moves
+from numpy_board import NumpyGame, np
 from pasture import Pasture
 
 BOARD_HEIGHT = 4
@@ -14,6 +18,7 @@ BOARD_WIDTH = 8
 class TestGame(unittest.TestCase):
     def setUp(self) -> None:
         self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.game.check_incremental_state = True
 
     # Apumetodit
 
@@ -54,14 +59,14 @@ class TestGame(unittest.TestCase):
     def win_game_by_player(self):
         players_initial_pasture = self.play_initial_turn()
         computers_initial_pasture = self.play_initial_turn()
-        players_initial_pasture.sheep = 1
+        players_initial_pasture.set_sheep(1)
 
         self.occupy_neighbours(computers_initial_pasture, PLAYER, 1)
 
     def win_game_by_computer(self):
         players_initial_pasture = self.play_initial_turn()
         computers_initial_pasture = self.play_initial_turn()
-        computers_initial_pasture.sheep = 1
+        computers_initial_pasture.set_sheep(1)
 
         self.occupy_neighbours(players_initial_pasture, COMPUTER, 1)
 
@@ -258,16 +263,112 @@ class TestGame(unittest.TestCase):
         self.assertEqual(target.get_amount_of_sheep(), 0)
         self.assertEqual(self.game.get_number_of_turn(), 3)
 
+    def test_move_descriptor_can_be_made_and_undone(self):
+        source = self.play_initial_turn()
+        self.play_initial_turn()
+        target = source.get_any_potential_target(self.game.pastures)
+        move = Move(source.index, target.index, 3)
+
+        self.game.make_move(move)
+        self.assertEqual(source.get_amount_of_sheep(),
+                         self.game.initial_sheep - 3)
+        self.assertEqual(target.get_amount_of_sheep(), 3)
+        self.assertTrue(target.is_occupied_by_player())
+        self.assertFalse(self.game.is_players_turn)
+
+        self.game.undo_move(move)
+        self.assertEqual(source.get_amount_of_sheep(), self.game.initial_sheep)
+        self.assertTrue(target.is_free())
+        self.assertTrue(self.game.is_players_turn)
+
+    def test_undo_restores_turn_even_if_move_ended_opponents_game(self):
+        # Tekoälyn kulmalaitumella on naapureina vain laitumet 1 ja 8
+        self.game.make_initial_turn(self.game.pastures[16])
+        self.game.make_initial_turn(self.game.pastures[0])
+        self.game.pastures[1].occupy(PLAYER, 1)
+        self.assertFalse(self.game.is_over_for_computer())
+
+        # Pelaaja tukkii tekoälyn viimeisen suunnan, joten vuoro ei vaihdu
+        move = Move(16, 8, 1)
+        self.game.make_move(move)
+        self.assertTrue(self.game.is_over_for_computer())
+        self.assertTrue(self.game.is_players_turn)
+
+        self.game.undo_move(move)
+        self.assertFalse(self.game.is_over_for_computer())
+        self.assertTrue(self.game.is_players_turn)
+
+    def test_hash_is_updated_incrementally_by_moves(self):
+        initial_hash = self.game.hash
+        source = self.play_initial_turn()
+        computers_pasture = self.play_initial_turn()
+        self.assertEqual(self.game.hash, self.game.compute_hash())
+
+        target = source.get_any_potential_target(self.game.pastures)
+        move = Move(source.index, target.index, 5)
+        hash_before_move = self.game.hash
+        self.game.make_move(move)
+        self.assertNotEqual(self.game.hash, hash_before_move)
+        self.assertEqual(self.game.hash, self.game.compute_hash())
+
+        self.game.undo_move(move)
+        self.assertEqual(self.game.hash, hash_before_move)
+        self.assertEqual(self.game.hash, self.game.compute_hash())
+
+        self.game.undo_move(Move(computers_pasture.index))
+        self.game.undo_move(Move(source.index))
+        self.assertEqual(self.game.hash, initial_hash)
+
+    def test_hashes_follow_direct_pasture_changes(self):
+        for game in (self.game, BitBoardGame(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False),
+                     NumpyGame(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)):
+            pasture, other_pasture = game.pastures[0], game.pastures[9]
+            pasture.occupy(PLAYER, 10)
+            other_pasture.occupy(COMPUTER, 3)
+            pasture.set_sheep(4)
+            self.assertEqual(game.hash, game.compute_hash())
+            self.assertEqual(game.get_canonical_hash()[0],
+                             min(game.compute_hash(symmetry) for symmetry in game._symmetries))
+
+            pasture.reset()
+            other_pasture.reset()
+            self.assertEqual(game.hash, game.compute_hash())
+            self.assertEqual(game.hash, Game(BOARD_HEIGHT, BOARD_WIDTH, False).hash)
+
+    def test_hash_depends_on_player_in_turn(self):
+        hash_on_players_turn = self.game.hash
+        self.game.is_players_turn = False
+        self.assertNotEqual(self.game.hash, hash_on_players_turn)
+        self.assertEqual(self.game.hash, self.game.compute_hash())
+
+    def test_transposed_moves_lead_to_same_hash(self):
+        first = self.game.pastures[0]
+        second = self.game.pastures[7]
+        self.game.make_move(Move(first.index))
+        self.game.make_move(Move(second.index))
+        hash_after_moves = self.game.hash
+
+        other_game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        other_game.make_move(Move(first.index))
+        other_game.make_move(Move(second.index))
+        self.assertEqual(other_game.hash, hash_after_moves)
+
+        # Samat laitumet eri ottelijoilla tuottavat eri tiivisteen
+        other_game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        other_game.make_move(Move(second.index))
+        other_game.make_move(Move(first.index))
+        self.assertNotEqual(other_game.hash, hash_after_moves)
+
     def test_game_is_over_if_no_more_sheep_left_to_move(self):
         players_initial_pasture = self.play_initial_turn()
         computers_initial_pasture = self.play_initial_turn()
-        players_initial_pasture.sheep = 1
+        players_initial_pasture.set_sheep(1)
 
         self.assertTrue(self.game.is_over_for_player())
         self.assertFalse(self.game.is_over_for_computer())
         self.assertFalse(self.game.is_over())
 
-        computers_initial_pasture.sheep = 1
+        computers_initial_pasture.set_sheep(1)
         self.assertTrue(self.game.is_over_for_computer())
         self.assertTrue(self.game.is_over())
 
@@ -297,7 +398,7 @@ class TestGame(unittest.TestCase):
         self.play_initial_turn()
         self.game.next_turn()
         self.assertFalse(self.game.is_players_turn)
-        players_pasture.sheep = 1
+        players_pasture.set_sheep(1)
 
         self.game.next_turn()
         self.assertFalse(self.game.is_players_turn)
@@ -310,7 +411,7 @@ class TestGame(unittest.TestCase):
         self.play_initial_turn()
         computers_pasture = self.play_initial_turn()
         self.assertTrue(self.game.is_players_turn)
-        computers_pasture.sheep = 1
+        computers_pasture.set_sheep(1)
 
         self.game.next_turn()
         self.assertTrue(self.game.is_players_turn)
@@ -329,8 +430,8 @@ class TestGame(unittest.TestCase):
         computers_pasture = self.play_initial_turn()
 
         # Tehdään vuorosta pelin viimeinen
-        players_pasture.sheep = 2
-        computers_pasture.sheep = 1
+        players_pasture.set_sheep(2)
+        computers_pasture.set_sheep(1)
         self.assertFalse(self.game.is_over_for_player())
         self.assertTrue(self.game.is_over_for_computer())
 
@@ -357,8 +458,8 @@ class TestGame(unittest.TestCase):
         self.game.next_turn()
 
         # Tehdään vuorosta pelin viimeinen
-        players_pasture.sheep = 1
-        computers_pasture.sheep = 2
+        players_pasture.set_sheep(1)
+        computers_pasture.set_sheep(2)
         self.assertTrue(self.game.is_over_for_player())
         self.assertFalse(self.game.is_over_for_computer())
 
@@ -408,6 +509,19 @@ class TestGame(unittest.TestCase):
         self.assertGreaterEqual(self.game.get_computers_largest_herd(), 2)
         self.assertEqual(self.game.calculate_who_has_largest_herd(), COMPUTER)
 
+    def test_largest_herd_counts_whole_connected_area(self):
+        for pasture in self.game.pastures:
+            pasture.occupy(PLAYER, 1)
+        self.assertEqual(self.game.get_players_largest_herd(), BOARD_HEIGHT * BOARD_WIDTH)
+
+        # Tekoälyn laitumet jakavat pelaajan alueen kahtia toisen sarakkeen kohdalta
+        for pasture in self.game.pastures[1::BOARD_WIDTH]:
+            pasture.reset()
+            pasture.occupy(COMPUTER, 1)
+        self.assertEqual(self.game.get_players_largest_herd(),
+                         BOARD_HEIGHT * (BOARD_WIDTH - 2))
+        self.assertEqual(self.game.get_computers_largest_herd(), BOARD_HEIGHT)
+
     def test_pasture_value_is_calculated_correctly_for_players_pasture(self):
         pasture = self.get_free_edge_pasture()
         self.assertEqual(pasture.get_value(self.game.pastures), 0)
@@ -460,3 +574,106 @@ class TestGame(unittest.TestCase):
 
         self.assertEqual(self.game.evaluate_game_state(),
                          9 * amount_of_players_targets - 4 * amount_of_computers_targets)
+
+
+class TestIncrementalEvaluation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.random = random.Random(1)
+
+    # Apumetodit
+
+    def play_random_move(self) -> Move | None:
+        possible_moves = generate_moves(self.game)
+        if len(possible_moves) == 0:
+            return None
+        move = self.random.choice(possible_moves)
+        self.game.make_move(move)
+        return move
+
+    # Testit
+
+    def test_running_score_equals_full_evaluation_during_make_and_undo(self):
+        played_moves = []
+        while (move := self.play_random_move()) is not None:
+            played_moves.append(move)
+            self.assertEqual(self.game._score, self.game._compute_full_evaluation())
+
+        for move in reversed(played_moves):
+            self.game.undo_move(move)
+            self.assertEqual(self.game._score, self.game._compute_full_evaluation())
+        self.assertEqual(self.game._score, 0)
+
+    def test_direct_pasture_changes_update_running_score(self):
+        pasture = self.game.get_potential_initial_pastures()[0]
+        pasture.occupy(PLAYER, 10)
+        pasture.set_sheep(4)
+        neighbour = pasture.get_free_neighbours(self.game.pastures)[0]
+        neighbour.occupy(COMPUTER, 3)
+        self.assertEqual(self.game._score, self.game._compute_full_evaluation())
+
+        neighbour.reset()
+        pasture.reset()
+        self.assertEqual(self.game._score, 0)
+
+    def test_movable_counts_follow_make_and_undo(self):
+        played_moves = []
+        while (move := self.play_random_move()) is not None:
+            played_moves.append(move)
+            for occupier in (PLAYER, COMPUTER):
+                movable = [pasture for pasture in self.game.pastures
+                           if pasture.occupier == occupier
+                           and pasture.are_any_potential_targets(self.game.pastures)]
+                self.assertEqual(self.game._movable_counts[occupier], len(movable))
+        self.assertTrue(self.game.is_over())
+
+        for move in reversed(played_moves):
+            self.game.undo_move(move)
+        self.assertEqual(self.game._movable_counts, [0, 0])
+
+    def test_game_is_over_for_player_when_last_stack_is_surrounded(self):
+        players_pasture = self.game.get_potential_initial_pastures()[0]
+        players_pasture.occupy(PLAYER, 2)
+        computers_pasture = self.game.get_potential_initial_pastures()[-1]
+        computers_pasture.occupy(COMPUTER, 2)
+        self.game._turn = 3
+
+        self.assertFalse(self.game.is_over_for_player())
+        for neighbour in players_pasture.get_free_neighbours(self.game.pastures):
+            neighbour.occupy(COMPUTER, 1)
+        self.assertTrue(self.game.is_over_for_player())
+        self.assertFalse(self.game.is_over_for_computer())
+
+    def test_corrupted_movable_count_is_detected_when_checking_is_enabled(self):
+        self.play_random_move()
+        self.play_random_move()
+        self.game._movable_counts[PLAYER] = 0
+        self.game.is_over_for_player()
+
+        self.game.check_incremental_state = True
+        with self.assertRaises(SystemError):
+            self.game.is_over_for_player()
+
+    def test_corrupted_running_score_is_detected_when_checking_is_enabled(self):
+        self.play_random_move()
+        self.game._score += 1
+        self.game.evaluate_game_state()
+
+        self.game.check_incremental_state = True
+        with self.assertRaises(SystemError):
+            self.game.evaluate_game_state()
+
+
+class TestGameOnBitBoard(TestGame):
+    """Samat testit bittikarttaan talletetulla pelilaudalla"""
+
+    def setUp(self) -> None:
+        self.game = BitBoardGame(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class TestGameOnNumpyBoard(TestGame):
+    """Samat testit NumPy-taulukoihin talletetulla pelilaudalla"""
+
+    def setUp(self) -> None:
+        self.game = NumpyGame(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
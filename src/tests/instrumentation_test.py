@@ -0,0 +1,97 @@
+import json
+import unittest
+from constants import ALPHA, BETA
+from endgame import EndgameSolver
+from engine import Engine
+from game import Game
+from instrumentation import SearchInstrumentation, get_cutoffs_per_ply, log_search
+from minimax import SearchContext, SearchOptions, iterative_deepening, minimax
+from transposition import TranspositionTable
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+SEARCH_DEPTH = 3
+
+
+class TestSearchInstrumentation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.play_game_for_turns(4)
+
+    # Apumetodit
+
+    def play_game_for_turns(self, turns: int) -> None:
+        for _ in range(turns):
+            _, move = minimax(self.game, 1, ALPHA, BETA, self.game.is_players_turn)
+            if move is None:
+                raise SystemError('No next move found')
+            self.game.make_move(move)
+
+    def search(self, instrumentation: SearchInstrumentation | None = None):
+        return iterative_deepening(self.game, self.game.is_players_turn,
+                                   SearchOptions(max_depth=SEARCH_DEPTH), TranspositionTable(1),
+                                   instrumentation=instrumentation)
+
+    # Testit
+
+    def test_instrumentation_does_not_change_search(self):
+        result = self.search()
+        instrumented_result = self.search(SearchInstrumentation())
+        self.assertEqual(instrumented_result.value, result.value)
+        self.assertEqual(instrumented_result.move, result.move)
+        self.assertEqual(instrumented_result.nodes, result.nodes)
+        self.assertNotIn('leaf_evaluations', result.statistics)
+
+    def test_statistics_are_collected(self):
+        instrumentation = SearchInstrumentation()
+        result = self.search(instrumentation)
+        statistics = result.statistics
+        self.assertGreater(statistics['leaf_evaluations'], 0)
+        self.assertLessEqual(statistics['leaf_evaluations'], result.nodes)
+        self.assertGreater(statistics['move_generation_time'], 0)
+        self.assertGreater(statistics['evaluation_time'], 0)
+        self.assertGreater(instrumentation.table_probes, 0)
+        self.assertTrue(0 <= statistics['table_hit_rate'] <= 1)
+        self.assertEqual(len(instrumentation.iteration_nodes), SEARCH_DEPTH)
+        self.assertEqual(instrumentation.iteration_nodes[-1], result.nodes)
+
+    def test_cutoffs_are_recorded_per_ply(self):
+        result = self.search(SearchInstrumentation())
+        cutoffs = get_cutoffs_per_ply(result.statistics)
+        self.assertEqual(sum(cutoffs), result.statistics['cutoffs'])
+        self.assertLessEqual(len(cutoffs), SEARCH_DEPTH)
+
+    def test_effective_branching_factor_compares_last_iterations(self):
+        instrumentation = SearchInstrumentation()
+        self.assertEqual(instrumentation.get_effective_branching_factor(), 0)
+        instrumentation.record_iteration(11)
+        self.assertEqual(instrumentation.get_effective_branching_factor(), 10)
+        instrumentation.record_iteration(61)
+        self.assertEqual(instrumentation.get_effective_branching_factor(), 50 / 11)
+        instrumentation.record_iteration(261)
+        self.assertEqual(instrumentation.get_effective_branching_factor(), 4)
+
+    def test_solver_cache_probes_are_recorded(self):
+        self.play_game_for_turns(16)
+        instrumentation = SearchInstrumentation()
+        solver = EndgameSolver(12)
+        solver.solve(self.game, SearchContext(instrumentation=instrumentation))
+        self.assertGreater(instrumentation.solver_hits, 0)
+        self.assertGreater(instrumentation.solver_probes, instrumentation.solver_hits)
+        self.assertEqual(instrumentation.solver_hits, solver.hits)
+
+    def test_search_is_logged_as_json(self):
+        with self.assertLogs('instrumentation', 'INFO') as logs:
+            log_search(3, 0.5, float('inf'), None, 2, 100, {'cutoffs': 4})
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record, logs.records[0].search)
+        self.assertEqual(record['value'], 'inf')
+        self.assertEqual(record['nodes_per_second'], 200)
+        self.assertEqual(record['cutoffs'], 4)
+
+    def test_engine_collects_statistics_on_request(self):
+        engine = Engine(SearchOptions(max_depth=2), collect_statistics=True)
+        with self.assertLogs('instrumentation', 'INFO'):
+            result = engine.choose_move(self.game)
+        self.assertIn('effective_branching_factor', result.statistics)
+        engine.close()
@@ -0,0 +1,108 @@
+import random
+import time
+import unittest
+from constants import ALPHA, BETA
+from endgame import EndgameSolver
+from engine import Engine, create_engine
+from game import Game
+from mcts import DRAW_SCORE, LOSS_SCORE, WIN_SCORE, MctsEngine, PlayoutState
+from minimax import generate_moves, is_legal_move, minimax
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+PLAYOUTS = 200
+
+
+class TestMctsEngine(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.engine = MctsEngine(None, playout_limit=PLAYOUTS, seed=1)
+
+    def tearDown(self) -> None:
+        self.engine.close()
+
+    # Apumetodit
+
+    def play_game_for_turns(self, turns: int) -> None:
+        for _ in range(turns):
+            _, move = minimax(self.game, 1, ALPHA, BETA, self.game.is_players_turn)
+            if move is None:
+                raise SystemError('No next move found')
+            self.game.make_move(move)
+
+    # Testit
+
+    def test_playout_finishes_game_without_changing_it(self):
+        game_hash = self.game.hash
+        for seed in range(10):
+            state = PlayoutState(self.game)
+            score = state.play(random.Random(seed), is_guided=seed % 2 == 0)
+            self.assertIn(score, (WIN_SCORE, DRAW_SCORE, LOSS_SCORE))
+            self.assertEqual(state.initial_turns_left, 0)
+            self.assertEqual(len(state._get_sources(0)) + len(state._get_sources(1)), 0)
+        self.assertEqual(self.game.hash, game_hash)
+
+    def test_playout_score_matches_finished_game(self):
+        while not self.game.is_over():
+            self.game.make_move(generate_moves(self.game)[0])
+        winner = self.game.calculate_winner()
+        expected = {0: WIN_SCORE, 1: LOSS_SCORE, None: DRAW_SCORE}[winner]
+        self.assertEqual(PlayoutState(self.game).play(random.Random(), True), expected)
+
+    def test_engine_chooses_legal_moves_within_playout_limit(self):
+        game_hash = self.game.hash
+        result = self.engine.choose_move(self.game)
+        self.assertEqual(self.game.hash, game_hash)
+        self.assertTrue(is_legal_move(self.game, result.move))
+        self.assertEqual(result.nodes, PLAYOUTS)
+        self.assertLessEqual(abs(result.value), 1)
+
+        self.play_game_for_turns(4)
+        self.assertTrue(is_legal_move(self.game, self.engine.choose_move(self.game).move))
+
+    def test_engine_respects_time_limit(self):
+        engine = MctsEngine(0.2, seed=1)
+        start_time = time.monotonic()
+        result = engine.choose_move(self.game)
+        self.assertLess(time.monotonic() - start_time, 1.0)
+        self.assertGreater(result.statistics['playouts_per_second'], 0)
+
+    def test_tree_is_reused_after_opponents_move(self):
+        self.play_game_for_turns(2)
+        result = self.engine.choose_move(self.game)
+        self.assertEqual(result.statistics['reused_visits'], 0)
+        self.game.make_move(result.move)
+        # Puussa eniten kokeiltu vastaus on varmasti laajennettu
+        chosen_node = self.engine._root.get_most_visited_child()
+        self.game.make_move(chosen_node.get_most_visited_child().move)
+
+        result = self.engine.choose_move(self.game)
+        self.assertGreater(result.statistics['reused_visits'], 0)
+
+    def test_pondering_grows_tree_for_opponents_replies(self):
+        self.play_game_for_turns(2)
+        self.engine.ponder(self.game)
+        time.sleep(0.2)
+        self.engine.stop_pondering()
+        self.game.make_move(generate_moves(self.game)[0])
+
+        result = self.engine.choose_move(self.game)
+        self.assertGreater(result.statistics['reused_visits'], 0)
+
+    def test_engine_keeps_solved_win(self):
+        self.play_game_for_turns(32 - 8)
+        value, _ = EndgameSolver(8).solve(self.game)
+        max_player = self.game.is_players_turn
+        self.assertEqual(value, float('inf') if max_player else float('-inf'))
+
+        move = MctsEngine(None, playout_limit=1000, seed=1).choose_move(self.game).move
+        self.game.make_move(move)
+        self.assertEqual(EndgameSolver(8).solve(self.game)[0], value)
+
+    def test_engines_are_created_by_name(self):
+        self.assertIsInstance(create_engine('minimax', 1.0), Engine)
+        self.assertIsInstance(create_engine('mcts', 1.0), MctsEngine)
+        with self.assertRaises(ValueError):
+            create_engine('unknown', 1.0)
+        with self.assertRaises(ValueError):
+            MctsEngine(None)
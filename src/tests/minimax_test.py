@@ -1,13 +1,37 @@
+import time
 from typing import Tuple
 import unittest
+from unittest.mock import patch
 from constants import (
     ALPHA,
     BETA,
     COMPUTER,
     PLAYER
 )
-from minimax import (get_possible_moves, minimax)
-from game import Game
+from minimax import (
+    CancellationToken,
+    SearchAborted,
+    SearchContext,
+    SearchOptions,
+    ADAPTIVE_SPLIT_PLIES,
+    evaluate_move,
+    generate_moves,
+    generate_ordered_moves,
+    get_adaptive_splits,
+    get_bucketed_splits,
+    get_fixed_splits,
+    get_history_key,
+    get_possible_moves,
+    get_split_policy,
+    iterative_deepening,
+    is_legal_move,
+    minimax,
+    search_with_aspiration_window
+)
+from bitboard import BitBoardGame
+from game import Game, Move
+from numpy_board import NumpyGame, np
+from transposition import TranspositionTable
 
 
 BOARD_HEIGHT = 4
@@ -18,6 +42,7 @@ AMOUNT_OF_PASTURES = BOARD_HEIGHT * BOARD_WIDTH
 class TestMinimax(unittest.TestCase):
     def setUp(self) -> None:
         self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.game.check_incremental_state = True
 
     # Apumetodit
 
@@ -44,25 +69,25 @@ class TestMinimax(unittest.TestCase):
         self.game.is_players_turn = was_players_turn
         return possible_moves
 
-    def get_move_with_highest_value(self, game: Game) -> Tuple[float, Game | None]:
+    def get_move_with_highest_value(self, game: Game) -> Tuple[float, Move | None]:
         possible_moves = get_possible_moves(game, game.is_players_turn)
         highest_value = float('-inf')
-        best_move: Game | None = None
+        best_move: Move | None = None
 
         for move in possible_moves:
-            move_value = move.evaluate_game_state()
+            move_value = evaluate_move(game, move)
             if move_value > highest_value:
                 highest_value = move_value
                 best_move = move
         return highest_value, best_move
 
-    def get_move_with_lowest_value(self, game: Game) -> Tuple[float, Game | None]:
+    def get_move_with_lowest_value(self, game: Game) -> Tuple[float, Move | None]:
         possible_moves = get_possible_moves(game, game.is_players_turn)
         lowest_value = float('inf')
-        best_move: Game | None = None
+        best_move: Move | None = None
 
         for move in possible_moves:
-            move_value = move.evaluate_game_state()
+            move_value = evaluate_move(game, move)
             if move_value < lowest_value:
                 lowest_value = move_value
                 best_move = move
@@ -72,13 +97,13 @@ class TestMinimax(unittest.TestCase):
         possible_next_moves = get_possible_moves(
             self.game, self.game.is_players_turn)
         if len(possible_next_moves) > 0:
-            self.game = possible_next_moves[0]
+            self.game.make_move(possible_next_moves[0])
 
     def make_worst_next_move(self) -> None:
         possible_next_moves = get_possible_moves(
             self.game, self.game.is_players_turn)
         if len(possible_next_moves) > 0:
-            self.game = possible_next_moves[-1]
+            self.game.make_move(possible_next_moves[-1])
 
     def play_game_for_turns(self, turns: int) -> None:
         for _ in range(turns):
@@ -93,14 +118,14 @@ class TestMinimax(unittest.TestCase):
 
     # Minimax
 
-    def get_best_move_using_minimax(self, depth: int, max_player: bool) -> Game | None:
+    def get_best_move_using_minimax(self, depth: int, max_player: bool) -> Move | None:
         _, move = minimax(self.game, depth, ALPHA, BETA, max_player)
         return move
 
     def make_best_move_using_minimax(self, depth: int, max_player: bool) -> None:
         next_move = self.get_best_move_using_minimax(depth, max_player)
         if next_move is not None:
-            self.game = next_move
+            self.game.make_move(next_move)
 
     def play_full_game_using_minimax(self, player_depth: int, computer_depth: int) -> None:
         for _ in range(AMOUNT_OF_PASTURES):
@@ -127,7 +152,7 @@ class TestMinimax(unittest.TestCase):
                     print('arvo on' + str(move_value))
                     return True
                 if move is not None:
-                    self.game = move
+                    self.game.make_move(move)
             else:
                 self.make_best_next_move()
 
@@ -141,21 +166,22 @@ class TestMinimax(unittest.TestCase):
             self.game, self.game.is_players_turn)
         self.assertEqual(len(possible_first_turns), amount_of_edge_pastures)
 
-        first_turn = possible_first_turns[0]
+        self.game.make_move(possible_first_turns[0])
         possible_second_turns = get_possible_moves(
-            first_turn, first_turn.is_players_turn)
+            self.game, self.game.is_players_turn)
         self.assertEqual(len(possible_second_turns),
                          amount_of_edge_pastures - 1)
 
     def test_possible_moves_are_sorted_best_first(self):
         best_value, best_first_move = self.get_move_with_highest_value(
             (self.game))
-        self.assertEqual(best_value, get_possible_moves(self.game, self.game.is_players_turn
-                                                        )[0].evaluate_game_state())
+        self.assertEqual(best_value, evaluate_move(self.game, get_possible_moves(
+            self.game, self.game.is_players_turn)[0]))
 
-        best_value, _ = self.get_move_with_lowest_value(best_first_move)
-        self.assertEqual(best_value, get_possible_moves(best_first_move, best_first_move.is_players_turn
-                                                        )[0].evaluate_game_state())
+        self.game.make_move(best_first_move)
+        best_value, _ = self.get_move_with_lowest_value(self.game)
+        self.assertEqual(best_value, evaluate_move(self.game, get_possible_moves(
+            self.game, self.game.is_players_turn)[0]))
 
     def test_game_value_is_evaluated_correclty(self):
         self.assertEqual(self.game.evaluate_game_state(), 0)
@@ -243,25 +269,288 @@ class TestMinimax(unittest.TestCase):
         self.assertTrue(self.game.is_over_for_computer())
         self.assertTrue(self.game.is_over())
 
+    def test_minimax_does_not_change_the_game_state(self):
+        self.play_game_for_turns(3)
+        pastures = [(p.occupier, p.sheep) for p in self.game.pastures]
+        is_players_turn = self.game.is_players_turn
+        turn = self.game.get_number_of_turn()
+
+        self.get_best_move_using_minimax(3, is_players_turn)
+
+        self.assertEqual([(p.occupier, p.sheep)
+                         for p in self.game.pastures], pastures)
+        self.assertEqual(self.game.is_players_turn, is_players_turn)
+        self.assertEqual(self.game.get_number_of_turn(), turn)
+
+    def test_transposition_table_does_not_change_minimax_value(self):
+        for turns in (0, 2, 3, 6):
+            self.play_game_for_turns(turns)
+            table = TranspositionTable(1)
+            value, _ = minimax(self.game, 3, ALPHA, BETA,
+                               self.game.is_players_turn)
+            value_with_table, move = minimax(self.game, 3, ALPHA, BETA,
+                                             self.game.is_players_turn, SearchContext(table))
+            self.assertEqual(value_with_table, value)
+            self.assertIsNotNone(move)
+            self.assertGreater(table.stores, 0)
+
+    def test_transposition_table_is_used_on_repeated_search(self):
+        self.play_game_for_turns(2)
+        table = TranspositionTable(1)
+        value, move = minimax(self.game, 3, ALPHA, BETA,
+                              self.game.is_players_turn, SearchContext(table))
+        hits = table.hits
+        self.assertEqual(minimax(self.game, 3, ALPHA, BETA,
+                                 self.game.is_players_turn, SearchContext(table)), (value, move))
+        self.assertGreater(table.hits, hits)
+
+    # Siirtojen järjestäminen
+
+    def test_table_move_and_killers_are_generated_first(self):
+        self.play_game_for_turns(2)
+        possible_moves = generate_moves(self.game)
+        table_move, killer = possible_moves[-1], possible_moves[-2]
+        context = SearchContext()
+        context.killers[0] = [killer]
+
+        ordered_moves = list(generate_ordered_moves(
+            self.game, table_move, context))
+        self.assertEqual(ordered_moves[:2], [table_move, killer])
+        self.assertCountEqual(ordered_moves, possible_moves)
+
+    def test_illegal_table_move_and_killers_are_skipped(self):
+        self.play_game_for_turns(2)
+        possible_moves = generate_moves(self.game)
+        illegal_move = Move(possible_moves[0].source,
+                            possible_moves[0].target, 100)
+        context = SearchContext()
+        # Aloitussiirto ei ole sallittu enää alkuvaiheen jälkeen
+        context.killers[0] = [Move(possible_moves[0].source)]
+
+        ordered_moves = list(generate_ordered_moves(
+            self.game, illegal_move, context))
+        self.assertFalse(is_legal_move(self.game, illegal_move))
+        self.assertCountEqual(ordered_moves, possible_moves)
+
+    def test_promising_splits_are_generated_before_the_rest(self):
+        self.play_game_for_turns(2)
+        ordered_moves = list(generate_ordered_moves(
+            self.game, None, SearchContext()))
+        first_move = ordered_moves[0]
+        sheep = self.game.pastures[first_move.source].get_amount_of_sheep()
+        self.assertEqual(first_move.sheep, sheep - 1)
+        self.assertEqual(ordered_moves[1].sheep, sheep // 2)
+        self.assertEqual(ordered_moves[2].sheep, 1)
+
+    def test_moves_are_generated_lazily(self):
+        self.play_game_for_turns(2)
+        # Molemmat jakavat laumansa, jolloin kummallakin on kaksi lähtölaidunta
+        for _ in range(2):
+            possible_moves = generate_moves(self.game)
+            self.game.make_move(possible_moves[len(possible_moves) // 2])
+        sources = self.game.get_potential_pastures_to_choose_this_turn()
+        generator = generate_ordered_moves(self.game, None, SearchContext())
+        pasture_class = type(self.game.pastures[0])
+        with patch.object(pasture_class, 'get_potential_targets', autospec=True,
+                          side_effect=pasture_class.get_potential_targets) as get_targets:
+            next(generator)
+        # Vain ensimmäisen lähtölaitumen kohteet on laskettu
+        self.assertGreater(len(sources), 1)
+        self.assertEqual(get_targets.call_count, 1)
+
+    def test_history_orders_the_remaining_moves(self):
+        self.play_game_for_turns(2)
+        context = SearchContext()
+        remaining_move = next(move for move in generate_moves(self.game)
+                              if move.sheep == 2)
+        context.history[get_history_key(self.game, remaining_move)] = 10
+        ordered_moves = list(generate_ordered_moves(self.game, None, context))
+        promising_moves = [move for move in ordered_moves
+                           if move.sheep in (1, 7, 3)]
+        self.assertEqual(ordered_moves.index(remaining_move),
+                         len(promising_moves))
+
+    def test_split_policies_always_include_smallest_and_largest_split(self):
+        for policy in (get_fixed_splits, get_bucketed_splits, get_adaptive_splits):
+            for sheep in range(2, 17):
+                splits = policy(sheep, ADAPTIVE_SPLIT_PLIES)
+                self.assertEqual(splits[0], 1)
+                self.assertEqual(splits[-1], sheep - 1)
+                self.assertEqual(splits, sorted(set(splits)))
+        self.assertEqual(get_fixed_splits(16, 0), [1, 8, 15])
+        self.assertEqual(get_bucketed_splits(16, 0), [1, 4, 8, 12, 15])
+
+    def test_adaptive_splits_are_widened_near_the_root(self):
+        self.assertEqual(get_adaptive_splits(16, 0), list(range(1, 16)))
+        self.assertEqual(get_adaptive_splits(16, ADAPTIVE_SPLIT_PLIES),
+                         get_bucketed_splits(16, ADAPTIVE_SPLIT_PLIES))
+
+    def test_ordered_moves_follow_split_policy(self):
+        self.play_game_for_turns(2)
+        context = SearchContext(split_policy=get_fixed_splits)
+        ordered_moves = list(generate_ordered_moves(self.game, None, context))
+        self.assertCountEqual(ordered_moves, generate_moves(self.game, get_fixed_splits))
+        self.assertTrue(all(move.sheep in (1, 4, 7) for move in ordered_moves))
+
+    def test_search_with_split_policy_finds_move(self):
+        self.play_game_for_turns(2)
+        result = iterative_deepening(self.game, self.game.is_players_turn, SearchOptions(
+            max_depth=3, split_policy=get_bucketed_splits))
+        self.assertIn(result.move, generate_moves(self.game, get_bucketed_splits))
+
+    def test_unknown_split_policy_is_rejected(self):
+        self.assertIs(get_split_policy('fixed'), get_fixed_splits)
+        with self.assertRaises(ValueError):
+            get_split_policy('none')
+
+    def test_cutoff_is_recorded_as_killer_and_history(self):
+        self.play_game_for_turns(2)
+        moves_by_key = {get_history_key(self.game, move): move
+                        for move in generate_moves(self.game)}
+        first, second, third = list(moves_by_key.values())[:3]
+        context = SearchContext()
+        context.record_cutoff(self.game, first, 0, 2)
+        context.record_cutoff(self.game, second, 3, 3)
+        context.record_cutoff(self.game, third, 1, 1)
+
+        self.assertEqual(context.get_killers(), [third, second])
+        self.assertEqual(context.history[get_history_key(self.game, second)], 9)
+        statistics = context.get_ordering_statistics()
+        self.assertEqual(statistics['cutoffs'], 3)
+        self.assertAlmostEqual(statistics['first_move_cutoff_rate'], 1 / 3)
+        self.assertAlmostEqual(statistics['average_cutoff_index'], 4 / 3)
+
+    def test_history_key_groups_similar_sheep_fractions(self):
+        self.play_game_for_turns(2)
+        move = generate_moves(self.game)[0]
+        sheep = self.game.pastures[move.source].get_amount_of_sheep()
+        smallest_split = get_history_key(self.game, move._replace(sheep=1))
+        largest_split = get_history_key(
+            self.game, move._replace(sheep=sheep - 1))
+        self.assertNotEqual(smallest_split, largest_split)
+        self.assertEqual(smallest_split[:2], (move.source, move.target))
+
+    def test_search_reports_ordering_statistics(self):
+        self.play_game_for_turns(2)
+        result = iterative_deepening(
+            self.game, self.game.is_players_turn, SearchOptions(max_depth=3))
+        self.assertGreater(result.statistics['cutoffs'], 0)
+        self.assertGreaterEqual(result.statistics['first_move_cutoff_rate'], 0)
+        self.assertLessEqual(result.statistics['first_move_cutoff_rate'], 1)
+
+    # Pääjatkon haku ja ikkunat
+
+    def test_null_window_search_matches_full_window_search(self):
+        nodes = {True: 0, False: 0}
+        for turns in (0, 2, 3, 6):
+            self.play_game_for_turns(turns)
+            values = {}
+            for null_window_search in (True, False):
+                context = SearchContext(TranspositionTable(1),
+                                        null_window_search=null_window_search)
+                values[null_window_search], move = minimax(
+                    self.game, 4, ALPHA, BETA, self.game.is_players_turn, context)
+                self.assertIsNotNone(move)
+                nodes[null_window_search] += context.nodes
+            self.assertEqual(values[True], values[False])
+        self.assertLess(nodes[True], nodes[False])
+
+    def test_failed_aspiration_window_is_widened(self):
+        self.play_game_for_turns(3)
+        value, _ = minimax(self.game, 3, ALPHA, BETA, self.game.is_players_turn)
+        for previous_value in (value - 10, value, value + 10):
+            context = SearchContext()
+            aspiration_value, move = search_with_aspiration_window(
+                self.game, 3, self.game.is_players_turn, context, previous_value, 1)
+            self.assertEqual(aspiration_value, value)
+            self.assertTrue(is_legal_move(self.game, move))
+            self.assertEqual(context.aspiration_failures, 0 if previous_value == value else 1)
+
+    def test_aspiration_windows_do_not_change_iterative_deepening_value(self):
+        self.play_game_for_turns(2)
+        result = iterative_deepening(
+            self.game, self.game.is_players_turn, SearchOptions(max_depth=4))
+        full_window_result = iterative_deepening(
+            self.game, self.game.is_players_turn, SearchOptions(
+                max_depth=4, aspiration_window=None, null_window_search=False))
+        self.assertEqual(result.value, full_window_result.value)
+        self.assertEqual(full_window_result.statistics['researches'], 0)
+        self.assertEqual(full_window_result.statistics['aspiration_failures'], 0)
+
+    # Syventyvä haku
+
+    def get_game_state(self) -> Tuple:
+        return (tuple((p.occupier, p.sheep) for p in self.game.pastures),
+                self.game.is_players_turn, self.game.get_number_of_turn(), self.game.hash)
+
+    def test_iterative_deepening_matches_minimax_at_reached_depth(self):
+        self.play_game_for_turns(3)
+        result = iterative_deepening(
+            self.game, self.game.is_players_turn, SearchOptions(max_depth=3))
+        value, _ = minimax(self.game, 3, ALPHA, BETA,
+                           self.game.is_players_turn)
+        self.assertEqual(result.depth, 3)
+        self.assertEqual(result.value, value)
+        self.assertIsNotNone(result.move)
+
+    def test_iterative_deepening_stops_at_node_limit(self):
+        self.play_game_for_turns(2)
+        state = self.get_game_state()
+        result = iterative_deepening(
+            self.game, self.game.is_players_turn, SearchOptions(node_limit=200))
+        self.assertIsNotNone(result.move)
+        self.assertLessEqual(result.nodes, 201)
+        self.assertEqual(self.get_game_state(), state)
+
+    def test_iterative_deepening_respects_time_limit(self):
+        self.play_game_for_turns(2)
+        state = self.get_game_state()
+        start_time = time.monotonic()
+        result = iterative_deepening(
+            self.game, self.game.is_players_turn, SearchOptions(time_limit=0.2))
+        self.assertLess(time.monotonic() - start_time, 1)
+        self.assertIsNotNone(result.move)
+        self.assertGreaterEqual(result.depth, 1)
+        self.assertEqual(self.get_game_state(), state)
+
+    def test_cancelled_search_returns_first_iteration(self):
+        self.play_game_for_turns(2)
+        cancel_token = CancellationToken()
+        cancel_token.cancel()
+        result = iterative_deepening(
+            self.game, self.game.is_players_turn, cancel_token=cancel_token)
+        self.assertEqual(result.depth, 1)
+        self.assertIn(result.move, get_possible_moves(
+            self.game, self.game.is_players_turn))
+
+    def test_aborted_search_leaves_game_state_unchanged(self):
+        self.play_game_for_turns(2)
+        state = self.get_game_state()
+        for node_limit in (1, 5, 50, 500):
+            with self.assertRaises(SearchAborted):
+                minimax(self.game, 5, ALPHA, BETA, self.game.is_players_turn,
+                        SearchContext(node_limit=node_limit))
+            self.assertEqual(self.get_game_state(), state)
+
     def test_minimax_returns_the_best_initial_move_for_player_when_using_depth_1(self):
         move = self.get_best_move_using_minimax(1, self.game.is_players_turn)
 
         best_value, _ = self.get_move_with_highest_value((self.game))
-        self.assertEqual(move.evaluate_game_state(), best_value)
+        self.assertEqual(evaluate_move(self.game, move), best_value)
 
     def test_minimax_returns_the_best_initial_move_for_computer_when_using_depth_1(self):
         self.play_game_for_turns(1)
         move = self.get_best_move_using_minimax(1, self.game.is_players_turn)
 
         best_value, _ = self.get_move_with_lowest_value((self.game))
-        self.assertEqual(move.evaluate_game_state(), best_value)
+        self.assertEqual(evaluate_move(self.game, move), best_value)
 
     def test_minimax_returns_the_best_move_on_turn_5(self):
         self.play_game_for_turns(4)
         move = self.get_best_move_using_minimax(1, self.game.is_players_turn)
 
         best_value, _ = self.get_move_with_highest_value((self.game))
-        self.assertEqual(move.evaluate_game_state(), best_value)
+        self.assertEqual(evaluate_move(self.game, move), best_value)
 
     def test_player_making_the_best_move_beats_opponent_making_the_worst_move(self):
         self.play_full_game_against_the_worst(is_player=True)
@@ -362,3 +651,18 @@ class TestMinimax(unittest.TestCase):
 
     def test_computer_wins_if_depth_5_minimax_finds_winning_move_against_best_opponent(self):
         self.computer_wins_game_if_minimax_finds_winning_move(depth=5)
+
+
+class TestMinimaxOnBitBoard(TestMinimax):
+    """Samat testit bittikarttaan talletetulla pelilaudalla"""
+
+    def setUp(self) -> None:
+        self.game = BitBoardGame(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class TestMinimaxOnNumpyBoard(TestMinimax):
+    """Samat testit NumPy-taulukoihin talletetulla pelilaudalla"""
+
+    def setUp(self) -> None:
+        self.game = NumpyGame(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
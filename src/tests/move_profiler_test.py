@@ -0,0 +1,97 @@
+import cProfile
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import unittest
+from engine import Engine
+from game import Game
+from minimax import SearchOptions, generate_moves
+from move_profiler import CATEGORY_NAMES, MoveProfiler, StackSampler, get_category_times
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+
+
+def is_over():
+    return sum(range(10000)) > 0
+
+
+def is_over_for_player():
+    return is_over()
+
+
+class TestMoveProfiler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        for _ in range(6):
+            self.game.make_move(generate_moves(self.game)[0])
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    # Testit
+
+    def test_engine_writes_profile_files_named_by_turn(self):
+        engine = Engine(SearchOptions(max_depth=3), profile_directory=self.directory.name)
+        result = engine.choose_move(self.game)
+        engine.close()
+        self.assertIsNotNone(result.move)
+
+        profiler = MoveProfiler(self.directory.name)
+        turn = self.game.get_number_of_turn()
+        for extension in ('pstats', 'folded', 'txt'):
+            self.assertTrue(os.path.exists(profiler.get_path(turn, extension)))
+        statistics = pstats.Stats(profiler.get_path(turn, 'pstats'))
+        self.assertIn('minimax', statistics.get_stats_profile().func_profiles)
+        with open(profiler.get_path(turn, 'txt'), encoding='utf-8') as file:
+            summary = file.read()
+        for name in CATEGORY_NAMES.values():
+            self.assertIn(name, summary)
+
+    def test_stacks_are_collapsed_from_profiled_function(self):
+        profiler = MoveProfiler(self.directory.name)
+        profiler.profile(1, is_over_for_player)
+        with open(profiler.get_path(1, 'folded'), encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertTrue(stack.startswith('move_profiler_test.is_over_for_player'))
+            self.assertGreater(int(count), 0)
+
+    def test_nested_calls_in_category_are_counted_once(self):
+        profile = cProfile.Profile()
+        profile.enable()
+        is_over_for_player()
+        profile.disable()
+        game_over_time = get_category_times(profile)['game_over_checks']
+        outer_time = next(entry.totaltime for entry in profile.getstats()
+                          if getattr(entry.code, 'co_name', None) == 'is_over_for_player')
+        self.assertAlmostEqual(game_over_time, outer_time)
+
+    def test_category_times_match_cumulative_times_of_pstats(self):
+        profile = cProfile.Profile()
+        profile.enable()
+        is_over_for_player()
+        profile.disable()
+        # Tilastojen ajat on pyöristetty millisekunteihin
+        function_profile = pstats.Stats(profile).get_stats_profile().func_profiles[
+            'is_over_for_player']
+        self.assertAlmostEqual(get_category_times(profile)['game_over_checks'],
+                               function_profile.cumtime, delta=0.001)
+
+    def test_sampler_restores_switch_interval(self):
+        sampler = StackSampler(threading.get_ident(), None)
+        previous_interval = sys.getswitchinterval()
+        sampler.start()
+        sampler.stop()
+        self.assertEqual(sys.getswitchinterval(), previous_interval)
+
+    def test_switch_interval_is_restored_when_profiled_function_fails(self):
+        previous_interval = sys.getswitchinterval()
+        profiler = MoveProfiler(self.directory.name)
+        with self.assertRaises(ZeroDivisionError):
+            profiler.profile(1, lambda: 1 / 0)
+        self.assertEqual(sys.getswitchinterval(), previous_interval)
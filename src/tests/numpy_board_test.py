@@ -0,0 +1,69 @@
+import random
+import unittest
+from game import Game
+from minimax import generate_moves
+from numpy_board import NumpyGame, np
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class TestNumpyBoard(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.numpy_game = NumpyGame(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.random = random.Random(0)
+
+    # Apumetodit
+
+    def play_same_random_move(self) -> bool:
+        possible_moves = generate_moves(self.game)
+        if len(possible_moves) == 0:
+            return False
+        move = self.random.choice(possible_moves)
+        self.game.make_move(move)
+        self.numpy_game.make_move(move)
+        return True
+
+    # Testit
+
+    def test_batch_evaluation_matches_evaluating_one_move_at_a_time(self):
+        for seed in range(3):
+            self.setUp()
+            self.random.seed(seed)
+            while True:
+                possible_moves = generate_moves(self.numpy_game)
+                self.assertEqual(self.numpy_game.evaluate_moves(possible_moves),
+                                 Game.evaluate_moves(self.numpy_game, possible_moves))
+                if not self.play_same_random_move():
+                    break
+
+    def test_backends_agree_during_random_game(self):
+        while self.play_same_random_move():
+            self.assertEqual(self.numpy_game.hash, self.game.hash)
+            self.assertEqual(generate_moves(self.numpy_game),
+                             generate_moves(self.game))
+            self.assertEqual(self.numpy_game.evaluate_game_state(),
+                             self.game.evaluate_game_state())
+            self.assertEqual(self.numpy_game.is_over_for_player(),
+                             self.game.is_over_for_player())
+            self.assertEqual(self.numpy_game.is_over_for_computer(),
+                             self.game.is_over_for_computer())
+
+    def test_batch_evaluation_does_not_change_game_state(self):
+        self.play_same_random_move()
+        self.play_same_random_move()
+        occupier = self.numpy_game.board.occupier.copy()
+        sheep = self.numpy_game.board.sheep.copy()
+        self.numpy_game.evaluate_moves(generate_moves(self.numpy_game))
+        self.assertTrue((self.numpy_game.board.occupier == occupier).all())
+        self.assertTrue((self.numpy_game.board.sheep == sheep).all())
+
+    def test_mobility_is_computed_for_every_pasture_at_once(self):
+        board = self.numpy_game.board
+        mobility = board.get_mobility(board.occupier)
+        self.assertEqual(mobility.shape, (BOARD_HEIGHT * BOARD_WIDTH,))
+        for pasture in self.numpy_game.pastures:
+            self.assertEqual(mobility[pasture.index],
+                             len(pasture.get_neighbours(self.numpy_game.pastures)))
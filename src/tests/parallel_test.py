@@ -0,0 +1,128 @@
+import copy
+import multiprocessing
+import unittest
+from constants import ALPHA, BETA
+from engine import Engine
+from game import Game
+from minimax import (
+    CancellationToken,
+    SearchAborted,
+    SearchOptions,
+    get_all_splits,
+    get_possible_moves,
+    minimax
+)
+from parallel import ParallelSearch, RootJob, _init_worker, _search_root_move, _worker_state
+from transposition import EXACT
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+
+
+class TestParallelSearch(unittest.TestCase):
+    search: ParallelSearch
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.search = ParallelSearch(2)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.search.close()
+
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, False)
+
+    # Apumetodit
+
+    def play_game_for_turns(self, turns: int) -> None:
+        for _ in range(turns):
+            self.game.make_move(get_possible_moves(
+                self.game, self.game.is_players_turn)[0])
+
+    def get_root_values(self, depth: int) -> list:
+        values = []
+        for move in get_possible_moves(self.game, self.game.is_players_turn):
+            self.game.make_move(move)
+            value, _ = minimax(self.game, depth - 1, ALPHA, BETA,
+                               self.game.is_players_turn)
+            self.game.undo_move(move)
+            values.append(value)
+        return values
+
+    # Testit
+
+    def test_value_matches_sequential_search(self):
+        self.play_game_for_turns(4)
+        for depth in range(1, 4):
+            value, _, _ = self.search.search(
+                self.game, depth, self.game.is_players_turn)
+            expected_value, _ = minimax(self.game, depth, ALPHA, BETA,
+                                        self.game.is_players_turn)
+            self.assertEqual(value, expected_value)
+
+    def test_last_of_the_best_root_moves_is_chosen_like_in_sequential_search(self):
+        self.play_game_for_turns(3)
+        root_moves = get_possible_moves(self.game, self.game.is_players_turn)
+        values = self.get_root_values(3)
+        best_value = max(values) if self.game.is_players_turn else min(values)
+        self.assertGreater(values.count(best_value), 1)
+
+        value, move, _ = self.search.search(
+            self.game, 3, self.game.is_players_turn)
+        self.assertEqual(value, best_value)
+        last_best_index = len(values) - 1 - values[::-1].index(best_value)
+        self.assertEqual(move, root_moves[last_best_index])
+
+    def test_chosen_move_does_not_depend_on_amount_of_workers(self):
+        self.play_game_for_turns(5)
+        _, move, _ = self.search.search(self.game, 3, self.game.is_players_turn)
+        with ParallelSearch(1) as single_worker_search:
+            _, single_worker_move, _ = single_worker_search.search(
+                self.game, 3, self.game.is_players_turn)
+        self.assertEqual(move, single_worker_move)
+
+    def test_search_does_not_change_game_state(self):
+        self.play_game_for_turns(4)
+        game_hash = self.game.hash
+        self.search.search(self.game, 2, self.game.is_players_turn)
+        self.assertEqual(self.game.hash, game_hash)
+
+    def test_cancelled_search_is_aborted(self):
+        self.play_game_for_turns(4)
+        cancel_token = CancellationToken()
+        cancel_token.cancel()
+        with self.assertRaises(SearchAborted):
+            self.search.search(self.game, 3, self.game.is_players_turn,
+                               cancel_token=cancel_token)
+
+    def test_cancelled_iterative_deepening_returns_first_depth(self):
+        self.play_game_for_turns(4)
+        cancel_token = CancellationToken()
+        cancel_token.cancel()
+        result = self.search.iterative_deepening(
+            self.game, self.game.is_players_turn, cancel_token=cancel_token)
+        self.assertEqual(result.depth, 1)
+        self.assertIsNotNone(result.move)
+
+    def test_worker_table_is_cleared_only_for_a_new_root(self):
+        _init_worker(multiprocessing.Value('d', ALPHA), multiprocessing.Event(), 1, None)
+        self.play_game_for_turns(4)
+        max_player = self.game.is_players_turn
+        move = get_possible_moves(self.game, max_player)[0]
+        job = RootJob(2, max_player, None, get_all_splits)
+        _search_root_move(copy.deepcopy(self.game), move, job)
+        # Merkkitalletus on niin syvä, ettei haku korvaa sitä
+        marker_key = 12345
+        _worker_state.table.store(marker_key, 100, EXACT, 0, None)
+
+        _search_root_move(copy.deepcopy(self.game), move, job._replace(depth=3))
+        self.assertIsNotNone(_worker_state.table.probe(marker_key))
+        self.game.make_move(move)
+        _search_root_move(copy.deepcopy(self.game), get_possible_moves(
+            self.game, not max_player)[0], job._replace(max_player=not max_player))
+        self.assertIsNone(_worker_state.table.probe(marker_key))
+
+    def test_node_limit_is_not_accepted_in_parallel_engine(self):
+        with self.assertRaises(ValueError):
+            Engine(SearchOptions(time_limit=1.0, node_limit=100), workers=2)
@@ -1,7 +1,12 @@
+import copy
+import pickle
 import unittest
+from backends import BACKENDS
 from constants import (
     PLAYER
 )
+from game import Game
+from minimax import generate_moves
 from pasture import Pasture
 
 
@@ -41,3 +46,41 @@ class TestPasture(unittest.TestCase):
 
     def test_value_of_pasture_without_neighbours_is_zero(self):
         self.assertEqual(self.pasture.get_value([self.pasture]), 0)
+
+    def test_pastures_are_compared_by_identity(self):
+        other_pasture = Pasture((100, 100))
+        self.assertNotEqual(self.pasture, other_pasture)
+        self.assertIn(self.pasture, [other_pasture, self.pasture])
+        self.assertEqual(len({self.pasture, other_pasture}), 2)
+
+    def test_pasture_state_is_stored_in_slots(self):
+        self.assertFalse(hasattr(self.pasture, '__dict__'))
+
+    def test_pasture_state_is_changed_only_through_methods(self):
+        for game_class in BACKENDS.values():
+            pasture = game_class(4, 8, is_simulation=False).pastures[0]
+            with self.assertRaises(AttributeError):
+                pasture.occupier = PLAYER  # type: ignore[misc]
+            with self.assertRaises(AttributeError):
+                pasture.sheep = 3  # type: ignore[misc]
+            self.assertTrue(pasture.is_free())
+
+    def test_pasture_survives_pickling(self):
+        self.pasture.occupy(PLAYER, 10)
+        unpickled_pasture = pickle.loads(pickle.dumps(self.pasture))
+        self.assertTrue(unpickled_pasture.is_occupied_by_player())
+        self.assertEqual(unpickled_pasture.get_amount_of_sheep(), 10)
+
+    def test_copied_game_shares_geometry_and_updates_only_its_own_state(self):
+        game = Game(4, 8, is_simulation=False)
+        for _ in range(4):
+            game.make_move(generate_moves(game)[0])
+        copied_game = copy.deepcopy(game)
+        self.assertIs(copied_game.pastures[0].coordinates, game.pastures[0].coordinates)
+        self.assertIs(copied_game.pastures[0].topology, game.pastures[0].topology)
+
+        value = game.evaluate_game_state()
+        copied_game.make_move(generate_moves(copied_game)[0])
+        self.assertEqual(game.evaluate_game_state(), value)
+        self.assertEqual(copied_game.evaluate_game_state(),
+                         copied_game._compute_full_evaluation())
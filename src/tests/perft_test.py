@@ -0,0 +1,54 @@
+import subprocess
+import sys
+import unittest
+from backends import BACKENDS
+from game import Game
+from minimax import generate_moves, get_fixed_splits
+from perft import divide, get_perft_positions, perft
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+
+
+class TestPerft(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+
+    # Testit
+
+    def test_leaf_counts_from_start_position(self):
+        self.assertEqual(perft(self.game, 0), 1)
+        self.assertEqual(perft(self.game, 1), len(generate_moves(self.game)))
+        # Reunalla on 20 laidunta, joista toinen ottelija valitsee jäljelle jääneistä
+        self.assertEqual(perft(self.game, 2), 20 * 19)
+        self.assertEqual(perft(self.game, 3), 20430)
+
+    def test_backends_generate_the_same_moves(self):
+        expected = [perft(game, 3) for _, game in get_perft_positions()]
+        for game_class in BACKENDS.values():
+            self.assertEqual([perft(game, 3) for _, game in get_perft_positions(
+                game_class=game_class)], expected)
+
+    def test_divide_sums_to_perft_without_changing_game(self):
+        _, game = get_perft_positions()[2]
+        game_hash = game.hash
+        counts = divide(game, 3)
+        self.assertCountEqual(counts, generate_moves(game))
+        self.assertEqual(sum(counts.values()), perft(game, 3))
+        self.assertEqual(game.hash, game_hash)
+
+    def test_finished_game_is_a_leaf(self):
+        while not self.game.is_over():
+            self.game.make_move(generate_moves(self.game)[0])
+        self.assertEqual(perft(self.game, 3), 1)
+
+    def test_split_policy_reduces_leaves(self):
+        _, game = get_perft_positions()[1]
+        self.assertLess(perft(game, 2, get_fixed_splits), perft(game, 2))
+
+    def test_tool_does_not_import_engine(self):
+        output = subprocess.check_output(
+            [sys.executable, '-c',
+             'import sys, perft; print(sorted({"engine", "parallel"} & set(sys.modules)))'],
+            text=True)
+        self.assertEqual(output.strip(), '[]')
@@ -0,0 +1,123 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from engine import Engine
+from game import Game
+from minimax import SearchOptions, get_possible_moves, is_legal_move
+from ponder import PONDERED_REPLIES, Ponderer
+from transposition import TranspositionTable
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+PONDERING_TIME = 0.3
+
+
+class TestPonderer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, False)
+        self.table = TranspositionTable(1)
+        self.ponderer = Ponderer(self.table)
+        self.play_game_for_turns(4)
+
+    def tearDown(self) -> None:
+        self.ponderer.stop()
+
+    # Apumetodit
+
+    def play_game_for_turns(self, turns: int) -> None:
+        for _ in range(turns):
+            self.game.make_move(get_possible_moves(
+                self.game, self.game.is_players_turn)[0])
+
+    def get_likely_reply(self):
+        return get_possible_moves(self.game, self.game.is_players_turn)[0]
+
+    def ponder(self) -> None:
+        self.ponderer.start(self.game)
+        time.sleep(PONDERING_TIME)
+        self.ponderer.stop()
+
+    # Testit
+
+    def test_pondering_stops_cleanly(self):
+        self.ponderer.start(self.game)
+        self.assertTrue(self.ponderer.is_active())
+        self.ponderer.stop()
+        self.assertFalse(self.ponderer.is_active())
+
+    def test_stopping_without_pondering_does_nothing(self):
+        self.ponderer.stop()
+        self.assertFalse(self.ponderer.is_active())
+
+    def test_pondering_does_not_change_game_state(self):
+        game_hash = self.game.hash
+        self.ponder()
+        self.assertEqual(self.game.hash, game_hash)
+
+    def test_pondering_fills_transposition_table(self):
+        self.ponder()
+        self.assertGreater(self.table.stores, 0)
+
+    def test_reply_to_likely_move_is_pondered(self):
+        self.ponder()
+        self.game.make_move(self.get_likely_reply())
+        result = self.ponderer.get_result(self.game)
+        self.assertIsNotNone(result)
+        self.assertTrue(is_legal_move(self.game, result.move))
+        self.assertGreaterEqual(result.depth, 1)
+
+    def test_unlikely_move_is_not_pondered(self):
+        self.ponder()
+        unlikely_move = get_possible_moves(
+            self.game, self.game.is_players_turn)[PONDERED_REPLIES]
+        self.game.make_move(unlikely_move)
+        self.assertIsNone(self.ponderer.get_result(self.game))
+
+    def test_pondering_is_restarted_for_new_game_state(self):
+        self.ponderer.start(self.game)
+        time.sleep(PONDERING_TIME)
+        self.game.make_move(self.get_likely_reply())
+        self.ponderer.start(self.game)
+        self.assertTrue(self.ponderer.is_active())
+        # Aiemmat tulokset koskivat edellistä tilannetta
+        self.assertIsNone(self.ponderer.get_result(self.game))
+
+    def test_engine_stops_pondering_before_using_table(self):
+        engine = Engine(SearchOptions(max_depth=2))
+        threads = set(threading.enumerate())
+        engine.ponder(self.game)
+        pondering_thread, = set(threading.enumerate()) - threads
+        time.sleep(PONDERING_TIME)
+        unlikely_move = get_possible_moves(
+            self.game, self.game.is_players_turn)[PONDERED_REPLIES]
+        self.game.make_move(unlikely_move)
+
+        pondering_during_use = []
+
+        def record_use(method):
+            def recorded(*arguments):
+                if threading.current_thread() is not pondering_thread:
+                    pondering_during_use.append(pondering_thread.is_alive())
+                return method(*arguments)
+            return recorded
+
+        with (patch.object(TranspositionTable, 'new_search',
+                           record_use(TranspositionTable.new_search)),
+              patch.object(TranspositionTable, 'probe', record_use(TranspositionTable.probe))):
+            result = engine.choose_move(self.game)
+        engine.close()
+        self.assertTrue(is_legal_move(self.game, result.move))
+        self.assertGreater(len(pondering_during_use), 0)
+        self.assertNotIn(True, pondering_during_use)
+
+    def test_engine_replies_with_pondered_move(self):
+        engine = Engine(SearchOptions(time_limit=1.0))
+        engine.ponder(self.game)
+        time.sleep(PONDERING_TIME)
+        self.game.make_move(self.get_likely_reply())
+
+        start_time = time.monotonic()
+        result = engine.choose_move(self.game)
+        self.assertLess(time.monotonic() - start_time, engine.options.time_limit / 2)
+        self.assertTrue(is_legal_move(self.game, result.move))
@@ -0,0 +1,87 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from game import Game
+from selfplay import (
+    EngineSettings,
+    MatchSettings,
+    create_engine_from_settings,
+    play_game,
+    run_games
+)
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 4
+MATCH = MatchSettings(BOARD_HEIGHT, BOARD_WIDTH)
+SHALLOW = EngineSettings('minimax', None, 1, endgame_threshold=None)
+DEEPER = EngineSettings('minimax', None, 2, endgame_threshold=None)
+
+
+class TestSelfPlay(unittest.TestCase):
+    # Apumetodit
+
+    def run_games(self, games: int, workers: int = 1):
+        output = io.StringIO()
+        run_games(games, SHALLOW, DEEPER, output, workers, MATCH)
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    # Testit
+
+    def test_game_record_contains_moves_and_result(self):
+        record = play_game(0, SHALLOW, DEEPER, MATCH)
+        self.assertEqual(record['player']['max_depth'], 1)
+        self.assertEqual(record['computer']['max_depth'], 2)
+        self.assertEqual(record['pastures']['player'] + record['pastures']['computer'],
+                         len(record['moves']))
+        if record['pastures']['player'] > record['pastures']['computer']:
+            self.assertEqual(record['winner'], 'player')
+        for move in record['moves']:
+            self.assertIn(move['side'], ('player', 'computer'))
+            self.assertGreater(move['nodes'], 0)
+            self.assertGreaterEqual(move['time'], 0)
+        json.dumps(record, allow_nan=False)
+
+    def test_games_are_written_as_lines_with_alternating_sides(self):
+        records = self.run_games(3)
+        self.assertEqual([record['game'] for record in records], [0, 1, 2])
+        self.assertEqual([record['first'] for record in records],
+                         ['player', 'computer', 'player'])
+        self.assertEqual(records[1]['player']['max_depth'], 2)
+        # Syvyysrajalla tekoälyt pelaavat aina samoin
+        self.assertEqual([move['move'] for move in records[0]['moves']],
+                         [move['move'] for move in records[2]['moves']])
+
+    def test_games_are_played_in_parallel(self):
+        records = self.run_games(2, workers=2)
+        self.assertCountEqual([record['game'] for record in records], [0, 1])
+        sequential_records = self.run_games(2)
+        self.assertEqual(sorted(record['winner'] or '' for record in records),
+                         sorted(record['winner'] or '' for record in sequential_records))
+
+    def test_monte_carlo_search_has_no_depth_limit(self):
+        with self.assertRaises(ValueError):
+            create_engine_from_settings(EngineSettings('mcts', 1.0, 2), None, 0)
+        engine = create_engine_from_settings(EngineSettings('mcts', 0.1), None, 0)
+        self.assertIsNotNone(engine.choose_move(Game(BOARD_HEIGHT, BOARD_WIDTH, True)).move)
+
+    def test_runner_does_not_import_pygame(self):
+        output = subprocess.check_output(
+            [sys.executable, '-c', 'import sys, selfplay; print("pygame" in sys.modules)'],
+            text=True)
+        self.assertEqual(output.strip(), 'False')
+
+    def test_output_file_is_replaced_unless_appending(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tulokset.jsonl')
+            command = [sys.executable, 'selfplay.py', '--games', '1', '--height',
+                       str(BOARD_HEIGHT), '--width', str(BOARD_WIDTH), '--no-book',
+                       '--first-depth', '1', '--second-depth', '1', '--output', path]
+            for arguments, expected_lines in (([], 1), ([], 1), (['--append'], 2)):
+                subprocess.run(command + arguments, check=True,
+                               cwd=os.path.dirname(os.path.dirname(__file__)))
+                with open(path, encoding='utf-8') as file:
+                    self.assertEqual(len(file.read().splitlines()), expected_lines)
@@ -0,0 +1,101 @@
+import unittest
+from constants import ALPHA, BETA
+from game import Game
+from minimax import (
+    SearchContext,
+    generate_moves,
+    generate_ordered_moves,
+    get_possible_initial_moves,
+    is_legal_move,
+    minimax
+)
+from symmetry import get_inverse, get_symmetries, transform_move
+from transposition import TranspositionTable
+from utils import get_topology
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+
+
+class TestSymmetry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.mirrored_game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+        self.symmetry = get_symmetries(get_topology(BOARD_HEIGHT, BOARD_WIDTH))[1]
+
+    # Apumetodit
+
+    def play_mirrored_moves(self, turns: int) -> None:
+        for _ in range(turns):
+            move = generate_moves(self.game)[0]
+            self.game.make_move(move)
+            self.mirrored_game.make_move(transform_move(move, self.symmetry))
+
+    # Testit
+
+    def test_symmetries_preserve_neighbours_and_rays(self):
+        for height, width in ((4, 8), (3, 5), (5, 5)):
+            topology = get_topology(height, width)
+            symmetries = get_symmetries(topology)
+            self.assertEqual(symmetries[0], tuple(range(height * width)))
+            self.assertGreater(len(symmetries), 1)
+            for symmetry in symmetries:
+                for index, neighbours in enumerate(topology.neighbours):
+                    self.assertEqual(sorted(symmetry[n] for n in neighbours),
+                                     list(topology.neighbours[symmetry[index]]))
+                    mirrored_rays = {tuple(symmetry[i] for i in ray)
+                                     for ray in topology.rays[index]}
+                    self.assertEqual(mirrored_rays, set(topology.rays[symmetry[index]]))
+
+    def test_inverse_undoes_symmetry(self):
+        for symmetry in get_symmetries(get_topology(BOARD_HEIGHT, BOARD_WIDTH)):
+            inverse = get_inverse(symmetry)
+            self.assertEqual(tuple(inverse[image] for image in symmetry),
+                             tuple(range(len(symmetry))))
+
+    def test_symmetric_positions_share_canonical_hash_and_value(self):
+        self.play_mirrored_moves(6)
+        self.assertNotEqual(self.game.hash, self.mirrored_game.hash)
+        self.assertEqual(self.game.get_canonical_hash()[0],
+                         self.mirrored_game.get_canonical_hash()[0])
+        self.assertEqual(self.game.evaluate_game_state(),
+                         self.mirrored_game.evaluate_game_state())
+
+    def test_symmetric_hashes_are_updated_incrementally(self):
+        played_moves = []
+        for _ in range(8):
+            move = generate_moves(self.game)[-1]
+            self.game.make_move(move)
+            played_moves.append(move)
+            canonical_hash = min(self.game.compute_hash(symmetry) for symmetry in
+                                 get_symmetries(get_topology(BOARD_HEIGHT, BOARD_WIDTH)))
+            self.assertEqual(self.game.get_canonical_hash()[0], canonical_hash)
+        for move in reversed(played_moves):
+            self.game.undo_move(move)
+        self.assertEqual(self.game.get_canonical_hash()[0],
+                         min(self.game.hash, self.game.compute_hash(self.symmetry)))
+
+    def test_transposition_table_entry_is_shared_by_symmetric_positions(self):
+        self.play_mirrored_moves(4)
+        table = TranspositionTable(1)
+        minimax(self.game, 2, ALPHA, BETA, self.game.is_players_turn, SearchContext(table))
+        stores = table.stores
+
+        value, move = minimax(self.mirrored_game, 2, ALPHA, BETA,
+                              self.mirrored_game.is_players_turn, SearchContext(table))
+        self.assertEqual(table.stores, stores)
+        self.assertTrue(is_legal_move(self.mirrored_game, move))
+        self.assertEqual(value, minimax(self.mirrored_game, 2, ALPHA, BETA,
+                                        self.mirrored_game.is_players_turn)[0])
+
+    def test_symmetric_initial_moves_are_pruned(self):
+        initial_moves = get_possible_initial_moves(self.game)
+        ordered_moves = list(generate_ordered_moves(self.game, None, SearchContext()))
+        self.assertEqual(len(ordered_moves), len(initial_moves) // 2)
+        mirrored_moves = {transform_move(move, self.symmetry) for move in ordered_moves}
+        self.assertCountEqual(set(ordered_moves) | mirrored_moves, initial_moves)
+
+    def test_symmetric_initial_moves_are_pruned_only_at_root(self):
+        initial_moves = get_possible_initial_moves(self.game)
+        ordered_moves = list(generate_ordered_moves(self.game, None, SearchContext(ply=1)))
+        self.assertCountEqual(ordered_moves, initial_moves)
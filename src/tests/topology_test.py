@@ -0,0 +1,81 @@
+import copy
+import unittest
+from backends import BACKENDS
+from utils import init_pastures
+
+BOARD_HEIGHT = 4
+BOARD_WIDTH = 8
+
+
+class TestTopology(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pastures = init_pastures(BOARD_HEIGHT, BOARD_WIDTH)
+        self.topology = self.pastures[0].topology
+
+    def test_topology_is_shared_between_boards_of_same_size(self):
+        other_pastures = init_pastures(BOARD_HEIGHT, BOARD_WIDTH)
+        self.assertIs(other_pastures[0].topology, self.topology)
+
+    def test_topology_is_not_copied_with_pastures(self):
+        copied_pastures = copy.deepcopy(self.pastures)
+        self.assertIs(copied_pastures[0].topology, self.topology)
+
+    def test_game_shares_the_topology_of_its_pastures(self):
+        for game_class in BACKENDS.values():
+            game = game_class(BOARD_HEIGHT, BOARD_WIDTH, is_simulation=False)
+            self.assertIs(game.topology, self.topology)
+            self.assertTrue(all(pasture.topology is game.topology for pasture in game.pastures))
+
+    def test_pastures_are_indexed_in_order(self):
+        for index, pasture in enumerate(self.pastures):
+            self.assertEqual(pasture.index, index)
+        self.assertEqual(self.topology.get_amount_of_pastures(),
+                         BOARD_HEIGHT * BOARD_WIDTH)
+
+    def test_neighbours_are_symmetric(self):
+        for index, neighbours in enumerate(self.topology.neighbours):
+            for neighbour in neighbours:
+                self.assertIn(index, self.topology.neighbours[neighbour])
+
+    def test_inner_pasture_has_six_neighbours(self):
+        inner_pasture = self.pastures[BOARD_WIDTH + 1]
+        self.assertEqual(
+            len(inner_pasture.get_neighbours(self.pastures)), 6)
+
+    def test_first_pasture_of_each_ray_is_a_neighbour(self):
+        for index, rays in enumerate(self.topology.rays):
+            first_pastures = {ray[0] for ray in rays if len(ray) > 0}
+            self.assertEqual(first_pastures,
+                             set(self.topology.neighbours[index]))
+
+    def test_ray_reaches_the_edge_of_the_board(self):
+        # Vasemmasta yläkulmasta etelään kulkeva säde käy läpi koko sarakkeen
+        southern_ray = self.topology.rays[0][1]
+        self.assertEqual(len(southern_ray), BOARD_HEIGHT - 1)
+
+    def test_coordinates_are_integers(self):
+        for coordinates in self.topology.coordinates:
+            self.assertTrue(all(isinstance(value, int) for value in coordinates))
+
+    def test_topology_of_a_large_board_is_consistent(self):
+        pastures = init_pastures(16, 24)
+        topology = pastures[0].topology
+        inner_pastures = [pasture for pasture in pastures
+                          if len(pasture.get_neighbours(pastures)) == 6]
+        # Reunattomia laitumia on kaikki paitsi laudan reunalla olevat
+        self.assertEqual(len(inner_pastures), 14 * 22)
+        for index, neighbours in enumerate(topology.neighbours):
+            for neighbour in neighbours:
+                self.assertIn(index, topology.neighbours[neighbour])
+
+    def test_largest_area_is_split_by_other_occupier(self):
+        occupiers = [1] * (BOARD_HEIGHT * BOARD_WIDTH)
+        self.assertEqual(self.topology.get_largest_area(occupiers, 1), BOARD_HEIGHT * BOARD_WIDTH)
+        self.assertEqual(self.topology.get_largest_area(occupiers, 0), 0)
+
+        # Toinen sarake jakaa alueen kahtia
+        for index in range(1, BOARD_HEIGHT * BOARD_WIDTH, BOARD_WIDTH):
+            occupiers[index] = 0
+        self.assertEqual(self.topology.get_largest_area(occupiers, 1),
+                         BOARD_HEIGHT * (BOARD_WIDTH - 2))
+        self.assertEqual(self.topology.get_largest_area(occupiers, 0), BOARD_HEIGHT)
@@ -0,0 +1,72 @@
+import unittest
+from game import Move
+from transposition import (
+    ENTRY_SIZE_IN_BYTES,
+    EXACT,
+    LOWER_BOUND,
+    TranspositionTable
+)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = TranspositionTable(1)
+        self.size = self.table.get_size()
+
+    def test_size_is_a_power_of_two_within_given_memory(self):
+        self.assertEqual(self.size & (self.size - 1), 0)
+        self.assertLessEqual(self.size * ENTRY_SIZE_IN_BYTES, 1024 * 1024)
+
+    def test_stored_entry_can_be_found(self):
+        self.table.store(12345, 3, EXACT, 7, Move(1, 2, 3))
+        entry = self.table.probe(12345)
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.depth, 3)
+        self.assertEqual(entry.bound, EXACT)
+        self.assertEqual(entry.value, 7)
+        self.assertEqual(entry.move, Move(1, 2, 3))
+        self.assertEqual(self.table.hits, 1)
+        self.assertEqual(self.table.stores, 1)
+
+    def test_missing_entry_is_not_found(self):
+        self.assertIsNone(self.table.probe(12345))
+        self.assertEqual(self.table.hits, 0)
+
+    def test_different_key_in_same_slot_is_a_collision(self):
+        self.table.store(1, 3, EXACT, 7, None)
+        self.assertIsNone(self.table.probe(1 + self.size))
+        self.assertEqual(self.table.collisions, 1)
+
+    def test_collision_is_counted_once_when_probing_and_storing_same_slot(self):
+        self.table.store(1, 3, EXACT, 7, None)
+        key = 1 + self.size
+        self.assertIsNone(self.table.probe(key))
+        self.table.store(key, 4, EXACT, 5, None)
+        self.assertEqual(self.table.collisions, 1)
+        self.assertEqual(self.table.probe(key).value, 5)
+        self.assertEqual(self.table.collisions, 1)
+
+    def test_deeper_entry_is_not_replaced_by_shallower_one_in_same_search(self):
+        self.table.store(1, 5, EXACT, 7, None)
+        self.table.store(1 + self.size, 2, LOWER_BOUND, 3, None)
+        self.assertEqual(self.table.probe(1).value, 7)
+
+    def test_entry_from_previous_search_is_replaced(self):
+        self.table.store(1, 5, EXACT, 7, None)
+        self.table.new_search()
+        self.table.store(1 + self.size, 2, LOWER_BOUND, 3, None)
+        self.assertIsNone(self.table.probe(1))
+        self.assertEqual(self.table.probe(1 + self.size).value, 3)
+
+    def test_same_position_is_always_updated(self):
+        self.table.store(1, 5, EXACT, 7, None)
+        self.table.store(1, 2, LOWER_BOUND, 3, None)
+        self.assertEqual(self.table.probe(1).depth, 2)
+
+    def test_clearing_removes_entries_and_statistics(self):
+        self.table.store(1, 5, EXACT, 7, None)
+        self.table.probe(1)
+        self.table.clear()
+        self.assertIsNone(self.table.probe(1))
+        self.assertEqual(self.table.get_statistics()['stores'], 0)
+        self.assertEqual(self.table.get_statistics()['hits'], 0)
@@ -0,0 +1,70 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+from constants import DIRECTION_VECTORS
+
+Coordinates = Tuple[int, int]
+
+
+def _compute_ray(coordinates: Coordinates, vector: Coordinates,
+                 indices: Dict[Coordinates, int]) -> Tuple[int, ...]:
+    """Palauttaa laitumien indeksit annetusta suunnasta järjestyksessä laudan reunaan asti"""
+    ray: List[int] = []
+    q, r = coordinates
+    while True:
+        q, r = q + vector[0], r + vector[1]
+        index = indices.get((q, r))
+        if index is None:
+            return tuple(ray)
+        ray.append(index)
+
+
+@dataclass(frozen=True)
+class Topology:
+    """Pelilaudan muuttumaton rakenne: laidunten naapurit ja säteet kuhunkin suuntaan"""
+    coordinates: Tuple[Coordinates, ...]
+    neighbours: Tuple[Tuple[int, ...], ...]
+    rays: Tuple[Tuple[Tuple[int, ...], ...], ...]
+
+    @classmethod
+    def from_coordinates(cls, coordinates: List[Coordinates]) -> Topology:
+        """Laskee laudan rakenteen laidunten aksiaalisista koordinaateista"""
+        indices = {position: index for index,
+                   position in enumerate(coordinates)}
+        rays = tuple(
+            tuple(_compute_ray(position, vector, indices) for vector in DIRECTION_VECTORS)
+            for position in coordinates)
+        neighbours = tuple(
+            tuple(sorted(ray[0] for ray in pasture_rays if len(ray) > 0))
+            for pasture_rays in rays)
+        return cls(tuple(coordinates), neighbours, rays)
+
+    def __deepcopy__(self, memo) -> Topology:
+        # Rakenne ei muutu pelin aikana, joten kopiot voivat jakaa sen
+        return self
+
+    def get_amount_of_pastures(self) -> int:
+        """Palauttaa pelilaudan laidunten määrän"""
+        return len(self.neighbours)
+
+    def get_largest_area(self, occupiers: Sequence[int | None], occupier: int) -> int:
+        """Palauttaa annetun miehittäjän laidunten suurimman yhtenäisen alueen koon.
+        Alueet käydään läpi leveyshaulla, joten jokainen laidun käsitellään kerran."""
+        visited = [False] * len(occupiers)
+        largest_area = 0
+        for start, start_occupier in enumerate(occupiers):
+            if visited[start] or start_occupier != occupier:
+                continue
+            visited[start] = True
+            queue = deque((start,))
+            area = 1
+            while queue:
+                index = queue.popleft()
+                for neighbour in self.neighbours[index]:
+                    if not visited[neighbour] and occupiers[neighbour] == occupier:
+                        visited[neighbour] = True
+                        queue.append(neighbour)
+                        area += 1
+            largest_area = max(largest_area, area)
+        return largest_area
@@ -0,0 +1,86 @@
+from typing import Dict, List, NamedTuple
+from game import Move
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# Arvio yhden talletuksen muistinkäytöstä: listan paikka, monikko ja sen kentät
+ENTRY_SIZE_IN_BYTES = 160
+
+
+class TableEntry(NamedTuple):
+    """Talletettu pelitilanne: tiiviste, laskentasyvyys, arvon tyyppi, arvo, paras siirto
+    ja haku, jossa talletus tehtiin"""
+    key: int
+    depth: int
+    bound: int
+    value: float
+    move: Move | None
+    generation: int
+
+
+class TranspositionTable:
+    """Kiinteän kokoinen hajautustaulu jo lasketuille pelitilanteille.
+
+    Paikka valitaan tiivisteen alimmista biteistä. Törmäyksessä vanha talletus
+    korvataan, jos se on edellisestä hausta tai laskettu korkeintaan yhtä syvälle.
+    Törmäykset lasketaan vain haettaessa, jolloin samaa paikkaa ei lasketa kahdesti."""
+
+    def __init__(self, size_in_megabytes: float) -> None:
+        max_entries = max(
+            1, int(size_in_megabytes * 1024 * 1024) // ENTRY_SIZE_IN_BYTES)
+        # Taulun koko on kahden potenssi, jolloin paikka saadaan bittimaskilla
+        self._size = 1 << (max_entries.bit_length() - 1)
+        self._mask = self._size - 1
+        self._entries: List[TableEntry | None] = [None] * self._size
+        self._generation = 0
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+    def get_size(self) -> int:
+        """Palauttaa taulun paikkojen määrän"""
+        return self._size
+
+    def new_search(self) -> None:
+        """Merkitsee aiempien hakujen talletukset korvattaviksi"""
+        self._generation += 1
+
+    def clear(self) -> None:
+        """Tyhjentää taulun ja sen tilastot"""
+        self._entries = [None] * self._size
+        self.hits = 0
+        self.stores = 0
+        self.collisions = 0
+
+    def probe(self, key: int) -> TableEntry | None:
+        """Palauttaa annetun tiivisteen talletuksen, jos sellainen löytyy"""
+        entry = self._entries[key & self._mask]
+        if entry is None:
+            return None
+        if entry.key != key:
+            self.collisions += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key: int, depth: int, bound: int, value: float, move: Move | None) -> None:
+        """Tallettaa pelitilanteen arvon, ellei paikalla ole arvokkaampaa talletusta"""
+        index = key & self._mask
+        entry = self._entries[index]
+        if entry is not None and entry.key != key:
+            if entry.generation == self._generation and entry.depth > depth:
+                return
+        self._entries[index] = TableEntry(
+            key, depth, bound, value, move, self._generation)
+        self.stores += 1
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Palauttaa taulun käyttötilastot"""
+        return {
+            'hits': self.hits,
+            'stores': self.stores,
+            'collisions': self.collisions,
+            'size': self._size,
+        }
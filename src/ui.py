@@ -1,37 +1,91 @@
 
+import math
 import time
-from typing import Tuple
+from functools import cache
+from typing import Dict, List, Tuple
 import pygame
 from constants import (
-    ALPHA,
-    BETA,
     BLACK,
     BOARD_FONT_SIZE,
     BOARD_HEIGHT,
     BOARD_WIDTH,
     COMPUTER,
-    COMPUTER_DEPTH,
+    COMPUTER_ENGINE,
+    COMPUTER_TIME_LIMIT,
     COMPUTERS_PASTURE_COLOR,
     DISPLAY_SIZE,
     FREE_PASTURE_COLOR,
+    HALF_RADIUS,
     HIGHLIGHT_OFFSET,
+    INITIAL_POSITION,
     LEFT_MOUSE_BUTTON,
+    MINIMAL_RADIUS,
     MOUSE_WHEEL_SCROLL_DOWN,
     MOUSE_WHEEL_SCROLL_UP,
     PASTURE_BORDER_COLOR,
     PASTURE_BORDER_WIDTH,
+    PASTURE_RADIUS,
     PLAYER,
     PLAYERS_PASTURE_COLOR,
+    PROFILE_DIRECTORY,
     RIGHT_MOUSE_BUTTON,
+    SEARCH_WORKERS,
+    SHOW_SEARCH_STATISTICS,
     SIDEBAR_DIVIDER,
     SIDEBAR_FONT_SIZE,
     SIDEBAR_MARGIN,
-    SIMULATED_PLAYER_DEPTH,
+    SIMULATED_PLAYER_ENGINE,
+    SIMULATED_PLAYER_TIME_LIMIT,
+    STATISTICS_FONT_SIZE,
+    USE_OPENING_BOOK,
     WHITE
 )
+from book import load_opening_book
+from engine import Engine, SearchEngine, create_engine
 from game import Game
-from minimax import minimax
+from instrumentation import get_cutoffs_per_ply
 from pasture import Pasture
+from topology import Coordinates
+
+
+# Code derived from:
+# https://github.com/rbaltrusch/pygame_examples/blob/master/code/hexagonal_tiles/hexagon.py
+# Original Author: Richard Baltrusch
+# License: MIT License. All original licensing terms have been fully preserved.
+# Date accessed: 2024-03-21
+# Methods adapted: get_pasture_vertices, get_pasture_centre, is_point_on_pasture
+
+def _get_pasture_position(coordinates: Coordinates) -> Tuple[float, float]:
+    """Palauttaa laitumen vasemman yläkärjen näytöllä aksiaalisista koordinaateista"""
+    q, r = coordinates
+    x, y = INITIAL_POSITION
+    return (x + 3 * HALF_RADIUS * q, y + 2 * MINIMAL_RADIUS * r + MINIMAL_RADIUS * q)
+
+
+@cache
+def get_pasture_vertices(coordinates: Coordinates) -> List[Tuple[float, float]]:
+    """Palauttaa listan laitumen kärjistä näytön koordinaattipareina"""
+    x, y = _get_pasture_position(coordinates)
+    return [
+        (x, y),
+        (x - HALF_RADIUS, y + MINIMAL_RADIUS),
+        (x, y + 2 * MINIMAL_RADIUS),
+        (x + PASTURE_RADIUS, y + 2 * MINIMAL_RADIUS),
+        (x + 3 * HALF_RADIUS, y + MINIMAL_RADIUS),
+        (x + PASTURE_RADIUS, y),
+    ]
+
+
+@cache
+def get_pasture_centre(coordinates: Coordinates) -> Tuple[float, float]:
+    """Palauttaa laitumen keskipisteen näytöllä"""
+    x, y = _get_pasture_position(coordinates)
+    return (x + HALF_RADIUS, y + MINIMAL_RADIUS)
+
+
+def is_point_on_pasture(coordinates: Coordinates, point: Tuple[int, int]) -> bool:
+    """Palauttaa tosi, jos annettu näytön piste on laitumella"""
+    return math.dist(point, get_pasture_centre(coordinates)) < MINIMAL_RADIUS
 
 
 class Ui:
@@ -41,12 +95,35 @@ class Ui:
         self._game = Game(BOARD_HEIGHT, BOARD_WIDTH, is_simulation)
         self._latest_game_value: float = 0
         self._latest_computation_time: float = 0
+        self._latest_search_depth: int = 0
+        self._latest_search_nodes: int = 0
+        self._latest_search_statistics: Dict[str, float] = {}
+        # Avauskirja kuvataan muistiin kerran, ja molemmat tekoälyt käyttävät samaa kirjaa
+        self._opening_book = (load_opening_book(BOARD_HEIGHT, BOARD_WIDTH)
+                              if USE_OPENING_BOOK else None)
+        self._computer = self._create_engine(COMPUTER_ENGINE, COMPUTER_TIME_LIMIT,
+                                             PROFILE_DIRECTORY)
+        self._simulated_player = self._create_engine(
+            SIMULATED_PLAYER_ENGINE, SIMULATED_PLAYER_TIME_LIMIT)
         self._clock = pygame.time.Clock()
         self._screen = pygame.display.set_mode(DISPLAY_SIZE)
         self._board_font = pygame.font.SysFont(
             'freesansbold', BOARD_FONT_SIZE, False, True)
         self._sidebar_font = pygame.font.SysFont(
             'freesansbold', SIDEBAR_FONT_SIZE)
+        self._statistics_font = pygame.font.SysFont(
+            'freesansbold', STATISTICS_FONT_SIZE)
+
+    def _create_engine(self, name: str, time_limit: float, profile_directory: str | None = None
+                       ) -> SearchEngine:
+        """Luo nimeä vastaavan tekoälyn. Rinnakkaisuus ja profilointi koskevat vain
+        minimax-hakua."""
+        if name == 'minimax':
+            return create_engine(name, time_limit, workers=SEARCH_WORKERS,
+                                 opening_book=self._opening_book,
+                                 collect_statistics=SHOW_SEARCH_STATISTICS,
+                                 profile_directory=profile_directory)
+        return create_engine(name, time_limit, opening_book=self._opening_book)
 
     # Syötteet
 
@@ -77,13 +154,17 @@ class Ui:
     def _exit(self):
         """Sulkee pelin"""
         self.is_running = False
+        self._computer.close()
+        self._simulated_player.close()
+        if self._opening_book is not None:
+            self._opening_book.close()
         pygame.quit()
 
     def _get_pasture_in_mouse_position(self) -> Pasture | None:
         """Palauttaa hiiren osoittimen sijainnista laitumen, jos sellainen löytyy"""
         position = pygame.mouse.get_pos()
         for pasture in self._game.pastures:
-            if pasture.collide_with_point(position):
+            if is_point_on_pasture(pasture.coordinates, position):
                 return pasture
         return None
 
@@ -100,9 +181,10 @@ class Ui:
 
     # Näyttö
 
-    def _render_sidebar_text(self, text: str, top: int) -> int:
+    def _render_sidebar_text(self, text: str, top: int, font=None) -> int:
         """Lisää tekstin määriteltyyn kohtaan näytöllä"""
-        text_surface = self._sidebar_font.render(text, True, BLACK)
+        font = font if font is not None else self._sidebar_font
+        text_surface = font.render(text, True, BLACK)
         text_rect = text_surface.get_rect(
             top=top, right=self._screen.get_rect().right - SIDEBAR_MARGIN)
 
@@ -135,6 +217,22 @@ class Ui:
             return f'Tekoäly, {computers_largest_herd}'
         return f'Tasapeli, {computers_largest_herd}'
 
+    def _get_search_statistics_texts(self) -> List[str]:
+        """Palauttaa tekoälyn viimeisimmän haun tarkemmat tilastot riveittäin"""
+        statistics = self._latest_search_statistics
+        if 'leaf_evaluations' not in statistics:
+            return []
+        cutoffs = '/'.join(str(amount) for amount in get_cutoffs_per_ply(statistics))
+        return [
+            f'Solmut: {self._latest_search_nodes}, lehdet: {statistics["leaf_evaluations"]:.0f}',
+            f'Haarautuminen: {statistics["effective_branching_factor"]:.1f}',
+            f'Karsinnat: {cutoffs if cutoffs else "-"}',
+            f'Siirrot: {statistics["move_generation_time"]:.2f}s, '
+            f'arviot: {statistics["evaluation_time"]:.2f}s',
+            f'Osumat: {statistics["table_hit_rate"]:.0%} / '
+            f'{statistics["solver_hit_rate"]:.0%}',
+        ]
+
     def _render_sidebar(self):
         """Lisää tietosarakkeen näytön oikeaan reunaan"""
         top_margin = self._render_sidebar_text(
@@ -144,7 +242,10 @@ class Ui:
             f'Vuoro: {self._game.get_number_of_turn()}', top_margin)
 
         top_margin = self._render_sidebar_text(
-            f'Vaikeustaso: {COMPUTER_DEPTH}', top_margin)
+            f'Aikaraja: {COMPUTER_TIME_LIMIT:.1f}s', top_margin)
+
+        top_margin = self._render_sidebar_text(
+            f'Syvyys: {self._latest_search_depth}', top_margin)
 
         top_margin = self._render_sidebar_text(
             f'Tilanne: {self._latest_game_value}', top_margin)
@@ -152,6 +253,19 @@ class Ui:
         top_margin = self._render_sidebar_text(
             f'Siirron kesto: {self._latest_computation_time:.2f}s', top_margin)
 
+        if isinstance(self._computer, Engine):
+            top_margin = self._render_sidebar_text(
+                f'Välimuisti: {self._computer.table.hits}/{self._computer.table.stores}/'
+                f'{self._computer.table.collisions}',
+                top_margin)
+        else:
+            top_margin = self._render_sidebar_text(
+                f'Satunnaispelit: {self._computer.playouts}', top_margin)
+
+        if SHOW_SEARCH_STATISTICS and not self._game.is_over():
+            for text in self._get_search_statistics_texts():
+                top_margin = self._render_sidebar_text(text, top_margin, self._statistics_font)
+
         if self._game.is_over():
             top_margin = self._render_sidebar_text(
                 self._get_winner_text(), top_margin + SIDEBAR_DIVIDER)
@@ -179,7 +293,7 @@ class Ui:
         if pasture.is_occupied_by_computer():
             color = COMPUTERS_PASTURE_COLOR
 
-        if self._game.is_focused(pasture, pasture.collide_with_point(mouse)):
+        if self._game.is_focused(pasture, is_point_on_pasture(pasture.coordinates, mouse)):
             return tuple(x + HIGHLIGHT_OFFSET if x + HIGHLIGHT_OFFSET < 255 else 255 for x in color)
 
         return color
@@ -187,7 +301,9 @@ class Ui:
     def _render_pasture(self, pasture: Pasture, mouse_position: Tuple[int, int]):
         """Lisää laitumen näytölle"""
         pasture_color = self._get_pasture_color(pasture, mouse_position)
-        pygame.draw.polygon(self._screen, pasture_color, pasture.vertices)
+        vertices = get_pasture_vertices(pasture.coordinates)
+        centre = get_pasture_centre(pasture.coordinates)
+        pygame.draw.polygon(self._screen, pasture_color, vertices)
 
         planned_sheep = pasture.get_amount_of_planned_sheep()
         sheep = pasture.get_amount_of_sheep()
@@ -195,17 +311,17 @@ class Ui:
         if planned_sheep > 0:
             text_surface = self._board_font.render(
                 str(planned_sheep), True, BLACK)
-            text_rect = text_surface.get_rect(center=pasture.centre)
+            text_rect = text_surface.get_rect(center=centre)
             self._screen.blit(text_surface, text_rect)
         elif sheep > 0:
             text_surface = self._board_font.render(
                 str(sheep), True, WHITE)
-            text_rect = text_surface.get_rect(center=pasture.centre)
+            text_rect = text_surface.get_rect(center=centre)
             self._screen.blit(text_surface, text_rect)
 
         # Piirretään laitumen reuna
         pygame.draw.polygon(self._screen, PASTURE_BORDER_COLOR,
-                            pasture.vertices, PASTURE_BORDER_WIDTH)
+                            vertices, PASTURE_BORDER_WIDTH)
 
     def _render_board(self):
         """Lisää pelilaudan laitumet näytölle"""
@@ -224,24 +340,22 @@ class Ui:
     # Pelin suoritus
 
     def _update_game_state(self):
-        """Pelaa seuraavan vuoron minimaxia käyttäen"""
+        """Pelaa seuraavan vuoron syventyvää hakua käyttäen"""
         start_time = time.time()
 
-        depth = (SIMULATED_PLAYER_DEPTH if (self._game.is_simulation and self._game.is_players_turn)
-                 else COMPUTER_DEPTH)
-        _, next_game_state = minimax(
-            self._game, depth, ALPHA, BETA, self._game.is_players_turn)
+        engine = (self._simulated_player if (self._game.is_simulation and self._game.is_players_turn)
+                  else self._computer)
+        result = engine.choose_move(self._game)
 
-        if next_game_state is None:
+        if result.move is None:
             raise SystemError('No next move found')
-        self._game = next_game_state
+        self._game.make_move(result.move)
 
-        elapsed_time = time.time() - start_time
-        self._latest_computation_time = elapsed_time
-
-        # Varmistetaan, että siirrossa kestää vähintään sekunti
-        if elapsed_time < 1:
-            time.sleep(1 - elapsed_time)
+        self._latest_computation_time = time.time() - start_time
+        self._latest_search_depth = result.depth
+        if engine is self._computer:
+            self._latest_search_nodes = result.nodes
+            self._latest_search_statistics = result.statistics
 
     def _update_latest_game_value(self) -> None:
         """Päivittää pelitilanteen arvon instanssimuuttujaan"""
@@ -253,6 +367,10 @@ class Ui:
             self._update_game_state()
             self._update_latest_game_value()
 
+        if self._game.is_input_allowed():
+            # Tekoäly laskee taustalla, kun pelaaja miettii siirtoaan
+            self._computer.ponder(self._game)
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self._exit()
@@ -1,45 +1,35 @@
-from typing import List
-
-from constants import (
-    INITIAL_POSITION,
-    MINIMAL_RADIUS,
-    PASTURE_RADIUS
-)
+from typing import Dict, List, Tuple
 from pasture import Pasture
+from topology import Coordinates, Topology
+
+
+def _compute_coordinates(board_height: int, board_width: int) -> List[Coordinates]:
+    """Palauttaa pelilaudan laidunten aksiaaliset koordinaatit riveittäin"""
+    coordinates: List[Coordinates] = []
+    for row in range(board_height):
+        for column in range(board_width):
+            # Joka toinen sarake on puoli laidunta alempana kuin edellinen
+            coordinates.append((column, row - (column - (column & 1)) // 2))
+    return coordinates
+
+
+_topologies: Dict[Tuple[int, int], Topology] = {}
+
 
+def get_topology(board_height: int, board_width: int) -> Topology:
+    """Palauttaa laudan rakenteen, joka lasketaan vain kerran kutakin laudan kokoa kohden"""
+    dimensions = (board_height, board_width)
+    if dimensions not in _topologies:
+        _topologies[dimensions] = Topology.from_coordinates(
+            _compute_coordinates(board_height, board_width))
+    return _topologies[dimensions]
 
-# Code derived from:
-# https://github.com/rbaltrusch/pygame_examples/blob/master/code/hexagonal_tiles/main.py
-# Original Author: Richard Baltrusch
-# License: MIT License. All original licensing terms have been fully preserved.
-# Date accessed: 2024-03-21
-# Methods adapted: init_pastures
 
 def init_pastures(board_height: int, board_width: int) -> List[Pasture]:
     """Luo pelilaudan laitumet"""
-    leftmost_pasture = Pasture(INITIAL_POSITION)
-    pastures = [leftmost_pasture]
-
-    for y_axis in range(board_height):
-        if y_axis > 0:
-            position = leftmost_pasture.vertices[2]
-            leftmost_pasture = Pasture(position)
-            pastures.append(leftmost_pasture)
-
-        pasture = leftmost_pasture
-        for x_axis in range(board_width - 1):
-            (x, y) = pasture.position
-            # Lisätään joka toinen laidun ylä- ja joka toinen alaviistoon edellisestä
-            if x_axis % 2 == 1:
-                position = (x + PASTURE_RADIUS * 3 / 2,
-                            y - MINIMAL_RADIUS)
-            else:
-                position = (x + PASTURE_RADIUS * 3 / 2,
-                            y + MINIMAL_RADIUS)
-            pasture = Pasture(position)
-            pastures.append(pasture)
-
-    return pastures
+    topology = get_topology(board_height, board_width)
+    return [Pasture(coordinates, index=index, topology=topology)
+            for index, coordinates in enumerate(topology.coordinates)]
 
 
 def calculate_initial_sheep(board_height: int, board_width: int) -> int:
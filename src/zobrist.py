@@ -0,0 +1,35 @@
+from __future__ import annotations
+import random
+from dataclasses import dataclass
+from functools import cache
+from typing import Tuple
+from constants import ZOBRIST_SEED
+
+
+@dataclass(frozen=True)
+class ZobristKeys:
+    """Satunnaisluvut, joiden XOR-summasta muodostuu pelitilanteen tiiviste"""
+    pastures: Tuple[Tuple[Tuple[int, ...], ...], ...]
+    players_turn: int
+
+    def __deepcopy__(self, memo) -> ZobristKeys:
+        # Avaimet eivät muutu, joten kopiot voivat jakaa ne
+        return self
+
+    def get_pasture_key(self, index: int, occupier: int | None, sheep: int) -> int:
+        """Palauttaa laitumen tilaa vastaavan avaimen. Vapaan laitumen avain on nolla."""
+        if occupier is None:
+            return 0
+        return self.pastures[index][occupier][sheep]
+
+
+@cache
+def get_zobrist_keys(amount_of_pastures: int, max_sheep: int) -> ZobristKeys:
+    """Palauttaa laudan kokoa vastaavat avaimet. Sama siemen tuottaa samat avaimet
+    jokaisessa prosessissa, joten tiivisteitä voi verrata ajokertojen välillä."""
+    generator = random.Random(ZOBRIST_SEED)
+    pastures = tuple(
+        tuple(tuple(generator.getrandbits(64) for _ in range(max_sheep + 1))
+              for _ in range(2))
+        for _ in range(amount_of_pastures))
+    return ZobristKeys(pastures, generator.getrandbits(64))